@@ -1,50 +1,205 @@
 from langchain_openai import ChatOpenAI
 from langchain.agents import AgentExecutor, create_openai_functions_agent
-from langchain.tools import tool
+from langchain.tools import StructuredTool
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-import requests
+import os
+import re
+import httpx
 
+from shared.routing import RoutedAgent
 
-@tool
-def predict_future_home_price(years_from_now: int) -> str:
-    """Predict the average home price for a given number of years from now.
-    Use this tool when the user asks about future home prices.
-    
-    Args:
-        years_from_now: Number of years in the future to predict (e.g., 1, 2, 5, 10)
-    
-    Returns:
-        A string with the predicted home price.
+
+API_URL = os.getenv("PREDICTION_API_URL", "http://localhost:8000")
+
+
+class PredictionClient:
     """
-    try:
-        response = requests.post(
-            "http://localhost:8000/predict",
-            json={"years_from_now": years_from_now},
-            timeout=5
-        )
+    Pooled keep-alive client for the prediction API.
+
+    A shared ``httpx.Client`` (sync tool calls) and ``httpx.AsyncClient``
+    (``ainvoke``) are created on first use and reused, so tool calls do not
+    open a new connection each time and async calls can overlap.
+    """
+
+    def __init__(self, base_url=API_URL, timeout=5.0, max_connections=20):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_connections)
+        self._client = None
+        self._async_client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = httpx.Client(base_url=self.base_url, timeout=self.timeout, limits=self.limits)
+        return self._client
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=self.limits)
+        return self._async_client
+
+    def predict(self, years_from_now):
+        response = self.client.post("/predict", json={"years_from_now": years_from_now})
         response.raise_for_status()
-        data = response.json()
-        price = data["predicted_price"]
-        return f"The predicted average home price in {years_from_now} year(s) from now is ${price:,.2f}"
-    except requests.exceptions.ConnectionError:
-        return "Error: Could not connect to the prediction API. Make sure the FastAPI server is running on http://localhost:8000"
-    except Exception as e:
-        return f"Error calling prediction API: {str(e)}"
+        return response.json()
+
+    async def apredict(self, years_from_now):
+        response = await self.async_client.post("/predict", json={"years_from_now": years_from_now})
+        response.raise_for_status()
+        return response.json()
+
+    def predict_range(self, start, end, step=1):
+        response = self.client.get("/predict/range", params={"start": start, "end": end, "step": step})
+        response.raise_for_status()
+        return response.json()
+
+    async def apredict_range(self, start, end, step=1):
+        response = await self.async_client.get("/predict/range", params={"start": start, "end": end, "step": step})
+        response.raise_for_status()
+        return response.json()
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+def _format_price(years_from_now, data):
+    price = data["predicted_price"]
+    return f"The predicted average home price in {years_from_now} year(s) from now is ${price:,.2f}"
+
 
+def _format_trajectory(data):
+    lines = [
+        f"- {years} year(s) from now: ${price:,.2f}"
+        for years, price in zip(data["years_from_now"], data["predicted_prices"])
+    ]
+    return "Predicted average home prices:\n" + "\n".join(lines)
 
-def create_agent(api_key: str):
-    """Create and return the LangChain agent."""
+
+def _format_error(exc, client):
+    if isinstance(exc, httpx.TransportError):
+        return f"Error: Could not connect to the prediction API. Make sure the FastAPI server is running on {client.base_url}"
+    return f"Error calling prediction API: {str(exc)}"
+
+
+def make_tools(client):
+    """Build the agent tools (sync and async variants) on top of a PredictionClient."""
+
+    def predict_future_home_price(years_from_now: int) -> str:
+        """Predict the average home price for a given number of years from now.
+        Use this tool when the user asks about future home prices.
+        
+        Args:
+            years_from_now: Number of years in the future to predict (e.g., 1, 2, 5, 10)
+        
+        Returns:
+            A string with the predicted home price.
+        """
+        try:
+            return _format_price(years_from_now, client.predict(years_from_now))
+        except Exception as e:
+            return _format_error(e, client)
+
+    async def apredict_future_home_price(years_from_now: int) -> str:
+        try:
+            return _format_price(years_from_now, await client.apredict(years_from_now))
+        except Exception as e:
+            return _format_error(e, client)
+
+    def predict_home_price_trajectory(start_year: int = 1, end_year: int = 10, step: int = 1) -> str:
+        """Predict the average home price for every year in a range, in one call.
+        Use this tool when the user asks about several years or how prices will develop over time.
+        
+        Args:
+            start_year: First number of years from now (e.g., 1)
+            end_year: Last number of years from now, inclusive (e.g., 10)
+            step: Spacing between years (e.g., 1 for every year, 5 for every five years)
+        
+        Returns:
+            A string listing the predicted price for each year.
+        """
+        try:
+            return _format_trajectory(client.predict_range(start_year, end_year, step))
+        except Exception as e:
+            return _format_error(e, client)
+
+    async def apredict_home_price_trajectory(start_year: int = 1, end_year: int = 10, step: int = 1) -> str:
+        try:
+            return _format_trajectory(await client.apredict_range(start_year, end_year, step))
+        except Exception as e:
+            return _format_error(e, client)
+
+    return [
+        StructuredTool.from_function(func=predict_future_home_price, coroutine=apredict_future_home_price),
+        StructuredTool.from_function(func=predict_home_price_trajectory, coroutine=apredict_home_price_trajectory),
+    ]
+
+
+TRAJECTORY_PATTERN = re.compile(r"\b(?:next|coming)\s+(\d+)\s*(?:years?|yrs?)\b", re.IGNORECASE)
+# Future phrasing only: a bare "5 years" may just as well be "5 years ago"
+YEARS_PATTERNS = [
+    re.compile(r"\byears?[ _]from[ _]now\s*[:=]?\s*(\d+)\b", re.IGNORECASE),
+    re.compile(r"\bin\s+(\d+)\s*(?:years?|yrs?)\b", re.IGNORECASE),
+    re.compile(r"\b(\d+)\s*(?:years?|yrs?)\s+from\s+now\b", re.IGNORECASE),
+]
+PRICE_INTENT = re.compile(r"\b(price|prices|cost|worth|value|predict\w*|years?[ _]from[ _]now)\b", re.IGNORECASE)
+AMBIGUOUS_INTENT = re.compile(r"\b(compare|versus|vs|difference|between|why|explain|if|and|or)\b", re.IGNORECASE)
+PAST_INTENT = re.compile(r"\b(ago|last|past|was|were|did|previous(?:ly)?|used to)\b", re.IGNORECASE)
+
+
+class YearsRouter:
+    """
+    Parser-based fast path for plain "price in N years" questions.
+
+    A message is routed only when it asks about price, contains exactly one
+    number, uses future phrasing ("in N years", "N years from now", "years
+    from now: N", "next N years") and has no comparison, alternative ("or")
+    or past-tense wording. "over the next N years" fetches the whole
+    trajectory; the other forms a single horizon. Anything else returns None
+    and goes to the LLM.
+    """
+
+    def route(self, text):
+        """Return ``(tool_name, tool_input)`` for a plain price question, else None."""
+        if not PRICE_INTENT.search(text) or AMBIGUOUS_INTENT.search(text) or PAST_INTENT.search(text):
+            return None
+        if len(re.findall(r"\d+(?:\.\d+)?", text)) != 1:
+            return None
+        match = TRAJECTORY_PATTERN.search(text)
+        if match:
+            return "predict_home_price_trajectory", {"start_year": 1, "end_year": int(match.group(1)), "step": 1}
+        for pattern in YEARS_PATTERNS:
+            match = pattern.search(text)
+            if match:
+                return "predict_future_home_price", {"years_from_now": int(match.group(1))}
+        return None
+
+
+def create_agent(api_key: str, client=None, route=True):
+    """
+    Create and return the LangChain agent (tools use ``client`` or a new pooled PredictionClient).
+
+    With ``route`` (the default), plain "price in N years" questions skip the LLM.
+    """
     llm = ChatOpenAI(
         model="gpt-4o-mini",
         temperature=0.7,
         api_key=api_key
     )
     
-    tools = [predict_future_home_price]
+    tools = make_tools(client or PredictionClient())
     
     prompt = ChatPromptTemplate.from_messages([
         ("system", """You are a helpful real estate assistant that can predict future home prices.
 When users ask about future home prices, use the predict_future_home_price tool to get predictions.
+When they ask about several years or a trend, use predict_home_price_trajectory to get all years in one call.
 Be friendly and explain the predictions in a helpful way.
 Note: The predictions are based on a simple linear regression model with simulated data for demo purposes."""),
         MessagesPlaceholder(variable_name="chat_history", optional=True),
@@ -55,4 +210,6 @@ Note: The predictions are based on a simple linear regression model with simulat
     agent = create_openai_functions_agent(llm, tools, prompt)
     agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
     
+    if route:
+        return RoutedAgent(agent_executor, tools, YearsRouter())
     return agent_executor
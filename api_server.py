@@ -1,18 +1,69 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import Response
 from pydantic import BaseModel
-from model import HomePricePredictor, MODEL_PATH
+from model import HomePricePredictor, MODEL_PATH, DEFAULT_TABLE_MAX_HORIZON
+from shared.metrics import MetricsRegistry, MetricsMiddleware
+from typing import List
+import numpy as np
 import os
+import time
 
 app = FastAPI(title="Home Price Prediction API")
 
 predictor = HomePricePredictor()
 
+MAX_RANGE_POINTS = 1000
+# "table" precomputes prices for 0..TABLE_MAX_HORIZON years at startup; "sklearn" calls the model per request
+SERVING_MODE = os.getenv("SERVING_MODE", "table")
+TABLE_MAX_HORIZON = int(os.getenv("TABLE_MAX_HORIZON", str(DEFAULT_TABLE_MAX_HORIZON)))
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+# Modification time of the loaded model file, used as its version label
+model_version = None
+
+metrics = MetricsRegistry()
+request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route", "status")
+)
+requests_in_flight = metrics.gauge("http_requests_in_flight", "HTTP requests being served", ("method",))
+stage_seconds = metrics.histogram(
+    "prediction_stage_seconds", "Time spent in one stage of a prediction request (parse, predict, serialize)",
+    ("stage", "model_version", "serving_mode"),
+)
+prediction_horizons = metrics.histogram(
+    "prediction_horizons", "Horizons predicted per request", ("route",),
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 1000),
+)
+metrics.gauge(
+    "model_info", "Loaded model (always 1)", ("model_version", "serving_mode"),
+    callback=lambda: {(model_version, serving_mode()): 1} if model_version else {},
+)
+
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, duration=request_seconds, in_flight=requests_in_flight)
+
+
+def serving_mode():
+    return "table" if predictor.compiled else "sklearn"
+
+
+def observe_stage(stage, started):
+    """Record the time since ``started`` for one stage; returns the current time."""
+    now = time.perf_counter()
+    if METRICS_ENABLED and started is not None:
+        stage_seconds.labels(stage, model_version, serving_mode()).observe(now - started)
+    return now
+
+
 @app.on_event("startup")
 async def startup_event():
     """Load the model on startup."""
+    global model_version
     if not predictor.load(MODEL_PATH):
         raise RuntimeError(f"Model not found at {MODEL_PATH}. Please run: python model.py")
-    print("Model loaded successfully")
+    model_version = time.strftime("%Y%m%d-%H%M%S", time.gmtime(os.path.getmtime(MODEL_PATH)))
+    if SERVING_MODE == "table":
+        predictor.compile(TABLE_MAX_HORIZON)
+    print(f"Model loaded successfully (serving mode: {SERVING_MODE})")
 
 
 class PredictionRequest(BaseModel):
@@ -24,23 +75,63 @@ class PredictionResponse(BaseModel):
     predicted_price: float
 
 
+class RangePredictionResponse(BaseModel):
+    years_from_now: List[int]
+    predicted_prices: List[float]
+
+
 @app.post("/predict", response_model=PredictionResponse)
-async def predict(request: PredictionRequest):
+async def predict(request: PredictionRequest, http_request: Request):
     """Predict home price for a given number of years from now."""
+    started = observe_stage("parse", getattr(http_request.state, "metrics_started", None))
     try:
         price = predictor.predict(request.years_from_now)
-        return PredictionResponse(
-            years_from_now=request.years_from_now,
-            predicted_price=price
-        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    started = observe_stage("predict", started)
+    response = PredictionResponse(years_from_now=request.years_from_now, predicted_price=price)
+    observe_stage("serialize", started)
+    return response
+
+
+@app.get("/predict/range", response_model=RangePredictionResponse)
+async def predict_range(
+    start: int = Query(0, ge=0),
+    end: int = Query(10, ge=0),
+    step: int = Query(1, ge=1),
+):
+    """Predict home prices for every horizon from ``start`` to ``end`` (inclusive) in one pass."""
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must be >= start")
+    if (end - start) // step + 1 > MAX_RANGE_POINTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_RANGE_POINTS} horizons per request")
+    
+    years = np.arange(start, end + 1, step)
+    started = time.perf_counter()
+    try:
+        prices = predictor.predict_many(years)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    started = observe_stage("predict", started)
+    if METRICS_ENABLED:
+        prediction_horizons.labels("/predict/range").observe(len(years))
+    response = RangePredictionResponse(years_from_now=years.tolist(), predicted_prices=prices.tolist())
+    observe_stage("serialize", started)
+    return response
 
 
 @app.get("/health")
 async def health():
     """Health check endpoint."""
-    return {"status": "ok"}
+    return {"status": "ok", "serving_mode": serving_mode()}
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text-format metrics (404 when METRICS_ENABLED=0)."""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(metrics.render(), media_type=metrics.content_type)
 
 
 if __name__ == "__main__":
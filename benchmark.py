@@ -0,0 +1,81 @@
+"""
+Compare the sklearn and lookup-table serving paths of the home price model.
+
+Measures predictions per second of ``HomePricePredictor.predict`` directly
+and requests per second of ``POST /predict`` through the FastAPI app
+in-process (no network), for both serving modes.
+
+Usage:
+    python benchmark.py [--calls 100000] [--requests 5000] [--concurrency 32]
+"""
+import argparse
+import asyncio
+import time
+import warnings
+
+import httpx
+
+import api_server
+from model import HomePricePredictor, MODEL_PATH, DEFAULT_TABLE_MAX_HORIZON
+
+
+def load_predictor(mode):
+    predictor = HomePricePredictor()
+    if not predictor.load(MODEL_PATH):
+        predictor.train()
+    if mode == "table":
+        predictor.compile(DEFAULT_TABLE_MAX_HORIZON)
+    return predictor
+
+
+def bench_predict(predictor, calls):
+    """Return direct predict() calls per second over horizons 0..20."""
+    start = time.perf_counter()
+    for i in range(calls):
+        predictor.predict(i % 21)
+    return calls / (time.perf_counter() - start)
+
+
+async def bench_requests(predictor, requests, concurrency):
+    """Return POST /predict requests per second through the ASGI app."""
+    api_server.predictor = predictor
+    transport = httpx.ASGITransport(app=api_server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        counter = iter(range(requests))
+
+        async def worker():
+            for i in counter:
+                response = await client.post("/predict", json={"years_from_now": i % 21})
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=100_000, help="Direct predict() calls per mode")
+    parser.add_argument('--requests', type=int, default=5_000, help="HTTP requests per mode")
+    parser.add_argument('--concurrency', type=int, default=32)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    results = {}
+    for mode in ("sklearn", "table"):
+        predictor = load_predictor(mode)
+        calls = args.calls if mode == "table" else max(1, args.calls // 20)
+        results[mode] = (
+            bench_predict(predictor, calls),
+            asyncio.run(bench_requests(predictor, args.requests, args.concurrency)),
+        )
+
+    print(f"{'mode':>8} {'predict()/s':>14} {'/predict req/s':>16}")
+    for mode, (calls_per_s, requests_per_s) in results.items():
+        print(f"{mode:>8} {calls_per_s:>14,.0f} {requests_per_s:>16,.0f}")
+    sklearn, table = results["sklearn"], results["table"]
+    print(f"{'speedup':>8} {table[0] / sklearn[0]:>13.0f}x {table[1] / sklearn[1]:>15.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,110 +1,346 @@
 from langchain_openai import ChatOpenAI
 from langchain.agents import AgentExecutor, create_openai_functions_agent
-from langchain.tools import tool
+from langchain.tools import StructuredTool
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-import requests
-import json
-
-
-@tool
-def predict_housing_price(
-    MedInc: float = 3.0,
-    HouseAge: float = 20.0,
-    AveRooms: float = 5.0,
-    AveBedrms: float = 1.0,
-    Population: float = 1000.0,
-    AveOccup: float = 3.0,
-    Latitude: float = 34.0,
-    Longitude: float = -118.0
-) -> str:
-    """Predict California housing price based on property features.
-    
+import asyncio
+import os
+import re
+import sys
+import threading
+import httpx
+
+# Repository root, for the ``shared`` package used by both agents
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from shared.routing import RoutedAgent
+
+
+API_URL = os.getenv("PREDICTION_API_URL", "http://localhost:8000")
+
+
+class HTTPTransport:
+    """
+    Calls the prediction API over pooled keep-alive connections.
+
+    One ``httpx.Client`` serves synchronous tool calls and one
+    ``httpx.AsyncClient`` serves ``ainvoke``, so repeated tool calls reuse
+    open connections instead of paying a TCP handshake each time, and
+    concurrent async calls overlap on the pool.
+
     Args:
-        MedInc: Median income in block group (in tens of thousands)
-        HouseAge: Median house age in block group
-        AveRooms: Average number of rooms per household
-        AveBedrms: Average number of bedrooms per household
-        Population: Block group population
-        AveOccup: Average number of household members
-        Latitude: Block group latitude
-        Longitude: Block group longitude
-    
-    Returns:
-        Predicted housing price as a formatted string.
+        base_url: Root URL of the prediction API
+        timeout: Per-request timeout in seconds
+        max_connections: Size of each connection pool
     """
-    try:
-        features = {
-            "MedInc": MedInc,
-            "HouseAge": HouseAge,
-            "AveRooms": AveRooms,
-            "AveBedrms": AveBedrms,
-            "Population": Population,
-            "AveOccup": AveOccup,
-            "Latitude": Latitude,
-            "Longitude": Longitude
-        }
-        
-        response = requests.post(
-            "http://localhost:8000/predict",
-            json={"features": features},
-            timeout=10
-        )
+
+    def __init__(self, base_url=API_URL, timeout=10.0, max_connections=20):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_connections)
+        self._client = None
+        self._async_client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(base_url=self.base_url, timeout=self.timeout, limits=self.limits)
+        return self._client
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=self.limits)
+        return self._async_client
+
+    def predict(self, features):
+        response = self.client.post("/predict", json={"features": features})
         response.raise_for_status()
-        data = response.json()
-        
-        price = data["predicted_price"]
-        return f"The predicted housing price is ${price:,.2f} based on the provided features."
-    except requests.exceptions.ConnectionError:
-        return "Error: Could not connect to the prediction API. Make sure the FastAPI server is running on http://localhost:8000"
-    except Exception as e:
-        return f"Error calling prediction API: {str(e)}"
+        return response.json()
+
+    async def apredict(self, features):
+        response = await self.async_client.post("/predict", json={"features": features})
+        response.raise_for_status()
+        return response.json()
 
+    def model_info(self):
+        response = self.client.get("/model/info")
+        response.raise_for_status()
+        return response.json()
 
-@tool
-def get_model_info() -> str:
-    """Get information about the current housing price prediction model.
-    
-    Returns:
-        Model information including features and performance metrics.
-    """
-    try:
-        response = requests.get(
-            "http://localhost:8000/model/info",
-            timeout=5
-        )
+    async def amodel_info(self):
+        response = await self.async_client.get("/model/info")
         response.raise_for_status()
-        data = response.json()
-        
-        if not data.get("model_loaded"):
-            return "No model is currently loaded."
+        return response.json()
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+class InProcessTransport:
+    """
+    Calls the backend's prediction functions directly, with no HTTP.
+
+    Used when the agent runs inside ``backend/main.py``. ``predict`` and
+    ``model_info`` are coroutine functions from the backend returning the
+    same payloads as ``POST /predict`` and ``GET /model/info``. Synchronous
+    tool calls (``invoke`` in a worker thread) are scheduled onto the
+    backend's event loop.
+
+    Args:
+        predict: Coroutine function taking a feature dict
+        model_info: Coroutine function taking no arguments
+        loop: Event loop the coroutines run on (default: the running loop)
+    """
+
+    def __init__(self, predict, model_info, loop=None):
+        self._predict = predict
+        self._model_info = model_info
+        self.loop = loop or asyncio.get_running_loop()
+
+    def _run(self, coro):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            coro.close()
+            raise RuntimeError("Use the async tool API from the backend event loop")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def predict(self, features):
+        return self._run(self._predict(features))
+
+    async def apredict(self, features):
+        return await self._predict(features)
+
+    def model_info(self):
+        return self._run(self._model_info())
+
+    async def amodel_info(self):
+        return await self._model_info()
+
+    async def aclose(self):
+        pass
+
+
+def _housing_features(MedInc, HouseAge, AveRooms, AveBedrms, Population, AveOccup, Latitude, Longitude):
+    return {
+        "MedInc": MedInc,
+        "HouseAge": HouseAge,
+        "AveRooms": AveRooms,
+        "AveBedrms": AveBedrms,
+        "Population": Population,
+        "AveOccup": AveOccup,
+        "Latitude": Latitude,
+        "Longitude": Longitude
+    }
+
+
+def _format_prediction(data):
+    price = data["predicted_price"]
+    text = f"The predicted housing price is ${price:,.2f} based on the provided features."
+    interval = data.get("prediction_interval")
+    if interval:
+        text += (f" The model's individual trees put it between ${interval['lower']:,.2f} and "
+                 f"${interval['upper']:,.2f} (middle {interval['level']:.0%} of their predictions), "
+                 "so treat the price as an estimate within that range.")
+    return text
+
+
+def _format_prediction_error(exc, transport):
+    if isinstance(exc, httpx.TransportError):
+        return ("Error: Could not connect to the prediction API. Make sure the FastAPI server "
+                f"is running on {getattr(transport, 'base_url', API_URL)}")
+    return f"Error calling prediction API: {str(exc)}"
+
+
+def _format_model_info(data):
+    if not data.get("model_loaded"):
+        return "No model is currently loaded."
+    
+    info = f"Model Information:\n"
+    info += f"Features: {', '.join(data['feature_names'])}\n"
+    
+    if data.get('metadata'):
+        metadata = data['metadata']
+        if 'metrics' in metadata:
+            metrics = metadata['metrics']
+            info += f"\nPerformance Metrics:\n"
+            info += f"  - R² Score: {metrics.get('r2', 'N/A'):.4f}\n"
+            info += f"  - RMSE: ${metrics.get('rmse', 0)*100000:,.2f}\n"
+            info += f"  - MAE: ${metrics.get('mae', 0)*100000:,.2f}\n"
+        info += f"Training Samples: {metadata.get('training_samples', 'N/A')}\n"
+    
+    return info
+
+
+def make_tools(transport):
+    """Build the agent tools on top of a transport (sync and async variants)."""
+
+    def predict_housing_price(
+        MedInc: float = 3.0,
+        HouseAge: float = 20.0,
+        AveRooms: float = 5.0,
+        AveBedrms: float = 1.0,
+        Population: float = 1000.0,
+        AveOccup: float = 3.0,
+        Latitude: float = 34.0,
+        Longitude: float = -118.0
+    ) -> str:
+        """Predict California housing price based on property features.
         
-        info = f"Model Information:\n"
-        info += f"Features: {', '.join(data['feature_names'])}\n"
+        Args:
+            MedInc: Median income in block group (in tens of thousands)
+            HouseAge: Median house age in block group
+            AveRooms: Average number of rooms per household
+            AveBedrms: Average number of bedrooms per household
+            Population: Block group population
+            AveOccup: Average number of household members
+            Latitude: Block group latitude
+            Longitude: Block group longitude
         
-        if data.get('metadata'):
-            metadata = data['metadata']
-            if 'metrics' in metadata:
-                metrics = metadata['metrics']
-                info += f"\nPerformance Metrics:\n"
-                info += f"  - R² Score: {metrics.get('r2', 'N/A'):.4f}\n"
-                info += f"  - RMSE: ${metrics.get('rmse', 0)*100000:,.2f}\n"
-                info += f"  - MAE: ${metrics.get('mae', 0)*100000:,.2f}\n"
-            info += f"Training Samples: {metadata.get('training_samples', 'N/A')}\n"
+        Returns:
+            Predicted housing price as a formatted string.
+        """
+        try:
+            features = _housing_features(MedInc, HouseAge, AveRooms, AveBedrms,
+                                         Population, AveOccup, Latitude, Longitude)
+            return _format_prediction(transport.predict(features))
+        except Exception as e:
+            return _format_prediction_error(e, transport)
+
+    async def apredict_housing_price(
+        MedInc: float = 3.0,
+        HouseAge: float = 20.0,
+        AveRooms: float = 5.0,
+        AveBedrms: float = 1.0,
+        Population: float = 1000.0,
+        AveOccup: float = 3.0,
+        Latitude: float = 34.0,
+        Longitude: float = -118.0
+    ) -> str:
+        try:
+            features = _housing_features(MedInc, HouseAge, AveRooms, AveBedrms,
+                                         Population, AveOccup, Latitude, Longitude)
+            return _format_prediction(await transport.apredict(features))
+        except Exception as e:
+            return _format_prediction_error(e, transport)
+
+    def get_model_info() -> str:
+        """Get information about the current housing price prediction model.
         
-        return info
-    except Exception as e:
-        return f"Error getting model info: {str(e)}"
-
-
-def create_agent(api_key: str):
-    """Create and return the LangChain agent for housing price predictions."""
-    llm = ChatOpenAI(
-        model="gpt-3.5-turbo",
-        temperature=0,
-        api_key=api_key
-    )
+        Returns:
+            Model information including features and performance metrics.
+        """
+        try:
+            return _format_model_info(transport.model_info())
+        except Exception as e:
+            return f"Error getting model info: {str(e)}"
+
+    async def aget_model_info() -> str:
+        try:
+            return _format_model_info(await transport.amodel_info())
+        except Exception as e:
+            return f"Error getting model info: {str(e)}"
+
+    return [
+        StructuredTool.from_function(func=predict_housing_price, coroutine=apredict_housing_price),
+        StructuredTool.from_function(func=get_model_info, coroutine=aget_model_info),
+    ]
+
+
+# Canonical names and unambiguous phrases only: loose words such as "age" or
+# "income" would attach unrelated numbers ("the owner is age 45") to a feature
+FEATURE_ALIASES = {
+    "MedInc": ["medinc", "median income"],
+    "HouseAge": ["houseage", "house age"],
+    "AveRooms": ["averooms", "average rooms"],
+    "AveBedrms": ["avebedrms", "average bedrooms"],
+    "Population": ["population"],
+    "AveOccup": ["aveoccup", "average occupancy"],
+    "Latitude": ["latitude"],
+    "Longitude": ["longitude"],
+}
+NUMBER = r"-?\d+(?:\.\d+)?"
+PREDICT_INTENT = re.compile(r"\b(predict\w*|price|estimate|value|worth|cost|how much)\b", re.IGNORECASE)
+AMBIGUOUS_INTENT = re.compile(
+    r"\b(compare|comparison|versus|vs|difference|between|why|explain|if|change|increase|decrease|and then)\b",
+    re.IGNORECASE,
+)
+
+
+class IntentRouter:
+    """
+    Parser-based fast path for messages that are plainly prediction requests.
+
+    "predict price with MedInc=5, HouseAge=10" or "how much for median income
+    6 and latitude 37.8" are answered by calling ``predict_housing_price``
+    directly. A message is routed only when it asks for a price, names at
+    least one feature (by its name or a phrase in FEATURE_ALIASES) with a
+    value, every number in it belongs to a feature, no feature gets two values
+    and it has no comparison or "what if" words.
+    Anything else returns None and goes to the LLM.
+    """
+
+    def __init__(self):
+        self._patterns = [
+            (name, re.compile(rf"\b{re.escape(alias)}\b\s*(?:=|:|is|of|at)?\s*({NUMBER})", re.IGNORECASE))
+            for name, aliases in FEATURE_ALIASES.items()
+            for alias in aliases
+        ]
+
+    def route(self, text):
+        """Return ``(tool_name, tool_input)`` for a clear prediction request, else None."""
+        if not PREDICT_INTENT.search(text) or AMBIGUOUS_INTENT.search(text):
+            return None
+
+        features = {}
+        used_spans = set()
+        for name, pattern in self._patterns:
+            for match in pattern.finditer(text):
+                value = float(match.group(1))
+                if features.get(name, value) != value:
+                    return None
+                features[name] = value
+                used_spans.add(match.span(1))
+
+        number_spans = {match.span() for match in re.finditer(NUMBER, text)}
+        if not features or number_spans - used_spans:
+            return None
+        return "predict_housing_price", features
+
+
+def create_agent(api_key: str = None, transport=None, llm=None, route=True):
+    """
+    Create and return the LangChain agent for housing price predictions.
+    
+    Args:
+        api_key: OpenAI API key
+        transport: HTTPTransport or InProcessTransport used by the tools
+            (default: a pooled HTTPTransport to PREDICTION_API_URL)
+        llm: Chat model to use instead of ChatOpenAI (e.g. a fake model in tests)
+        route: Answer plain prediction requests with the IntentRouter instead of the LLM
+    """
+    if llm is None:
+        # streaming=True makes the model report tokens to callbacks as they arrive
+        llm = ChatOpenAI(
+            model="gpt-3.5-turbo",
+            temperature=0,
+            api_key=api_key,
+            base_url=os.getenv("OPENAI_BASE_URL") or None,
+            streaming=True
+        )
     
-    tools = [predict_housing_price, get_model_info]
+    tools = make_tools(transport or HTTPTransport())
     
     prompt = ChatPromptTemplate.from_messages([
         ("system", """You are a helpful California housing price prediction assistant.
@@ -126,6 +362,8 @@ Be friendly and help users understand what factors affect housing prices."""),
     ])
     
     agent = create_openai_functions_agent(llm, tools, prompt)
-    agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
+    agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True, return_intermediate_steps=True)
     
+    if route:
+        return RoutedAgent(agent_executor, tools, IntentRouter())
     return agent_executor
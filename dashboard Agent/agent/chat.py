@@ -1,12 +1,19 @@
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 sys.path.append(os.path.dirname(__file__))
-from agent import create_agent
 
 load_dotenv()
 
+
+def build_agent(api_key):
+    # Imported here: LangChain takes seconds to load, so it loads in the
+    # background while the user types the first question
+    from agent import create_agent
+    return create_agent(api_key)
+
 def main():
     api_key = os.getenv("OPENAI_API_KEY")
     
@@ -15,7 +22,7 @@ def main():
         print("Please create a .env file with your OpenAI API key.")
         return
     
-    agent = create_agent(api_key)
+    agent_future = ThreadPoolExecutor(max_workers=1).submit(build_agent, api_key)
     
     print("=" * 60)
     print("California Housing Price Prediction Chatbot")
@@ -34,7 +41,7 @@ def main():
             continue
         
         try:
-            response = agent.invoke({"input": user_input})
+            response = agent_future.result().invoke({"input": user_input})
             print(f"\nAssistant: {response['output']}")
         except Exception as e:
             print(f"\nError: {e}")
@@ -0,0 +1,148 @@
+import asyncio
+import time
+from fastapi.concurrency import run_in_threadpool
+
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+QUEUE_WAIT_BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100]
+
+
+class Histogram:
+    """Bucketed histogram that also tracks count, mean and max."""
+
+    def __init__(self, buckets):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def to_dict(self):
+        labels = [f"<={b}" for b in self.buckets] + [f">{self.buckets[-1]}"]
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class MicroBatcher:
+    """
+    Gather concurrent single-row prediction requests into one batch.
+
+    Requests are queued on the event loop; a single worker task waits up to
+    ``max_wait_ms`` (or until ``max_batch_size`` rows are queued) and then runs
+    ``predict_fn`` on the whole batch in a worker thread. Rows submitted with
+    different ``context`` objects (e.g. model versions) are never mixed in one
+    ``predict_fn`` call.
+
+    Args:
+        predict_fn: Callable taking ``(context, rows)`` where rows is a list of
+            feature dicts, returning a sequence of predictions in the same order
+        max_batch_size: Maximum number of rows per batch
+        max_wait_ms: Maximum time the first queued row waits for company
+    """
+
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=2.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_BUCKETS_MS)
+        self._queue = None
+        self._worker = None
+
+    def start(self):
+        """Start the batching worker on the running event loop."""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the worker and fail any requests still waiting."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        while self._queue is not None and not self._queue.empty():
+            _, _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Batcher stopped"))
+
+    async def submit(self, features, context=None):
+        """Queue one row and wait for its prediction."""
+        if self._worker is None:
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((context, features, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            dispatched = time.perf_counter()
+            groups = {}
+            for item in batch:
+                self.queue_wait_ms.observe((dispatched - item[3]) * 1000.0)
+                groups.setdefault(id(item[0]), []).append(item)
+
+            for group in groups.values():
+                await self._predict_group(group)
+
+    async def _predict_group(self, group):
+        self.batch_sizes.observe(len(group))
+        context = group[0][0]
+        rows = [features for _, features, _, _ in group]
+        try:
+            predictions = await run_in_threadpool(self.predict_fn, context, rows)
+        except Exception as exc:
+            for _, _, future, _ in group:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for (_, _, future, _), prediction in zip(group, predictions):
+            if not future.done():
+                future.set_result(prediction)
+
+    def stats(self):
+        """Return batch-size and queue-wait distributions."""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batch_size": self.batch_sizes.to_dict(),
+            "queue_wait_ms": self.queue_wait_ms.to_dict(),
+        }
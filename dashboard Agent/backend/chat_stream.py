@@ -0,0 +1,156 @@
+import asyncio
+import json
+import time
+
+from langchain_core.callbacks import AsyncCallbackHandler
+
+
+def format_sse(event, data):
+    """Serialize one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def collect_tool_outputs(result):
+    """Turn an agent result's intermediate steps into tool output dicts."""
+    tool_outputs = []
+    for step in result.get("intermediate_steps", []):
+        if not step or len(step) != 2:
+            continue
+        action, observation = step
+        tool_outputs.append({
+            "tool": getattr(action, "tool", "unknown"),
+            "tool_input": getattr(action, "tool_input", None),
+            "output": str(observation)
+        })
+    return tool_outputs
+
+
+class ChatStreamHandler(AsyncCallbackHandler):
+    """
+    Forward agent callbacks to an asyncio.Queue as (event, data) pairs.
+
+    Emits ``tool_start`` when the agent decides on a tool call,
+    ``tool_output`` when the tool returns and ``token`` for every non-empty
+    LLM token (the model must stream, e.g. ``ChatOpenAI(streaming=True)``).
+    """
+
+    def __init__(self, queue):
+        self.queue = queue
+        self._tool_names = {}
+
+    async def on_llm_new_token(self, token, **kwargs):
+        if token:
+            await self.queue.put(("token", {"text": token}))
+
+    async def on_agent_action(self, action, **kwargs):
+        await self.queue.put(("tool_start", {"tool": action.tool, "tool_input": action.tool_input}))
+
+    async def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._tool_names[run_id] = (serialized or {}).get("name", "unknown")
+
+    async def on_tool_end(self, output, *, run_id, **kwargs):
+        tool = self._tool_names.pop(run_id, "unknown")
+        await self.queue.put(("tool_output", {"tool": tool, "output": str(output)}))
+
+    async def on_tool_error(self, error, *, run_id, **kwargs):
+        tool = self._tool_names.pop(run_id, "unknown")
+        await self.queue.put(("tool_output", {"tool": tool, "output": f"Error: {error}"}))
+
+
+class AgentTimingHandler(AsyncCallbackHandler):
+    """
+    Record how long each LLM call and tool call of an agent run takes.
+
+    Args:
+        histogram: Histogram labelled (stage,); observed as "llm" and "tool"
+    """
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self._started = {}
+
+    def _start(self, run_id):
+        self._started[run_id] = time.perf_counter()
+
+    def _end(self, stage, run_id):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            self.histogram.labels(stage).observe(time.perf_counter() - started)
+
+    async def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id)
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id)
+
+    async def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end("llm", run_id)
+
+    async def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end("llm", run_id)
+
+    async def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._start(run_id)
+
+    async def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end("tool", run_id)
+
+    async def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end("tool", run_id)
+
+
+async def stream_agent_events(agent_executor, inputs, on_result=None, extra=None, callbacks=()):
+    """
+    Run the agent with ``ainvoke`` and yield its progress as SSE text.
+
+    Yields ``tool_start``, ``tool_output`` and ``token`` events while the
+    agent runs, then one ``done`` event with the final reply and tool
+    outputs (or an ``error`` event). If the client goes away the agent run
+    is cancelled.
+
+    Args:
+        agent_executor: Agent to run
+        inputs: Agent inputs
+        on_result: Optional function called with the agent result before ``done``
+        extra: Optional fields added to the ``done`` payload
+        callbacks: Extra callback handlers for the run (e.g. AgentTimingHandler)
+    """
+    queue = asyncio.Queue()
+    finished = object()
+
+    async def run():
+        try:
+            return await agent_executor.ainvoke(inputs, config={"callbacks": [ChatStreamHandler(queue), *callbacks]})
+        finally:
+            await queue.put((finished, None))
+
+    task = asyncio.ensure_future(run())
+    try:
+        while True:
+            event, data = await queue.get()
+            if event is finished:
+                break
+            yield format_sse(event, data)
+
+        try:
+            result = task.result()
+            if on_result is not None:
+                on_result(result)
+        except Exception as exc:
+            yield format_sse("error", {"detail": f"Agent error: {exc}"})
+            return
+
+        yield format_sse("done", {
+            "reply": result.get("output", "I'm not sure how to respond to that."),
+            "tool_outputs": collect_tool_outputs(result) or None,
+            **(extra or {})
+        })
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+async def replay_events(payload, extra=None):
+    """Yield a cached reply as one ``token`` event followed by ``done``."""
+    yield format_sse("token", {"text": payload["reply"]})
+    yield format_sse("done", {**payload, **(extra or {})})
@@ -0,0 +1,558 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+FINISHED_STATES = ("succeeded", "failed", "cancelled")
+
+_progress_queue = None
+_cancel_store = None
+
+
+class JobQueueFull(Exception):
+    """Raised when the queue already holds the maximum number of pending jobs."""
+
+
+class JobCancelled(Exception):
+    """Raised in a worker process when its job has been cancelled."""
+
+
+def _init_worker(progress_queue, cancel_dir):
+    global _progress_queue, _cancel_store
+    _progress_queue = progress_queue
+    _cancel_store = JobStatusStore(cancel_dir)
+
+
+def report_progress(job_id, progress, stage):
+    """
+    Send a progress update from a worker process to the serving process.
+
+    Progress is reported between training stages, so this is also where a
+    cancelled job stops instead of running its remaining stages.
+
+    Raises:
+        JobCancelled: If the job has been cancelled
+    """
+    if _cancel_store is not None and _cancel_store.cancel_requested(job_id):
+        raise JobCancelled(f"Job {job_id} was cancelled")
+    if _progress_queue is not None:
+        _progress_queue.put((job_id, progress, stage))
+
+
+def run_training_job(job_id, kind, models_dir, base_data_path, upload_path=None, upload_name=None,
+                     retrain_mode='full', model_type='random_forest', search_options=None):
+    """
+    Train a model and publish it as an inactive version, in a worker process.
+
+    Args:
+        job_id: Id used for progress reports
+        kind: 'train' (California dataset only) or 'retrain' (with an upload)
+        models_dir: Root models directory for the registry
+        base_data_path: Path to the California housing CSV
+        upload_path: Uploaded CSV for 'retrain'
+        upload_name: Original file name of the upload
+        retrain_mode: 'full', 'incremental' or 'auto' for 'retrain'
+        model_type: Model for 'train': 'random_forest', 'linear' or 'search'
+        search_options: Keyword arguments for ml.model_search.search_models
+
+    Returns:
+        Dict with message, metrics, feature_names and model_version
+    """
+    import pandas as pd
+    from ml.model_trainer import train_model, retrain_with_user_data, load_base_dataset
+    from ml.preprocessing import load_holdout, load_model_artifacts
+    from ml.registry import publish_version, resolve_version
+
+    report_progress(job_id, 0.05, "loading data")
+    if kind == "train":
+        df = load_base_dataset(base_data_path)
+        report_progress(job_id, 0.15, "training")
+        model, scaler, metrics, feature_names, holdout = train_model(
+            df, model_type, search_options,
+            progress=lambda fraction, stage: report_progress(job_id, 0.15 + 0.6 * fraction, stage),
+            return_holdout=True
+        )
+        message = "Model trained successfully"
+    else:
+        user_df = pd.read_csv(upload_path)
+        current = current_holdout = None
+        if retrain_mode != "full":
+            parent_version, parent_path = resolve_version(models_dir)
+            current = load_model_artifacts(parent_path)
+            current_holdout = load_holdout(parent_path)
+        report_progress(job_id, 0.15, "training")
+        model, scaler, metrics, feature_names, holdout = retrain_with_user_data(
+            user_df, base_data_path, current=current, mode=retrain_mode,
+            holdout=current_holdout, return_holdout=True
+        )
+        if metrics['retrain_mode'] == 'incremental':
+            metrics['incremental']['parent_version'] = parent_version
+        message = f"Model retrained successfully with {upload_name}"
+
+    metadata = {
+        'model_type': type(model).__name__,
+        'features': feature_names,
+        'metrics': metrics,
+        'training_samples': metrics['training_samples']
+    }
+    if upload_name:
+        metadata['user_data_file'] = upload_name
+
+    report_progress(job_id, 0.85, "saving artifacts")
+    version = publish_version(model, scaler, feature_names, metadata, models_dir, activate=False, holdout=holdout)
+
+    return {
+        "message": message,
+        "metrics": metrics,
+        "feature_names": feature_names,
+        "model_version": version
+    }
+
+
+def run_compression_job(job_id, kind, models_dir, base_data_path, version=None, variant=None, engine='sklearn'):
+    """
+    Build the compressed variants of a model version and report their trade-offs.
+
+    The variants are scored on the holdout rows stored with the version (the
+    base dataset's holdout split for versions published without them). With
+    ``variant`` set, that variant is published as a new inactive version
+    (scaler and features of the source version, compression report in its
+    metrics) for the backend to activate.
+
+    Args:
+        job_id: Id used for progress reports
+        kind: Job kind ('compress')
+        models_dir: Root models directory for the registry
+        base_data_path: Path to the California housing CSV
+        version: Version to compress (default: the active one)
+        variant: Name of the variant in ml.compression.DEFAULT_CANDIDATES to publish
+        engine: Serving engine the latency is measured with
+
+    Returns:
+        Dict with message, report, source_version and model_version (None
+        when nothing was published)
+    """
+    from ml.compression import compress_model, holdout_split
+    from ml.model_trainer import load_base_dataset
+    from ml.preprocessing import load_holdout, load_model_artifacts
+    from ml.registry import publish_version, resolve_version
+
+    report_progress(job_id, 0.05, "loading model")
+    source_version, path = resolve_version(models_dir, version)
+    model, scaler, feature_names, source_metadata = load_model_artifacts(path)
+    if model is None:
+        raise ValueError(f"Model version {source_version} has no artifacts")
+    holdout = load_holdout(path)
+    X_train, X_test, _, y_test = holdout_split(load_base_dataset(base_data_path), scaler, feature_names, holdout)
+
+    report_progress(job_id, 0.1, "compressing")
+    report, models = compress_model(
+        model, X_train, X_test, y_test, engine=engine,
+        progress=lambda fraction, stage: report_progress(job_id, 0.1 + 0.75 * fraction, stage)
+    )
+    result = {
+        "message": f"Compressed model version {source_version}",
+        "report": report,
+        "source_version": source_version,
+        "model_version": None,
+    }
+    if variant is None:
+        return result
+    if variant not in models:
+        raise ValueError(f"Variant {variant} does not apply to a {type(model).__name__}")
+
+    row = next(row for row in report if row['name'] == variant)
+    compressed = models[variant]
+    metrics = dict(
+        source_metadata.get('metrics', {}),
+        rmse=row['rmse'], mae=row['mae'], r2=row['r2'],
+        compression={'source_version': source_version, 'variant': variant, 'report': report},
+    )
+    metrics.pop('incremental', None)
+    metadata = dict(source_metadata, model_type=type(compressed).__name__, metrics=metrics)
+    metadata.pop('version', None)
+
+    report_progress(job_id, 0.9, "saving artifacts")
+    result["model_version"] = publish_version(compressed, scaler, feature_names, metadata, models_dir,
+                                              activate=False, holdout=holdout)
+    result["message"] = f"Published {variant} of model version {source_version}"
+    return result
+
+
+class JobStatusStore:
+    """
+    Job snapshots in a directory every server worker can read.
+
+    The worker that owns a job writes ``<id>.json`` whenever the job changes,
+    so a status request answered by any other worker finds it. A cancel
+    request from another worker is left as ``<id>.cancel`` for the owner.
+
+    Args:
+        root: Directory holding the snapshots (e.g. ``models/jobs``)
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, job_id, suffix):
+        # Job ids are uuid hex strings; anything else cannot name a stored job
+        if not job_id.isalnum():
+            return None
+        return os.path.join(self.root, f"{job_id}{suffix}")
+
+    def save(self, snapshot):
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(snapshot["id"], ".json")
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f, default=str)
+        os.replace(tmp_path, path)
+
+    def get(self, job_id):
+        """Return the stored snapshot of a job, or None."""
+        path = self._path(job_id, ".json")
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (TypeError, FileNotFoundError, json.JSONDecodeError):
+            return None
+        if self.cancel_requested(job_id) and snapshot["status"] not in FINISHED_STATES:
+            snapshot.update(cancel_requested=True, stage="cancelling")
+        return snapshot
+
+    def list(self):
+        """Return all stored snapshots."""
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return []
+        snapshots = (self.get(name[:-len(".json")]) for name in names if name.endswith(".json"))
+        return [snapshot for snapshot in snapshots if snapshot is not None]
+
+    def request_cancel(self, job_id):
+        os.makedirs(self.root, exist_ok=True)
+        with open(self._path(job_id, ".cancel"), "w"):
+            pass
+
+    def cancel_requested(self, job_id):
+        path = self._path(job_id, ".cancel")
+        return path is not None and os.path.exists(path)
+
+    def delete(self, job_id):
+        for suffix in (".json", ".cancel"):
+            try:
+                os.remove(self._path(job_id, suffix))
+            except FileNotFoundError:
+                pass
+
+
+class TrainingJob:
+    """State of one submitted training job."""
+
+    def __init__(self, kind, serial_key=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.serial_key = serial_key
+        self.status = "queued"
+        self.progress = 0.0
+        self.stage = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.cancel_requested = False
+        self.future = None
+        self.call = None
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "stage": self.stage,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "cancel_requested": self.cancel_requested,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """
+    Process-pool-backed queue for training jobs.
+
+    Jobs run in separate processes so the serving event loop is never blocked
+    by a model fit. Progress is reported back over a multiprocessing queue.
+    When a job succeeds, ``on_success(job, result)`` is awaited on the event
+    loop (the backend uses it to hot-swap the new model); when a job is
+    cancelled after it started, ``on_discard(job, result)`` cleans up its
+    output instead. Jobs submitted with the same ``serial_key`` run one at a
+    time in submission order, each starting only after the previous one's
+    ``on_success`` has returned. With a ``store``, every change is written to
+    it, so ``status``, ``statuses`` and ``request_cancel`` also reach jobs
+    owned by other server workers. A running job is cancelled through a flag
+    file that the worker checks at its next ``report_progress``.
+
+    Args:
+        on_success: Coroutine function called with (job, result) on success
+        on_discard: Function called with (job, result) for cancelled results
+        max_workers: Number of training processes
+        max_pending: Maximum number of queued plus running jobs
+        history: Number of finished jobs kept for status queries
+        store: Optional JobStatusStore shared with other server workers
+    """
+
+    def __init__(self, on_success, on_discard=None, max_workers=1, max_pending=4, history=50, store=None):
+        self.on_success = on_success
+        self.on_discard = on_discard
+        self.max_workers = max(1, int(max_workers))
+        self.max_pending = max(1, int(max_pending))
+        self.history = history
+        self.jobs = {}
+        self._loop = None
+        self._context = multiprocessing.get_context("spawn")
+        self._progress_queue = None
+        self._executor = None
+        self._listener = None
+        self._serial = {}
+        self.store = store
+        # Cancel flags live next to the shared status, or in a private directory without a store
+        self._cancel_store = store or JobStatusStore(tempfile.mkdtemp(prefix="training-jobs-"))
+
+    def start(self):
+        """Bind to the running event loop and start the progress listener."""
+        self._loop = asyncio.get_running_loop()
+        if self._progress_queue is None:
+            self._progress_queue = self._context.Queue()
+            self._listener = threading.Thread(target=self._listen, daemon=True)
+            self._listener.start()
+
+    def shutdown(self):
+        """Stop the worker processes, cancelling jobs that have not started."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._progress_queue is not None:
+            self._progress_queue.put(None)
+            self._progress_queue = None
+        if self.store is None:
+            shutil.rmtree(self._cancel_store.root, ignore_errors=True)
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=self._context,
+                initializer=_init_worker,
+                initargs=(self._progress_queue, self._cancel_store.root),
+            )
+        return self._executor
+
+    def _listen(self):
+        queue = self._progress_queue
+        while True:
+            message = queue.get()
+            if message is None:
+                break
+            job_id, progress, stage = message
+            job = self.jobs.get(job_id)
+            if job is None or job.status in FINISHED_STATES:
+                continue
+            if job.status == "queued":
+                job.status = "running"
+                job.started_at = time.time()
+            job.progress = progress
+            job.stage = "cancelling" if job.cancel_requested else stage
+            self._publish(job)
+
+    def _publish(self, job):
+        if self.store is not None:
+            try:
+                self.store.save(job.to_dict())
+            except OSError as exc:
+                print(f"Warning: could not store status of job {job.id}: {exc}")
+
+    def pending(self):
+        return sum(1 for job in self.jobs.values() if job.status not in FINISHED_STATES)
+
+    def submit(self, kind, fn, *args, serial_key=None):
+        """
+        Queue ``fn(job_id, *args)`` in the process pool.
+
+        With ``serial_key`` set, the job waits until the earlier jobs with the
+        same key have finished.
+
+        Raises:
+            JobQueueFull: If ``max_pending`` jobs are already queued or running
+        """
+        if self.pending() >= self.max_pending:
+            raise JobQueueFull(f"{self.max_pending} training jobs already pending")
+
+        job = TrainingJob(kind, serial_key)
+        job.call = (fn, args)
+        # Register before submitting so early progress reports find the job
+        self.jobs[job.id] = job
+        self._publish(job)
+        if serial_key is not None:
+            waiting = self._serial.setdefault(serial_key, [])
+            waiting.append(job)
+            if len(waiting) > 1:
+                self._trim_history()
+                return job
+        try:
+            self._start(job)
+        except Exception:
+            self.jobs.pop(job.id, None)
+            self._release(job)
+            raise
+        self._trim_history()
+        return job
+
+    def _start(self, job):
+        fn, args = job.call
+        try:
+            job.future = self._get_executor().submit(fn, job.id, *args)
+        except BrokenProcessPool:
+            self._executor = None
+            job.future = self._get_executor().submit(fn, job.id, *args)
+
+        job.future.add_done_callback(
+            lambda future: self._loop.call_soon_threadsafe(self._schedule_finish, job)
+        )
+
+    def _release(self, job):
+        """Drop a finished job from its serial line and start the next one waiting."""
+        waiting = self._serial.get(job.serial_key)
+        if not waiting or job not in waiting:
+            return
+        waiting.remove(job)
+        while waiting:
+            next_job = waiting[0]
+            if self._cancel_store.cancel_requested(next_job.id):
+                # Cancelled from another worker while it waited for its turn
+                waiting.pop(0)
+                next_job.cancel_requested = True
+                next_job.status = next_job.stage = "cancelled"
+                next_job.finished_at = time.time()
+                self._publish(next_job)
+                continue
+            try:
+                self._start(next_job)
+                return
+            except Exception as exc:
+                waiting.pop(0)
+                next_job.status = next_job.stage = "failed"
+                next_job.error = str(exc)
+                next_job.finished_at = time.time()
+                self._publish(next_job)
+        self._serial.pop(job.serial_key, None)
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def list(self):
+        return sorted(self.jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def status(self, job_id):
+        """Status dict of a job owned by this or (through the store) another worker, or None."""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        return self.store.get(job_id) if self.store is not None else None
+
+    def statuses(self):
+        """Status dicts of the jobs of all workers, newest first."""
+        snapshots = {snapshot["id"]: snapshot for snapshot in (self.store.list() if self.store is not None else [])}
+        snapshots.update((job.id, job.to_dict()) for job in self.jobs.values())
+        return sorted(snapshots.values(), key=lambda snapshot: snapshot["created_at"], reverse=True)
+
+    def request_cancel(self, job_id):
+        """
+        Cancel a job owned by this or another worker; returns its status dict, or None.
+
+        A job owned by another worker stops at its next training stage, like a local one.
+        """
+        job = self.cancel(job_id)
+        if job is not None:
+            return job.to_dict()
+        snapshot = self.status(job_id)
+        if snapshot is not None and snapshot["status"] not in FINISHED_STATES:
+            self.store.request_cancel(job_id)
+            snapshot = self.store.get(job_id)
+        return snapshot
+
+    def cancel(self, job_id):
+        """
+        Cancel a job. Queued jobs never start. A running job stays "running"
+        with stage "cancelling" until its worker reaches the next training
+        stage and stops; a fit that completes first has its result discarded.
+        """
+        job = self.jobs.get(job_id)
+        if job is None or job.status in FINISHED_STATES:
+            return job
+        job.cancel_requested = True
+        if job.future is None:
+            # Still waiting behind an earlier job with the same serial key
+            self._serial[job.serial_key].remove(job)
+            job.status = job.stage = "cancelled"
+            job.finished_at = time.time()
+        elif job.future.cancel():
+            job.stage = "cancelled"
+        else:
+            self._cancel_store.request_cancel(job.id)
+            job.stage = "cancelling"
+        self._publish(job)
+        return job
+
+    def _schedule_finish(self, job):
+        asyncio.ensure_future(self._finish(job))
+
+    async def _finish(self, job):
+        future = job.future
+        if self._cancel_store.cancel_requested(job.id):
+            job.cancel_requested = True
+        try:
+            if future.cancelled() or isinstance(future.exception(), JobCancelled):
+                job.status = "cancelled"
+            elif future.exception() is not None:
+                job.status = "failed"
+                job.error = str(future.exception())
+            elif job.cancel_requested:
+                if self.on_discard is not None:
+                    self.on_discard(job, future.result())
+                job.status = "cancelled"
+            else:
+                job.stage = "activating"
+                await self.on_success(job, future.result())
+                job.result = future.result()
+                job.status = "succeeded"
+                job.progress = 1.0
+        except Exception as exc:
+            job.status = "failed"
+            job.error = str(exc)
+        finally:
+            if job.status in ("cancelled", "failed"):
+                job.stage = job.status
+            elif job.status == "succeeded":
+                job.stage = "done"
+            job.finished_at = time.time()
+            self._publish(job)
+            self._release(job)
+
+    def _trim_history(self):
+        finished = [job for job in self.list() if job.status in FINISHED_STATES]
+        for job in finished[self.history:]:
+            self.jobs.pop(job.id, None)
+            self._cancel_store.delete(job.id)
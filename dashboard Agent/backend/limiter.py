@@ -0,0 +1,109 @@
+import asyncio
+import math
+import time
+
+from backend.batcher import Histogram
+
+
+QUEUE_WAIT_BUCKETS_MS = [1, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+DURATION_BUCKETS_MS = [100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+
+class ConcurrencyLimitExceeded(Exception):
+    """Raised when a request cannot get a slot; carries a retry hint in seconds."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimiter:
+    """
+    Bound the number of concurrent requests, with a short wait queue.
+
+    At most ``max_concurrent`` holders run at once and at most ``max_queued``
+    more wait for a slot. Anything beyond that, or a waiter that does not get
+    a slot within ``queue_timeout`` seconds, is rejected with
+    ConcurrencyLimitExceeded so the endpoint can answer 429 instead of piling
+    up work. The retry hint is estimated from recent request durations.
+
+    Args:
+        max_concurrent: Requests allowed to run at the same time
+        max_queued: Requests allowed to wait for a slot
+        queue_timeout: Maximum seconds a request waits in the queue
+    """
+
+    def __init__(self, max_concurrent=16, max_queued=32, queue_timeout=30.0):
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.max_queued = max(0, int(max_queued))
+        self.queue_timeout = float(queue_timeout)
+        self._semaphore = None
+        self.active = 0
+        self.queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_BUCKETS_MS)
+        self.duration_ms = Histogram(DURATION_BUCKETS_MS)
+
+    def retry_after(self):
+        """Seconds a rejected client should wait before retrying (at least 1)."""
+        mean_s = self.duration_ms.total / self.duration_ms.count / 1000.0 if self.duration_ms.count else 1.0
+        backlog = (self.queued + self.active) / self.max_concurrent
+        return max(1, math.ceil(mean_s * max(1.0, backlog)))
+
+    async def acquire(self):
+        """
+        Wait for a slot and return its start time (pass it to ``release``).
+
+        Raises:
+            ConcurrencyLimitExceeded: If the queue is full or the wait times out
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        if self._semaphore.locked() and self.queued >= self.max_queued:
+            self.rejected += 1
+            raise ConcurrencyLimitExceeded(
+                f"{self.active} requests running and {self.queued} queued", self.retry_after()
+            )
+
+        enqueued = time.perf_counter()
+        self.queued += 1
+        try:
+            # Acquire in this task: wait_for runs it in another one, which can
+            # take the slot just as the timeout or a client disconnect cancels
+            # the wait, leaking the slot
+            async with asyncio.timeout(self.queue_timeout):
+                await self._semaphore.acquire()
+        except TimeoutError:
+            self.rejected += 1
+            raise ConcurrencyLimitExceeded(
+                f"no slot free after {self.queue_timeout:g}s in the queue", self.retry_after()
+            )
+        finally:
+            self.queued -= 1
+
+        started = time.perf_counter()
+        self.queue_wait_ms.observe((started - enqueued) * 1000.0)
+        self.active += 1
+        return started
+
+    def release(self, started):
+        """Free a slot obtained from ``acquire``."""
+        self.active -= 1
+        self.completed += 1
+        self.duration_ms.observe((time.perf_counter() - started) * 1000.0)
+        self._semaphore.release()
+
+    def stats(self):
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+            "queue_timeout_s": self.queue_timeout,
+            "active": self.active,
+            "queued": self.queued,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "queue_wait_ms": self.queue_wait_ms.to_dict(),
+            "duration_ms": self.duration_ms.to_dict(),
+        }
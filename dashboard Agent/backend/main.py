@@ -1,23 +1,51 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import APIRouter, FastAPI, HTTPException, UploadFile, File, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 from fastapi.concurrency import run_in_threadpool
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-import pandas as pd
+import asyncio
 import sys
 import os
+import time
 from typing import List, Dict, Any, Literal, Optional
 
+import numpy as np
 from dotenv import load_dotenv
-from langchain_core.messages import HumanMessage, AIMessage
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+# Repository root, for the ``shared`` package used by both servers
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
-from ml.preprocessing import preprocess_data, load_model_artifacts, save_model_artifacts
-from ml.model_trainer import train_model, retrain_with_user_data
-from agent.agent import create_agent
+from ml.registry import (
+    load_bundle, activate_version, delete_version, list_versions, current_version, rollback,
+)
+from ml.model_file import ModelFileError
+from ml.uncertainty import parse_quantiles, predict_distribution
+from backend.batcher import MicroBatcher
+from backend.jobs import JobQueue, JobQueueFull, JobStatusStore, run_training_job, run_compression_job
+from backend.prediction_cache import PredictionCache
+from backend.limiter import ConcurrencyLimiter, ConcurrencyLimitExceeded
+from backend.sessions import create_session_store, new_session_id, trim_history
+from backend.semantic_cache import SemanticCache
+from shared.metrics import MetricsRegistry, MetricsMiddleware, SIZE_BUCKETS
+from backend.streaming import (
+    STREAM_FORMATS, LineTooLong, RequestStreamingResponse, detect_input_format, iter_lines, open_multipart_file,
+    iter_record_chunks, format_header, format_predictions, format_error,
+)
 
 app = FastAPI(title="Housing Price Prediction API")
 
+# "full" serves everything. "predict" serves predictions, metrics and model
+# versions only, and never imports the training stack or LangChain.
+SERVER_PROFILE = os.getenv("SERVER_PROFILE", "full")
+if SERVER_PROFILE not in ("full", "predict"):
+    raise ValueError(f"SERVER_PROFILE must be 'full' or 'predict', not {SERVER_PROFILE!r}")
+
+# Registered on the app at the end of this module, in the full profile only
+training_routes = APIRouter()
+chat_routes = APIRouter()
+
 app.add_middleware( 
     CORSMiddleware,
     allow_origins=["*"],
@@ -26,54 +54,367 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-model = None
-scaler = None
-feature_names = None
-metadata = None
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+metrics = MetricsRegistry()
+http_request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency until the response is sent",
+    ("method", "route", "status"),
+)
+http_requests_in_flight = metrics.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served", ("method",)
+)
+prediction_stage_seconds = metrics.histogram(
+    "prediction_stage_seconds",
+    "Time spent in one stage of the prediction path (parse, preprocess, predict, serialize)",
+    ("stage", "model_version"),
+)
+prediction_batch_rows = metrics.histogram(
+    "prediction_batch_rows", "Rows per vectorized model call", ("model_version",), buckets=SIZE_BUCKETS
+)
+chat_stage_seconds = metrics.histogram(
+    "chat_stage_seconds", "Time spent in LLM calls and tool calls of agent runs", ("stage",)
+)
+
+if METRICS_ENABLED:
+    app.add_middleware(
+        MetricsMiddleware,
+        duration=http_request_seconds,
+        in_flight=http_requests_in_flight,
+        stages=prediction_stage_seconds,
+    )
+
+MODELS_DIR = os.getenv("MODELS_DIR", os.path.join(os.path.dirname(__file__), '..', 'models'))
+BASE_DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'california_housing.csv')
+UPLOADS_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'uploads')
+MODEL_ENGINE = os.getenv("MODEL_ENGINE", "mmap")
+# Re-check model.bundle data checksums on every load (they are verified once when written);
+# this reads the whole file and gives up the header-only mmap load
+MODEL_VERIFY_CHECKSUM = os.getenv("MODEL_VERIFY_CHECKSUM", "0") == "1"
+# How often each worker checks models/CURRENT for a version activated by another worker (0 disables)
+MODEL_WATCH_INTERVAL_S = float(os.getenv("MODEL_WATCH_INTERVAL_S", "2"))
+# Per-tree quantiles /predict and /predict/bulk return unless a request asks for others (empty: none)
+PREDICT_QUANTILES = parse_quantiles(os.getenv("PREDICT_QUANTILES", "0.05,0.5,0.95"))
+# Longest line (or quoted multi-line CSV record) /predict/stream buffers
+STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", str(1 << 20)))
+
+# Active ModelBundle; replaced by a single assignment on train/retrain/rollback
+bundle = None
+# LangChain agent, created on the first chat request
 agent_executor = None
+agent_lock = asyncio.Lock()
+# Held while a worker loads and activates a version, so its own watcher does not load it twice
+model_swap_lock = asyncio.Lock()
+model_watcher = None
+
+
+def predict_rows(active_bundle, rows, quantiles=None):
+    """
+    Run one vectorized scaler + model pass over a list of feature dicts.
+
+    Returns:
+        Dict from ``ml.uncertainty.predict_distribution``: 'mean' predictions,
+        plus the per-tree 'std' and 'quantiles' when ``quantiles`` is given
+        and the model averages trees
+    """
+    started = time.perf_counter()
+    X_scaled = active_bundle.preprocessor.transform(rows)
+    scaled = time.perf_counter()
+    result = predict_distribution(active_bundle.model, X_scaled, quantiles or None)
+    if METRICS_ENABLED:
+        version = active_bundle.version
+        prediction_stage_seconds.labels("preprocess", version).observe(scaled - started)
+        prediction_stage_seconds.labels("predict", version).observe(time.perf_counter() - scaled)
+        prediction_batch_rows.labels(version).observe(len(rows))
+    return result
+
+
+def predict_batch(active_bundle, rows, quantiles=PREDICT_QUANTILES):
+    """predict_rows for the micro-batcher: one (prediction, std, quantile values) tuple per row."""
+    result = predict_rows(active_bundle, rows, quantiles)
+    if result["std"] is None:
+        return [(prediction, None, None) for prediction in result["mean"].tolist()]
+    return list(zip(result["mean"].tolist(), result["std"].tolist(), map(tuple, result["quantiles"].T.tolist())))
+
+
+def spread_fields(std, values, quantiles):
+    """Response fields for the per-tree spread of one or more predictions, in dollars."""
+    if std is None:
+        return {"prediction_std": None, "prediction_interval": None, "quantiles": None}
+    values = [np.asarray(row) * 100000 for row in values]
+    interval = None
+    if len(quantiles) >= 2:
+        interval = {"level": round(quantiles[-1] - quantiles[0], 6),
+                    "lower": values[0].tolist(), "upper": values[-1].tolist()}
+    return {
+        "prediction_std": (np.asarray(std) * 100000).tolist(),
+        "prediction_interval": interval,
+        "quantiles": {f"{q:g}": row.tolist() for q, row in zip(quantiles, values)},
+    }
+
+
+def request_quantiles(quantiles):
+    """Quantiles of a request's ``quantiles`` query parameter (None: the PREDICT_QUANTILES default)."""
+    if quantiles is None:
+        return PREDICT_QUANTILES
+    try:
+        return parse_quantiles(quantiles)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def mark_handler_started(http_request, active_bundle):
+    """Record the "parse" stage: request start until the handler runs with a validated body."""
+    started = getattr(http_request.state, "metrics_started", None)
+    if METRICS_ENABLED and started is not None:
+        http_request.state.metrics_model_version = active_bundle.version
+        prediction_stage_seconds.labels("parse", active_bundle.version).observe(time.perf_counter() - started)
+
+
+def mark_handler_done(http_request):
+    """Start the "serialize" stage; MetricsMiddleware ends it when the response starts."""
+    if METRICS_ENABLED:
+        http_request.state.metrics_handler_done = time.perf_counter()
+
+
+def require_bundle():
+    """Return the active bundle or fail with 503 if no model is loaded."""
+    active_bundle = bundle
+    if active_bundle is None:
+        raise HTTPException(status_code=503, detail="Model not loaded. Please train a model first.")
+    return active_bundle
+
+
+def activate_and_load(version):
+    """Activate a published version on disk and load it as a bundle."""
+    new_bundle = load_bundle(MODELS_DIR, version, engine=MODEL_ENGINE, verify=MODEL_VERIFY_CHECKSUM)
+    if new_bundle is None:
+        raise RuntimeError(f"Model version {version} has no artifacts")
+    activate_version(MODELS_DIR, version)
+    return new_bundle
+
+
+def set_bundle(new_bundle):
+    """Make ``new_bundle`` the serving bundle and drop predictions cached for the old one."""
+    global bundle
+    previous_version = bundle.version if bundle is not None else None
+    bundle = new_bundle
+    if new_bundle is None or new_bundle.version != previous_version:
+        prediction_cache.clear()
+        chat_cache.clear()
+
+
+async def swap_in_trained_model(job, result):
+    """Hot-swap the model produced by a finished training job."""
+    if result["model_version"] is None:
+        return
+    async with model_swap_lock:
+        set_bundle(await run_in_threadpool(activate_and_load, result["model_version"]))
+
+
+async def watch_current_version():
+    """
+    Follow models/CURRENT and load whatever version it points to.
+
+    With several uvicorn workers, training, retraining and rollback only run
+    in the worker that got the request; the others pick the new version up
+    from CURRENT within ``MODEL_WATCH_INTERVAL_S``.
+    """
+    failed_version = None
+    while True:
+        await asyncio.sleep(MODEL_WATCH_INTERVAL_S)
+        async with model_swap_lock:
+            version = current_version(MODELS_DIR)
+            active_bundle = bundle
+            if version is None or version == failed_version or (
+                active_bundle is not None and active_bundle.version == version
+            ):
+                continue
+            try:
+                new_bundle = await run_in_threadpool(
+                    load_bundle, MODELS_DIR, version, MODEL_ENGINE, MODEL_VERIFY_CHECKSUM
+                )
+            except Exception as exc:
+                new_bundle = None
+                print(f"Warning: could not load model version {version}: {exc}")
+            if new_bundle is None:
+                failed_version = version
+                continue
+            set_bundle(new_bundle)
+            print(f"Switched to model version {version} from CURRENT")
+
+
+def discard_trained_model(job, result):
+    """Remove the unpublished output of a job cancelled while it was running."""
+    if result["model_version"] is not None:
+        delete_version(MODELS_DIR, result["model_version"])
+
+
+TRAIN_SEARCH_LATENCY_BUDGET_MS = float(os.getenv("TRAIN_SEARCH_LATENCY_BUDGET_MS", "20"))
+TRAIN_SEARCH_FOLDS = int(os.getenv("TRAIN_SEARCH_FOLDS", "3"))
+TRAIN_SEARCH_MAX_WORKERS = int(os.getenv("TRAIN_SEARCH_MAX_WORKERS", "0")) or None
+
+training_jobs = JobQueue(
+    swap_in_trained_model,
+    on_discard=discard_trained_model,
+    max_workers=int(os.getenv("TRAINING_MAX_WORKERS", "1")),
+    max_pending=int(os.getenv("TRAINING_MAX_PENDING", "4")),
+    # Shared so that a status poll answered by any server worker finds the job
+    store=JobStatusStore(os.getenv("TRAINING_JOBS_DIR", os.path.join(MODELS_DIR, 'jobs'))),
+)
+
+
+batcher = MicroBatcher(
+    predict_batch,
+    max_batch_size=int(os.getenv("PREDICT_BATCH_MAX_SIZE", "32")),
+    max_wait_ms=float(os.getenv("PREDICT_BATCH_MAX_WAIT_MS", "2")),
+)
+
+
+prediction_cache = PredictionCache(
+    max_entries=int(os.getenv("PREDICT_CACHE_MAX_ENTRIES", "10000")),
+    ttl_seconds=float(os.getenv("PREDICT_CACHE_TTL_SECONDS", "300")),
+    decimals=int(os.getenv("PREDICT_CACHE_DECIMALS", "4")),
+)
+
+
+chat_limiter = ConcurrencyLimiter(
+    max_concurrent=int(os.getenv("CHAT_MAX_CONCURRENCY", "16")),
+    max_queued=int(os.getenv("CHAT_MAX_QUEUED", "32")),
+    queue_timeout=float(os.getenv("CHAT_QUEUE_TIMEOUT_S", "30")),
+)
+
+
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "2000"))
+
+session_store = create_session_store(
+    os.getenv("CHAT_SESSION_STORE", "memory"),
+    path=os.getenv("CHAT_SESSION_DB", os.path.join(os.path.dirname(__file__), '..', 'data', 'chat_sessions.sqlite3')),
+    max_sessions=int(os.getenv("CHAT_SESSION_MAX_SESSIONS", "1000")),
+)
+
+chat_cache = SemanticCache(
+    threshold=float(os.getenv("CHAT_CACHE_THRESHOLD", "0.88")),
+    max_entries=int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "1000")),
+)
+
+
+# Metrics read at scrape time from counters the components already keep
+metrics.gauge(
+    "model_info", "Serving model (always 1)", ("model_version", "engine"),
+    callback=lambda: {(bundle.version, MODEL_ENGINE): 1} if bundle is not None else {},
+)
+metrics.histogram_view(
+    "prediction_batcher_batch_size", "Rows per /predict micro-batch", batcher.batch_sizes
+)
+metrics.histogram_view(
+    "prediction_batcher_queue_wait_seconds", "Time a /predict row waited for its micro-batch",
+    batcher.queue_wait_ms, scale=1e-3,
+)
+metrics.gauge(
+    "prediction_batcher_queued", "Rows waiting for a micro-batch", callback=lambda: batcher.stats()["queued"]
+)
+metrics.counter(
+    "prediction_cache_requests_total", "Prediction cache lookups", ("result",),
+    callback=lambda: {("hit",): prediction_cache.hits, ("miss",): prediction_cache.misses},
+)
+metrics.gauge(
+    "prediction_cache_entries", "Entries in the prediction cache", callback=lambda: prediction_cache.stats()["size"]
+)
+metrics.histogram_view(
+    "chat_queue_wait_seconds", "Time a chat request waited for a slot", chat_limiter.queue_wait_ms, scale=1e-3
+)
+metrics.histogram_view(
+    "chat_agent_run_seconds", "Duration of agent runs holding a chat slot", chat_limiter.duration_ms, scale=1e-3
+)
+metrics.gauge(
+    "chat_requests_in_flight", "Chat requests by limiter state", ("state",),
+    callback=lambda: {("running",): chat_limiter.active, ("queued",): chat_limiter.queued},
+)
+metrics.counter(
+    "chat_requests_rejected_total", "Chat requests rejected with 429", callback=lambda: chat_limiter.rejected
+)
+metrics.counter(
+    "chat_cache_requests_total", "Semantic chat cache lookups", ("result",),
+    callback=lambda: {("hit",): chat_cache.hits, ("miss",): chat_cache.misses},
+)
+metrics.gauge(
+    "training_jobs_pending", "Training jobs queued or running", callback=lambda: training_jobs.pending()
+)
+
+def load_startup_bundle():
+    """
+    Load the active version at startup.
+
+    A corrupt ``model.bundle`` must not keep the server from booting: the
+    version is served from its pickles instead, and if those fail too the
+    server starts without a model (as the CURRENT watcher does).
+    """
+    try:
+        return load_bundle(MODELS_DIR, engine=MODEL_ENGINE, verify=MODEL_VERIFY_CHECKSUM)
+    except ModelFileError as exc:
+        print(f"Warning: could not load the model bundle ({exc}); loading the pickled artifacts instead")
+    try:
+        return load_bundle(MODELS_DIR, engine="sklearn")
+    except Exception as exc:
+        print(f"Warning: could not load the model artifacts: {exc}")
+        return None
+
 
 @app.on_event("startup")
 async def startup_event():
-    """Load the model on startup."""
-    global model, scaler, feature_names, metadata, agent_executor
+    """Load the model on startup (the chat agent is created on first use)."""
+    global model_watcher
     load_dotenv()
+    batcher.start()
+    if SERVER_PROFILE == "full":
+        training_jobs.start()
+        if not os.getenv("OPENAI_API_KEY"):
+            print("Warning: OPENAI_API_KEY not set. Agent chat will be unavailable.")
 
-    api_key = os.getenv("OPENAI_API_KEY")
-    if api_key:
-        try:
-            agent_executor = create_agent(api_key)
-            print("LangChain agent initialized")
-        except Exception as agent_error:
-            agent_executor = None
-            print(f"Warning: Failed to initialize agent - {agent_error}")
-    else:
-        print("Warning: OPENAI_API_KEY not set. Agent chat will be unavailable.")
-
-    models_dir = os.path.join(os.path.dirname(__file__), '..', 'models')
-    model, scaler, feature_names, metadata = load_model_artifacts(models_dir)
-    if model is None:
+    set_bundle(load_startup_bundle())
+    if bundle is None:
         print("Warning: No trained model found. Please train a model first.")
     else:
-        print("Model loaded successfully")
+        print(f"Model loaded successfully (version {bundle.version})")
+    if MODEL_WATCH_INTERVAL_S > 0:
+        model_watcher = asyncio.create_task(watch_current_version())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the prediction batcher, the CURRENT watcher and training workers."""
+    if model_watcher is not None:
+        model_watcher.cancel()
+    await batcher.stop()
+    training_jobs.shutdown()
 
 
 class PredictionRequest(BaseModel):
     features: Dict[str, float]
 
 
+class PredictionInterval(BaseModel):
+    level: float
+    lower: float
+    upper: float
+
+
 class PredictionResponse(BaseModel):
     predicted_price: float
     features_used: Dict[str, float]
+    model_version: Optional[str] = None
+    # Spread of the per-tree predictions (None for models that do not average trees)
+    prediction_std: Optional[float] = None
+    prediction_interval: Optional[PredictionInterval] = None
+    quantiles: Optional[Dict[str, float]] = None
 
 
 class BulkPredictionRequest(BaseModel):
     data: List[Dict[str, float]]
 
 
-class TrainingResponse(BaseModel):
-    message: str
-    metrics: Dict[str, Any]
-    feature_names: List[str]
+class RollbackRequest(BaseModel):
+    version: Optional[str] = None
 
 
 class ChatMessage(BaseModel):
@@ -82,7 +423,11 @@ class ChatMessage(BaseModel):
 
 
 class ChatRequest(BaseModel):
-    messages: List[ChatMessage]
+    # Session mode: send only the new message (and the session_id from the previous reply)
+    message: Optional[str] = None
+    session_id: Optional[str] = None
+    # Legacy mode: the client resends the whole conversation
+    messages: Optional[List[ChatMessage]] = None
 
 
 class ToolOutput(BaseModel):
@@ -94,220 +439,628 @@ class ToolOutput(BaseModel):
 class ChatResponse(BaseModel):
     reply: str
     tool_outputs: Optional[List[ToolOutput]] = None
+    session_id: Optional[str] = None
+    cached: bool = False
 
 
 @app.get("/health")
 async def health():
     """Health check endpoint."""
+    active_bundle = bundle
     return {
         "status": "ok",
-        "model_loaded": model is not None,
-        "features": feature_names if feature_names else []
+        "model_loaded": active_bundle is not None,
+        "features": list(active_bundle.feature_names) if active_bundle else [],
+        "model_version": active_bundle.version if active_bundle else None
     }
 
 
-@app.post("/predict", response_model=PredictionResponse)
-async def predict(request: PredictionRequest):
-    """Predict housing price for given features."""
-    global model, scaler, feature_names
+async def predict_features(features, quantiles=PREDICT_QUANTILES):
+    """
+    Predict one feature dict through the result cache and micro-batcher.
     
-    if model is None or scaler is None:
-        raise HTTPException(status_code=503, detail="Model not loaded. Please train a model first.")
+    Shared by ``POST /predict`` and the in-process agent transport. Requests
+    for quantiles other than PREDICT_QUANTILES bypass the cache and batcher.
+    
+    Returns:
+        Dict with predicted_price, features_used, model_version and the
+        per-tree spread (prediction_std, prediction_interval, quantiles)
+    """
+    active_bundle = require_bundle()
     
     try:
-        df = pd.DataFrame([request.features])
-        
-        for feature in feature_names:
-            if feature not in df.columns:
-                df[feature] = 0.0
-        
-        df = df[feature_names]
-        
-        X_scaled, _, _ = preprocess_data(df, scaler=scaler, fit_scaler=False)
-        
-        prediction = model.predict(X_scaled)[0]
-        
-        return PredictionResponse(
-            predicted_price=float(prediction * 100000),
-            features_used=request.features
-        )
+        if quantiles == PREDICT_QUANTILES:
+            cache_key = None
+            prediction = None
+            if prediction_cache.enabled:
+                cache_key = prediction_cache.key_for(active_bundle, features)
+                prediction = prediction_cache.get(cache_key)
+            if prediction is None:
+                prediction = await batcher.submit(features, active_bundle)
+                if cache_key is not None:
+                    prediction_cache.put(cache_key, prediction)
+        else:
+            prediction = (await run_in_threadpool(predict_batch, active_bundle, [features], quantiles))[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+    
+    mean, std, values = prediction
+    return {
+        "predicted_price": float(mean * 100000),
+        "features_used": features,
+        "model_version": active_bundle.version,
+        **spread_fields(std, values, quantiles),
+    }
+
+
+@app.post("/predict", response_model=PredictionResponse)
+async def predict(
+    request: PredictionRequest,
+    http_request: Request,
+    quantiles: Optional[str] = Query(None, description="Comma-separated probabilities; empty for none"),
+):
+    """Predict housing price for given features."""
+    mark_handler_started(http_request, require_bundle())
+    response = PredictionResponse(**await predict_features(request.features, request_quantiles(quantiles)))
+    mark_handler_done(http_request)
+    return response
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text-format metrics (404 when METRICS_ENABLED=0)."""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(metrics.render(), media_type=metrics.content_type)
+
+
+@app.get("/predict/batching/stats")
+async def batching_stats():
+    """Batch-size and queue-wait distributions of the /predict micro-batcher."""
+    return batcher.stats()
+
+
+@app.get("/predict/cache/stats")
+async def cache_stats():
+    """Hit, miss, eviction and invalidation counters of the /predict result cache."""
+    return prediction_cache.stats()
 
 
 @app.post("/predict/bulk")
-async def predict_bulk(request: BulkPredictionRequest):
-    """Predict housing prices for multiple inputs."""
-    global model, scaler, feature_names
-    
-    if model is None or scaler is None:
-        raise HTTPException(status_code=503, detail="Model not loaded. Please train a model first.")
+async def predict_bulk(
+    request: BulkPredictionRequest,
+    http_request: Request,
+    quantiles: Optional[str] = Query(None, description="Comma-separated probabilities; empty for none"),
+):
+    """Predict housing prices for multiple inputs (spread fields hold one list entry per input)."""
+    active_bundle = require_bundle()
+    mark_handler_started(http_request, active_bundle)
+    quantiles = request_quantiles(quantiles)
     
     try:
-        df = pd.DataFrame(request.data)
-        
-        for feature in feature_names:
-            if feature not in df.columns:
-                df[feature] = 0.0
-        
-        df = df[feature_names]
-        
-        X_scaled, _, _ = preprocess_data(df, scaler=scaler, fit_scaler=False)
-        
-        predictions = model.predict(X_scaled)
+        result = await run_in_threadpool(predict_rows, active_bundle, request.data, quantiles)
         
-        return {
-            "predictions": [float(p * 100000) for p in predictions],
-            "count": len(predictions)
+        response = {
+            "predictions": (result["mean"] * 100000).tolist(),
+            "count": len(result["mean"]),
+            "model_version": active_bundle.version,
+            **spread_fields(result["std"], result["quantiles"], quantiles),
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Bulk prediction error: {str(e)}")
+    mark_handler_done(http_request)
+    return response
 
 
-@app.post("/train", response_model=TrainingResponse)
-async def train_new_model():
-    """Train a new model using the California housing dataset."""
-    global model, scaler, feature_names, metadata
+@app.post("/predict/stream")
+async def predict_stream(
+    request: Request,
+    output_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    chunk_size: int = Query(1000, ge=1, le=100000),
+):
+    """
+    Stream predictions for a CSV or NDJSON body (raw or multipart upload).
     
+    Rows are parsed and predicted ``chunk_size`` at a time and written back as
+    they are ready, so memory stays bounded regardless of input size; a
+    multipart upload is parsed as it arrives rather than spooled first. Rows
+    that fail to parse are reported one by one in the output. A line longer
+    than ``STREAM_MAX_LINE_BYTES`` ends the stream (413 if it is in the first
+    chunk). The whole stream is served by the model version active when it
+    started.
+    """
+    active_bundle = require_bundle()
+    
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        try:
+            upload = await open_multipart_file(content_type, request.stream())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid multipart body: {e}")
+        if upload is None:
+            raise HTTPException(status_code=400, detail="Multipart request must include a 'file' field")
+        filename, upload_type, byte_chunks = upload
+        input_format = detect_input_format(upload_type, filename)
+    else:
+        input_format = detect_input_format(content_type)
+        byte_chunks = request.stream()
+    
+    records = iter_record_chunks(iter_lines(byte_chunks, STREAM_MAX_LINE_BYTES), input_format, chunk_size,
+                                 STREAM_MAX_LINE_BYTES)
+    # Parse the first chunk before the response starts, so a bad body still gets an error status
     try:
-        data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'california_housing.csv')
-        
-        if not os.path.exists(data_path):
-            raise HTTPException(status_code=404, detail="California housing dataset not found. Please run the notebook first.")
-        
-        df = pd.read_csv(data_path)
-        
-        new_model, new_scaler, metrics, new_feature_names = train_model(df)
-        
-        models_dir = os.path.join(os.path.dirname(__file__), '..', 'models')
-        new_metadata = {
-            'model_type': 'RandomForestRegressor',
-            'features': new_feature_names,
-            'metrics': metrics,
-            'training_samples': metrics['training_samples']
+        first = await records.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except LineTooLong as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Could not read request body: {e}")
+    
+    async def predict_chunk(rows, errors):
+        predictions = []
+        if rows:
+            features = [record for _, record in rows]
+            predictions = (await run_in_threadpool(predict_rows, active_bundle, features))["mean"] * 100000
+        return format_predictions([row for row, _ in rows], predictions, output_format, errors)
+    
+    async def body():
+        yield format_header(output_format)
+        if first is None:
+            return
+        try:
+            yield await predict_chunk(*first)
+            async for rows, errors in records:
+                yield await predict_chunk(rows, errors)
+        except Exception as exc:
+            yield format_error(f"Stream prediction error: {exc}", output_format)
+    
+    return RequestStreamingResponse(body(), media_type=STREAM_FORMATS[output_format])
+
+
+def submit_training_job(kind, *args, fn=run_training_job, serial_key=None):
+    """Queue a training (or compression) job, mapping a full queue to 429."""
+    try:
+        job = training_jobs.submit(kind, fn, kind, *args, serial_key=serial_key)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=f"Training queue is full: {e}")
+    return JSONResponse(status_code=202, content=job.to_dict())
+
+
+@training_routes.post("/train", status_code=202)
+async def train_new_model(
+    model_type: Literal["random_forest", "linear", "search"] = Query("random_forest"),
+    latency_budget_ms: Optional[float] = Query(None, gt=0),
+):
+    """
+    Queue training of a new model on the California housing dataset.
+    
+    ``model_type=search`` cross-validates several model families in parallel
+    and keeps the most accurate one whose p99 single-row latency fits
+    ``latency_budget_ms`` (default ``TRAIN_SEARCH_LATENCY_BUDGET_MS``).
+    """
+    if not os.path.exists(BASE_DATA_PATH):
+        raise HTTPException(status_code=404, detail="California housing dataset not found. Please run the notebook first.")
+    
+    search_options = None
+    if model_type == "search":
+        search_options = {
+            "latency_budget_ms": latency_budget_ms or TRAIN_SEARCH_LATENCY_BUDGET_MS,
+            "folds": TRAIN_SEARCH_FOLDS,
+            "max_workers": TRAIN_SEARCH_MAX_WORKERS,
+            "engine": MODEL_ENGINE,
         }
-        save_model_artifacts(new_model, new_scaler, new_feature_names, new_metadata, models_dir)
-        
-        model = new_model
-        scaler = new_scaler
-        feature_names = new_feature_names
-        metadata = new_metadata
-        
-        return TrainingResponse(
-            message="Model trained successfully",
-            metrics=metrics,
-            feature_names=new_feature_names
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Training error: {str(e)}")
+    return submit_training_job("train", MODELS_DIR, BASE_DATA_PATH, None, None, "full", model_type, search_options)
 
 
-@app.post("/retrain", response_model=TrainingResponse)
-async def retrain_model(file: UploadFile = File(...)):
-    """Retrain model with user-uploaded CSV data combined with California dataset."""
-    global model, scaler, feature_names, metadata
+@training_routes.post("/retrain", status_code=202)
+async def retrain_model(
+    file: UploadFile = File(...),
+    mode: Literal["auto", "full", "incremental"] = Query("auto"),
+):
+    """
+    Queue retraining with user-uploaded CSV data combined with California dataset.
     
+    ``mode=auto`` adds trees for the new rows to the current forest unless the
+    refit policy in ``ml.model_trainer.choose_retrain_mode`` asks for a full fit.
+    Retrains that may add trees run one at a time, so each one warm-starts
+    from the version the previous one published.
+    """
     try:
         contents = await file.read()
         
-        uploads_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'uploads')
-        os.makedirs(uploads_dir, exist_ok=True)
+        os.makedirs(UPLOADS_DIR, exist_ok=True)
         
-        upload_path = os.path.join(uploads_dir, file.filename)
+        filename = os.path.basename(file.filename)
+        upload_path = os.path.join(UPLOADS_DIR, filename)
         with open(upload_path, 'wb') as f:
             f.write(contents)
         
-        user_df = pd.read_csv(upload_path)
-        
-        if 'target' not in user_df.columns:
-            raise HTTPException(status_code=400, detail="CSV must contain 'target' column")
-        
-        base_data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'california_housing.csv')
-        new_model, new_scaler, metrics, new_feature_names = retrain_with_user_data(user_df, base_data_path)
-        
-        models_dir = os.path.join(os.path.dirname(__file__), '..', 'models')
-        new_metadata = {
-            'model_type': 'RandomForestRegressor',
-            'features': new_feature_names,
-            'metrics': metrics,
-            'training_samples': metrics['training_samples'],
-            'user_data_file': file.filename
-        }
-        save_model_artifacts(new_model, new_scaler, new_feature_names, new_metadata, models_dir)
-        
-        model = new_model
-        scaler = new_scaler
-        feature_names = new_feature_names
-        metadata = new_metadata
-        
-        return TrainingResponse(
-            message=f"Model retrained successfully with {file.filename}",
-            metrics=metrics,
-            feature_names=new_feature_names
-        )
+        import pandas as pd
+        columns = pd.read_csv(upload_path, nrows=0).columns
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Retraining error: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Could not read uploaded CSV: {str(e)}")
+    
+    if 'target' not in columns:
+        raise HTTPException(status_code=400, detail="CSV must contain 'target' column")
+    
+    # Retraining appends the upload to the base dataset, which rejects columns it does not have
+    if os.path.exists(BASE_DATA_PATH):
+        known = set(pd.read_csv(BASE_DATA_PATH, nrows=0).columns)
+        unknown = [str(name) for name in columns if name not in known]
+        if unknown:
+            raise HTTPException(status_code=400,
+                                detail=f"Uploaded columns not in the base dataset: {', '.join(unknown)}")
+    
+    return submit_training_job("retrain", MODELS_DIR, BASE_DATA_PATH, upload_path, filename, mode,
+                               serial_key=None if mode == "full" else "incremental")
 
 
-@app.get("/model/info")
-async def get_model_info():
-    """Get information about the current model."""
-    if model is None:
+@training_routes.get("/jobs")
+async def list_jobs():
+    """List recent training jobs, newest first."""
+    return {"jobs": training_jobs.statuses()}
+
+
+@training_routes.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get status and progress of a training job."""
+    job = training_jobs.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@training_routes.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Cancel a job; a running one stops at its next training stage."""
+    job = training_jobs.request_cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+async def model_info():
+    """Payload of ``GET /model/info`` (also used by the in-process agent transport)."""
+    active_bundle = bundle
+    if active_bundle is None:
         raise HTTPException(status_code=503, detail="No model loaded")
     
     return {
         "model_loaded": True,
-        "feature_names": feature_names,
-        "metadata": metadata
+        "model_version": active_bundle.version,
+        "feature_names": list(active_bundle.feature_names),
+        "metadata": active_bundle.metadata
     }
 
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
-    """Chat endpoint that routes messages through the LangChain agent."""
-    global agent_executor
+@app.get("/model/info")
+async def get_model_info():
+    """Get information about the current model."""
+    return await model_info()
+
+
+@app.get("/model/versions")
+async def get_model_versions():
+    """List published model versions and the active one."""
+    return {
+        "current": current_version(MODELS_DIR),
+        "serving": bundle.version if bundle else None,
+        "versions": list_versions(MODELS_DIR)
+    }
+
+
+@app.post("/model/rollback")
+async def rollback_model(request: RollbackRequest):
+    """Re-activate an earlier model version (default: the previous one) without retraining."""
+    async with model_swap_lock:
+        try:
+            new_bundle = await run_in_threadpool(
+                rollback, MODELS_DIR, request.version, MODEL_ENGINE, MODEL_VERIFY_CHECKSUM
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        set_bundle(new_bundle)
+    return {
+        "message": f"Rolled back to model version {new_bundle.version}",
+        "model_version": new_bundle.version
+    }
+
+
+@training_routes.post("/model/compress", status_code=202)
+async def compress_model(
+    version: Optional[str] = Query(None),
+    variant: Optional[str] = Query(None),
+):
+    """
+    Queue a compression report for a model version (default: the active one).
+    
+    The job result lists every variant in ``ml.compression.DEFAULT_CANDIDATES``
+    (pruned forests, distilled students) with holdout RMSE/R2, artifact size
+    and single-row latency, Pareto-optimal ones marked. With ``variant`` the
+    chosen variant is published as a new version and hot-swapped in like a
+    trained model.
+    """
+    if not os.path.exists(BASE_DATA_PATH):
+        raise HTTPException(status_code=404, detail="California housing dataset not found. Please run the notebook first.")
+    if version is not None and version not in list_versions(MODELS_DIR):
+        raise HTTPException(status_code=404, detail=f"Unknown model version: {version}")
+    from ml.compression import DEFAULT_CANDIDATES
+    variants = [spec["name"] for spec in DEFAULT_CANDIDATES]
+    if variant is not None and variant not in variants:
+        raise HTTPException(status_code=400, detail=f"Unknown variant {variant}; choose one of {', '.join(variants)}")
+    return submit_training_job("compress", MODELS_DIR, BASE_DATA_PATH, version, variant, MODEL_ENGINE,
+                               fn=run_compression_job)
+
 
+@chat_routes.get("/chat/concurrency/stats")
+async def chat_concurrency_stats():
+    """Active, queued and rejected counts of the /chat concurrency limiter."""
+    return chat_limiter.stats()
+
+
+@chat_routes.get("/chat/router/stats")
+async def chat_router_stats():
+    """Hit rate of the intent router and the LLM latency it saved."""
+    router_stats = getattr(agent_executor, "router_stats", None)
+    if router_stats is None:
+        return {"enabled": False}
+    return {"enabled": True, **router_stats.stats()}
+
+
+@chat_routes.get("/chat/cache/stats")
+async def chat_cache_stats():
+    """Hit, miss and eviction counters of the semantic chat response cache."""
+    return chat_cache.stats()
+
+
+@chat_routes.get("/chat/sessions/stats")
+async def chat_session_stats():
+    """Size and eviction counters of the conversation session store."""
+    return session_store.stats()
+
+
+@chat_routes.get("/chat/sessions/{session_id}")
+async def get_chat_session(session_id: str):
+    """Return the stored messages of a conversation session."""
+    messages = session_store.get(session_id)
+    if messages is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"session_id": session_id, "messages": messages}
+
+
+@chat_routes.delete("/chat/sessions/{session_id}")
+async def delete_chat_session(session_id: str):
+    """Forget a conversation session."""
+    if not session_store.delete(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"session_id": session_id, "deleted": True}
+
+
+def build_agent(loop):
+    """Create the LangChain agent on the in-process transport; None without OPENAI_API_KEY."""
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return None
+    from agent.agent import create_agent, InProcessTransport
+    return create_agent(
+        api_key,
+        transport=InProcessTransport(predict_features, model_info, loop=loop),
+        route=os.getenv("CHAT_INTENT_ROUTER", "1") != "0"
+    )
+
+
+async def get_agent():
+    """
+    Return the chat agent, creating it on the first chat request.
+    
+    Importing LangChain and building the agent take a few seconds, so servers
+    that never chat (and the predict profile) never pay for it. The import
+    runs in a worker thread so predictions keep being served meanwhile.
+    """
+    global agent_executor
+    if agent_executor is None:
+        async with agent_lock:
+            if agent_executor is None:
+                try:
+                    agent_executor = await run_in_threadpool(build_agent, asyncio.get_running_loop())
+                    if agent_executor is not None:
+                        print("LangChain agent initialized")
+                except Exception as agent_error:
+                    print(f"Warning: Failed to initialize agent - {agent_error}")
     if agent_executor is None:
         raise HTTPException(status_code=503, detail="Agent not initialized. Set OPENAI_API_KEY and restart the server.")
+    return agent_executor
+
+
+def build_agent_inputs(request: ChatRequest):
+    """
+    Validate a chat request and convert it into agent inputs.
+    
+    With ``message`` the history comes from the session store (a new session
+    is started when ``session_id`` is missing or unknown); with ``messages``
+    the client-sent history is used as before. Either way the history is
+    trimmed to ``CHAT_HISTORY_TOKEN_BUDGET``.
+    
+    Returns:
+        ``(inputs, session_id)``; session_id is None in legacy mode
+    """
+    from langchain_core.messages import HumanMessage, AIMessage
+
+    if request.message is not None:
+        if not request.message.strip():
+            raise HTTPException(status_code=400, detail="Message is empty")
+        session_id = request.session_id or new_session_id()
+        history = session_store.get(session_id) or []
+        user_input = request.message
+    else:
+        if not request.messages:
+            raise HTTPException(status_code=400, detail="No messages provided")
 
-    if not request.messages:
-        raise HTTPException(status_code=400, detail="No messages provided")
+        if request.messages[-1].role != "user":
+            raise HTTPException(status_code=400, detail="Last message must come from the user")
 
-    if request.messages[-1].role != "user":
-        raise HTTPException(status_code=400, detail="Last message must come from the user")
+        session_id = None
+        history = [{"role": m.role, "content": m.content} for m in request.messages[:-1]]
+        user_input = request.messages[-1].content
 
     chat_history = []
-    for message in request.messages[:-1]:
-        if message.role == "user":
-            chat_history.append(HumanMessage(content=message.content))
+    for message in trim_history(history, CHAT_HISTORY_TOKEN_BUDGET):
+        if message["role"] == "user":
+            chat_history.append(HumanMessage(content=message["content"]))
         else:
-            chat_history.append(AIMessage(content=message.content))
+            chat_history.append(AIMessage(content=message["content"]))
+
+    return {"input": user_input, "chat_history": chat_history}, session_id
+
+
+def serving_version():
+    active_bundle = bundle
+    return active_bundle.version if active_bundle is not None else None
+
+
+def lookup_cached_reply(inputs):
+    """
+    Return a cached {"reply", "tool_outputs"} for a paraphrase of this question.
+    
+    Only first turns are cached: with history, the same words can mean
+    something else.
+    """
+    if inputs["chat_history"]:
+        return None
+    hit = chat_cache.lookup(inputs["input"], serving_version())
+    return hit[0] if hit is not None else None
+
 
-    user_input = request.messages[-1].content
+def remember_reply(inputs, model_version, reply, tool_outputs):
+    """Cache a first-turn reply under the model version it was computed with."""
+    if not inputs["chat_history"]:
+        chat_cache.add(inputs["input"], {"reply": reply, "tool_outputs": tool_outputs}, model_version)
 
+
+def record_turn(session_id, user_input, reply):
+    """Append a finished exchange to its session (no-op in legacy mode)."""
+    if session_id is not None:
+        session_store.append(session_id, [
+            {"role": "user", "content": user_input},
+            {"role": "assistant", "content": reply},
+        ])
+
+
+async def acquire_chat_slot():
+    """Wait for a chat slot, mapping a full queue to 429 with a Retry-After hint."""
     try:
-        result = await run_in_threadpool(
-            agent_executor.invoke,
-            {"input": user_input, "chat_history": chat_history}
+        return await chat_limiter.acquire()
+    except ConcurrencyLimitExceeded as e:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Too many concurrent chats: {e}",
+            headers={"Retry-After": str(e.retry_after)}
         )
-        reply = result.get("output", "I'm not sure how to respond to that.")
 
-        tool_outputs = []
-        for step in result.get("intermediate_steps", []):
-            if not step or len(step) != 2:
-                continue
-            action, observation = step
-            tool_outputs.append(
-                ToolOutput(
-                    tool=getattr(action, "tool", "unknown"),
-                    tool_input=getattr(action, "tool_input", None),
-                    output=str(observation)
-                )
-            )
 
-        return ChatResponse(reply=reply, tool_outputs=tool_outputs or None)
+def agent_callbacks():
+    """Callback handlers added to every agent run (LLM and tool timings when metrics are on)."""
+    from backend.chat_stream import AgentTimingHandler
+    return [AgentTimingHandler(chat_stage_seconds)] if METRICS_ENABLED else []
+
+
+@chat_routes.post("/chat", response_model=ChatResponse)
+async def chat(request: ChatRequest):
+    """
+    Chat endpoint that routes messages through the LangChain agent.
+    
+    The agent runs on the event loop via ``ainvoke`` (no threadpool worker is
+    held during the LLM round trip), limited to ``CHAT_MAX_CONCURRENCY`` runs.
+    """
+    from backend.chat_stream import collect_tool_outputs
+    agent = await get_agent()
+    inputs, session_id = build_agent_inputs(request)
+    cached = lookup_cached_reply(inputs)
+    if cached is not None:
+        record_turn(session_id, inputs["input"], cached["reply"])
+        return ChatResponse(**cached, session_id=session_id, cached=True)
+
+    model_version = serving_version()
+    started = await acquire_chat_slot()
+
+    try:
+        result = await agent.ainvoke(inputs, config={"callbacks": agent_callbacks()})
+        reply = result.get("output", "I'm not sure how to respond to that.")
+        tool_outputs = collect_tool_outputs(result) or None
+        record_turn(session_id, inputs["input"], reply)
+        remember_reply(inputs, model_version, reply, tool_outputs)
+
+        return ChatResponse(reply=reply, tool_outputs=tool_outputs, session_id=session_id)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Agent error: {exc}")
+    finally:
+        chat_limiter.release(started)
+
+
+@chat_routes.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Stream an agent run as Server-Sent Events.
+    
+    Emits ``tool_start``, ``tool_output`` and ``token`` events as they
+    happen, then a ``done`` event carrying the same reply, tool outputs and
+    session_id as ``/chat`` (or an ``error`` event).
+    """
+    from backend.chat_stream import stream_agent_events, replay_events, collect_tool_outputs
+    agent = await get_agent()
+    inputs, session_id = build_agent_inputs(request)
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    cached = lookup_cached_reply(inputs)
+    if cached is not None:
+        record_turn(session_id, inputs["input"], cached["reply"])
+        return StreamingResponse(
+            replay_events(cached, {"session_id": session_id, "cached": True}),
+            media_type="text/event-stream",
+            headers=headers
+        )
+
+    model_version = serving_version()
+    started = await acquire_chat_slot()
+    released = False
+
+    def release_slot():
+        nonlocal released
+        if not released:
+            released = True
+            chat_limiter.release(started)
+
+    def on_result(result):
+        reply = result.get("output", "I'm not sure how to respond to that.")
+        record_turn(session_id, inputs["input"], reply)
+        remember_reply(inputs, model_version, reply, collect_tool_outputs(result) or None)
+
+    async def body():
+        try:
+            events = stream_agent_events(
+                agent,
+                inputs,
+                on_result=on_result,
+                extra={"session_id": session_id, "cached": False},
+                callbacks=agent_callbacks()
+            )
+            async for event in events:
+                yield event
+        finally:
+            release_slot()
+
+    # The background task frees the slot if the body never starts iterating
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers=headers,
+        background=BackgroundTask(release_slot)
+    )
+
+
+if SERVER_PROFILE == "full":
+    app.include_router(training_routes)
+    app.include_router(chat_routes)
 
 
 if __name__ == "__main__":
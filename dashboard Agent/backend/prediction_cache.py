@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of single-row predictions with a time-to-live.
+
+    Keys are built from the feature vector after the serving preprocessor has
+    filled in missing values, rounded to ``decimals`` places, plus the model
+    version. Requests that spell the same input differently (omitted features
+    vs. explicit defaults, float noise) therefore share an entry, and entries
+    from an old model version can never be returned for a new one.
+
+    Args:
+        max_entries: Maximum number of cached predictions (0 disables caching)
+        ttl_seconds: Lifetime of an entry in seconds (0 or less: no expiry)
+        decimals: Number of decimal places features are rounded to
+    """
+
+    def __init__(self, max_entries=10000, ttl_seconds=300.0, decimals=4):
+        self.max_entries = max(0, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self.decimals = int(decimals)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def key_for(self, active_bundle, features):
+        """Return the cache key for one feature dict under ``active_bundle``."""
+        values = active_bundle.preprocessor.fill(features)[0]
+        return (active_bundle.version, tuple(np.round(values, self.decimals).tolist()))
+
+    def get(self, key):
+        """Return the cached prediction for ``key``, or None on a miss."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store a prediction, evicting the least recently used entries if full."""
+        if not self.enabled:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds > 0 else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (called when a different model version goes live)."""
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "decimals": self.decimals,
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
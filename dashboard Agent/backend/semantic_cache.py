@@ -0,0 +1,206 @@
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+
+WORD_PATTERN = re.compile(r"[a-z]+|\d+(?:\.\d+)?")
+NUMBER_PATTERN = re.compile(r"-?\d+(?:\.\d+)?")
+STOP_WORDS = frozenset(
+    "a an the is are was be of for to in on at with and or what whats s how much does do "
+    "me my i you your can could would will please tell give show about it its this that".split()
+)
+
+
+class HashingEmbedder:
+    """
+    Deterministic, dependency-free text embedder.
+
+    Words (minus stop words), word bigrams and character trigrams are hashed
+    with CRC32 into a fixed number of signed buckets and the result is
+    L2-normalized, so paraphrases that share vocabulary land close together
+    in cosine space. No model download and identical output on every run.
+
+    Args:
+        dim: Embedding size
+    """
+
+    def __init__(self, dim=512):
+        self.dim = int(dim)
+
+    def _features(self, text):
+        words = [w for w in WORD_PATTERN.findall(text.lower().replace("'", "")) if w not in STOP_WORDS]
+        for word in words:
+            yield word, 1.0
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                yield padded[i:i + 3], 0.3
+        for first, second in zip(words, words[1:]):
+            yield f"{first} {second}", 0.4
+
+    def embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self._features(text):
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % self.dim] += weight if (h >> 31) & 1 else -weight
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+
+class LSHIndex:
+    """
+    Approximate nearest-neighbour index for unit vectors (cosine similarity).
+
+    Random-hyperplane LSH: each of ``n_tables`` tables hashes a vector to the
+    sign pattern of ``n_planes`` projections. A query gathers the ids sharing
+    a bucket in any table and ranks only those candidates exactly.
+
+    Args:
+        dim: Vector size
+        n_planes: Hyperplanes (bits) per table
+        n_tables: Number of hash tables
+        seed: Seed for the hyperplanes
+    """
+
+    def __init__(self, dim, n_planes=6, n_tables=8, seed=0):
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((n_tables, n_planes, dim)).astype(np.float32)
+        self.powers = 1 << np.arange(n_planes)
+        self.tables = [dict() for _ in range(n_tables)]
+        self.vectors = {}
+
+    def _keys(self, vector):
+        bits = (self.planes @ vector) > 0
+        return (bits * self.powers).sum(axis=1).tolist()
+
+    def add(self, item_id, vector):
+        self.vectors[item_id] = vector
+        for table, key in zip(self.tables, self._keys(vector)):
+            table.setdefault(key, set()).add(item_id)
+
+    def remove(self, item_id):
+        vector = self.vectors.pop(item_id, None)
+        if vector is None:
+            return
+        for table, key in zip(self.tables, self._keys(vector)):
+            bucket = table.get(key)
+            if bucket is not None:
+                bucket.discard(item_id)
+                if not bucket:
+                    del table[key]
+
+    def query(self, vector, k=5):
+        """Return up to ``k`` (item_id, cosine similarity) pairs, best first."""
+        candidates = set()
+        for table, key in zip(self.tables, self._keys(vector)):
+            candidates.update(table.get(key, ()))
+        scored = sorted(
+            ((item_id, float(self.vectors[item_id] @ vector)) for item_id in candidates),
+            key=lambda pair: pair[1], reverse=True,
+        )
+        return scored[:k]
+
+    def clear(self):
+        for table in self.tables:
+            table.clear()
+        self.vectors.clear()
+
+    def __len__(self):
+        return len(self.vectors)
+
+
+class SemanticCache:
+    """
+    Cache of agent replies looked up by question similarity.
+
+    A question hits when an entry for the same model version has cosine
+    similarity of at least ``threshold`` and mentions exactly the same
+    numbers (so "MedInc 5" never returns the answer for "MedInc 8").
+    The oldest entries are evicted beyond ``max_entries``.
+
+    Args:
+        embedder: Object with ``embed(text) -> unit vector`` (default HashingEmbedder)
+        threshold: Minimum cosine similarity for a hit
+        max_entries: Maximum cached replies (0 disables the cache)
+    """
+
+    def __init__(self, embedder=None, threshold=0.88, max_entries=1000):
+        self.embedder = embedder or HashingEmbedder()
+        self.threshold = float(threshold)
+        self.max_entries = max(0, int(max_entries))
+        self.index = LSHIndex(self.embedder.dim)
+        self._entries = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def lookup(self, question, model_version):
+        """
+        Return ``(payload, similarity)`` for a cached paraphrase of ``question``
+        under ``model_version``, or None.
+        """
+        if not self.enabled:
+            return None
+        vector = self.embedder.embed(question)
+        numbers = tuple(NUMBER_PATTERN.findall(question))
+        with self._lock:
+            for item_id, similarity in self.index.query(vector):
+                if similarity < self.threshold:
+                    break
+                entry = self._entries[item_id]
+                if entry["model_version"] == model_version and entry["numbers"] == numbers:
+                    self.hits += 1
+                    return entry["payload"], similarity
+            self.misses += 1
+            return None
+
+    def add(self, question, payload, model_version):
+        """Cache ``payload`` (e.g. reply and tool outputs) for ``question``."""
+        if not self.enabled:
+            return
+        vector = self.embedder.embed(question)
+        with self._lock:
+            item_id = self._next_id
+            self._next_id += 1
+            self._entries[item_id] = {
+                "question": question,
+                "numbers": tuple(NUMBER_PATTERN.findall(question)),
+                "model_version": model_version,
+                "payload": payload,
+            }
+            self.index.add(item_id, vector)
+            while len(self._entries) > self.max_entries:
+                old_id, _ = self._entries.popitem(last=False)
+                self.index.remove(old_id)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (called when a different model version goes live)."""
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self.index.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "threshold": self.threshold,
+                "max_entries": self.max_entries,
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
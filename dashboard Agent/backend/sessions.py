@@ -0,0 +1,185 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def new_session_id():
+    return uuid.uuid4().hex
+
+
+def estimate_tokens(message):
+    """Rough token count of a {"role", "content"} message (about 4 characters per token)."""
+    return MESSAGE_OVERHEAD_TOKENS + len(message["content"]) // CHARS_PER_TOKEN
+
+
+def trim_history(messages, max_tokens):
+    """
+    Keep the most recent messages that fit in ``max_tokens``.
+
+    Messages are dropped oldest first; the kept history always starts with a
+    user message so the model never sees an orphaned assistant reply.
+
+    Args:
+        messages: List of {"role", "content"} dicts, oldest first
+        max_tokens: Token budget (None or <= 0 keeps everything)
+
+    Returns:
+        The trimmed list
+    """
+    if not max_tokens or max_tokens <= 0:
+        return list(messages)
+
+    kept = []
+    total = 0
+    for message in reversed(messages):
+        total += estimate_tokens(message)
+        if total > max_tokens:
+            break
+        kept.append(message)
+    kept.reverse()
+
+    while kept and kept[0]["role"] != "user":
+        kept.pop(0)
+    return kept
+
+
+class InMemorySessionStore:
+    """
+    Conversation histories kept in process memory, evicting the least
+    recently used session beyond ``max_sessions``.
+
+    Args:
+        max_sessions: Maximum number of sessions kept
+        max_messages: Maximum messages kept per session (oldest dropped first)
+    """
+
+    def __init__(self, max_sessions=1000, max_messages=200):
+        self.max_sessions = max(1, int(max_sessions))
+        self.max_messages = max(2, int(max_messages))
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, session_id):
+        """Return the session's messages (oldest first), or None if unknown."""
+        with self._lock:
+            messages = self._sessions.get(session_id)
+            if messages is None:
+                return None
+            self._sessions.move_to_end(session_id)
+            return list(messages)
+
+    def append(self, session_id, messages):
+        """Append messages to a session, creating it if needed."""
+        with self._lock:
+            history = self._sessions.get(session_id, []) + list(messages)
+            self._sessions[session_id] = history[-self.max_messages:]
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, session_id):
+        """Forget a session; returns whether it existed."""
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "evictions": self.evictions,
+            }
+
+
+class SQLiteSessionStore:
+    """
+    Conversation histories persisted in a SQLite file, so sessions survive
+    restarts and can be shared by workers on one host. The least recently
+    updated sessions beyond ``max_sessions`` are deleted.
+
+    Args:
+        path: Database file
+        max_sessions: Maximum number of sessions kept
+        max_messages: Maximum messages kept per session (oldest dropped first)
+    """
+
+    def __init__(self, path, max_sessions=1000, max_messages=200):
+        self.path = path
+        self.max_sessions = max(1, int(max_sessions))
+        self.max_messages = max(2, int(max_messages))
+        self.evictions = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS chat_sessions ("
+                "id TEXT PRIMARY KEY, messages TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS chat_sessions_updated_at ON chat_sessions (updated_at)"
+            )
+
+    def get(self, session_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT messages FROM chat_sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def append(self, session_id, messages):
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT messages FROM chat_sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            history = (json.loads(row[0]) if row else []) + list(messages)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chat_sessions (id, messages, updated_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(history[-self.max_messages:]), time.time())
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM chat_sessions").fetchone()[0]
+            if count > self.max_sessions:
+                self._conn.execute(
+                    "DELETE FROM chat_sessions WHERE id IN ("
+                    "SELECT id FROM chat_sessions ORDER BY updated_at LIMIT ?)",
+                    (count - self.max_sessions,)
+                )
+                self.evictions += count - self.max_sessions
+
+    def delete(self, session_id):
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM chat_sessions WHERE id = ?", (session_id,))
+        return cursor.rowcount > 0
+
+    def stats(self):
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM chat_sessions").fetchone()[0]
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "sessions": count,
+            "max_sessions": self.max_sessions,
+            "evictions": self.evictions,
+        }
+
+
+def create_session_store(kind="memory", path=None, max_sessions=1000, max_messages=200):
+    """Build the session store named by ``kind`` ('memory' or 'sqlite')."""
+    if kind == "sqlite":
+        return SQLiteSessionStore(path, max_sessions=max_sessions, max_messages=max_messages)
+    if kind == "memory":
+        return InMemorySessionStore(max_sessions=max_sessions, max_messages=max_messages)
+    raise ValueError(f"Unknown session store: {kind}")
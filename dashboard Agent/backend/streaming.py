@@ -0,0 +1,341 @@
+import collections
+import csv
+import json
+from fastapi.responses import StreamingResponse
+
+
+STREAM_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+class RequestStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body generator reads the request body itself.
+
+    Starlette's StreamingResponse listens for client disconnects by calling
+    ``receive()`` concurrently with the body, which would steal request body
+    messages from ``request.stream()``. Here the body iterator is the only
+    reader; a disconnect surfaces from ``request.stream()`` instead.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+def detect_input_format(content_type, filename=None):
+    """Pick 'csv' or 'ndjson' from a content type or file name."""
+    content_type = (content_type or "").lower()
+    filename = (filename or "").lower()
+    if "ndjson" in content_type or "jsonl" in content_type or "json" in content_type:
+        return "ndjson"
+    if filename.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "csv"
+
+
+# Longest line (or quoted multi-line CSV record) buffered while streaming
+DEFAULT_MAX_LINE_BYTES = 1 << 20
+
+
+class LineTooLong(ValueError):
+    """Raised when a line of a streamed body is longer than the configured limit."""
+
+
+def _extend_line(pending, data, max_line_bytes):
+    if len(pending) + len(data) > max_line_bytes:
+        raise LineTooLong(f"line longer than {max_line_bytes} bytes")
+    pending += data
+
+
+async def iter_lines(byte_chunks, max_line_bytes=DEFAULT_MAX_LINE_BYTES):
+    """
+    Split an async stream of byte chunks into decoded text lines.
+
+    Every chunk is scanned once, so the cost is linear in the body size, and
+    at most ``max_line_bytes`` of an unfinished line are buffered.
+
+    Raises:
+        LineTooLong: If a line is longer than ``max_line_bytes``
+    """
+    pending = bytearray()
+    async for chunk in byte_chunks:
+        view = memoryview(chunk)
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                break
+            _extend_line(pending, view[start:end], max_line_bytes)
+            yield pending.rstrip(b"\r").decode("utf-8", errors="replace")
+            pending.clear()
+            start = end + 1
+        _extend_line(pending, view[start:], max_line_bytes)
+    if pending:
+        yield pending.rstrip(b"\r").decode("utf-8", errors="replace")
+
+
+async def open_multipart_file(content_type, byte_chunks, field_name="file"):
+    """
+    Find the ``field_name`` file part of a multipart/form-data body without buffering it.
+
+    Unlike ``request.form()``, nothing is spooled: the body is parsed as it
+    arrives and the file's bytes are handed on chunk by chunk. Other fields
+    are skipped.
+
+    Returns:
+        (filename, content_type, data_chunks) for the part, where
+        ``data_chunks`` is an async iterator of its bytes, or None if the body
+        has no such part
+
+    Raises:
+        ValueError: If the body is not valid multipart data
+    """
+    try:
+        from python_multipart.multipart import MultipartParser, parse_options_header
+    except ModuleNotFoundError:
+        from multipart.multipart import MultipartParser, parse_options_header
+
+    _, options = parse_options_header(content_type)
+    boundary = options.get(b"boundary")
+    if not boundary:
+        raise ValueError("Multipart request has no boundary")
+
+    events = collections.deque()
+    part = {"headers": {}, "field": b"", "value": b"", "target": False}
+
+    def on_part_begin():
+        part.update(headers={}, field=b"", value=b"", target=False)
+
+    def on_header_field(data, start, end):
+        part["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        part["value"] += data[start:end]
+
+    def on_header_end():
+        part["headers"][part["field"].lower()] = part["value"]
+        part["field"] = part["value"] = b""
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        if disposition.get(b"name") == field_name.encode() and b"filename" in disposition:
+            part["target"] = True
+            events.append(("start", (disposition[b"filename"].decode("utf-8", errors="replace"),
+                                     part["headers"].get(b"content-type", b"").decode("latin-1"))))
+
+    def on_part_data(data, start, end):
+        if part["target"]:
+            events.append(("data", bytes(data[start:end])))
+
+    def on_part_end():
+        if part["target"]:
+            events.append(("end", None))
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin, "on_header_field": on_header_field,
+        "on_header_value": on_header_value, "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished, "on_part_data": on_part_data, "on_part_end": on_part_end,
+    })
+    chunks = byte_chunks.__aiter__()
+
+    async def feed():
+        """Parse the next body chunk; False once the body is exhausted."""
+        try:
+            chunk = await chunks.__anext__()
+        except StopAsyncIteration:
+            return False
+        parser.write(chunk)
+        return True
+
+    while not events or events[0][0] != "start":
+        if events:
+            events.popleft()
+        elif not await feed():
+            return None
+    filename, part_type = events.popleft()[1]
+
+    async def data_chunks():
+        while True:
+            while events:
+                kind, data = events.popleft()
+                if kind == "end":
+                    return
+                yield data
+            if not await feed():
+                return
+
+    return filename, part_type, data_chunks()
+
+
+def _parse_float(value):
+    value = value.strip()
+    return float(value) if value else float("nan")
+
+
+def _quote_open_after(line, in_quotes):
+    """Whether a CSV quoted field is still open at the end of ``line`` (default dialect)."""
+    field_start = True
+    closed = False
+    for char in line:
+        if in_quotes:
+            if char == '"':
+                in_quotes, closed = False, True
+            continue
+        if char == '"' and (field_start or closed):
+            in_quotes = True
+        field_start = char == ","
+        closed = False
+    return in_quotes
+
+
+async def iter_csv_records(lines, max_record_bytes=DEFAULT_MAX_LINE_BYTES):
+    """
+    Group lines into CSV records, joining lines that end inside a quoted field.
+
+    Yields:
+        (line_number, text) with the number of the record's first line
+
+    Raises:
+        LineTooLong: If a record is longer than ``max_record_bytes``
+    """
+    parts = []
+    size = 0
+    in_quotes = False
+    line_number = first_line = 0
+    async for line in lines:
+        line_number += 1
+        if not parts:
+            first_line = line_number
+        parts.append(line)
+        size += len(line) + 1
+        if size > max_record_bytes:
+            raise LineTooLong(f"CSV record at line {first_line} longer than {max_record_bytes} bytes")
+        if '"' in line or in_quotes:
+            in_quotes = _quote_open_after(line, in_quotes)
+        if not in_quotes:
+            yield first_line, "\n".join(parts)
+            parts = []
+            size = 0
+    if parts:
+        yield first_line, "\n".join(parts)
+
+
+class _RecordFeed:
+    """Iterator handing one complete CSV record at a time to a long-lived csv.reader."""
+
+    def __init__(self):
+        self.text = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        text, self.text = self.text, None
+        if text is None:
+            raise StopIteration
+        return text
+
+
+async def iter_record_chunks(lines, input_format, chunk_size, max_record_bytes=DEFAULT_MAX_LINE_BYTES):
+    """
+    Parse CSV or NDJSON lines into chunks of at most ``chunk_size`` rows.
+
+    A row that cannot be parsed is reported on its own; the rows around it
+    are still predicted. Rows are numbered from 0 in input order (the CSV
+    header and blank lines are not rows).
+
+    Args:
+        lines: Async iterator of text lines
+        input_format: 'csv' (first record is the header) or 'ndjson'
+        chunk_size: Maximum number of rows (parsed or failed) per yielded chunk
+        max_record_bytes: Longest CSV record, which may span several lines
+
+    Yields:
+        (rows, errors): ``rows`` is a list of (row, feature dict) pairs and
+        ``errors`` a list of (row, message) pairs
+
+    Raises:
+        LineTooLong: If a CSV record is longer than ``max_record_bytes``
+    """
+    if input_format == "ndjson":
+        async def numbered(lines):
+            line_number = 0
+            async for line in lines:
+                line_number += 1
+                yield line_number, line
+        records = numbered(lines)
+    else:
+        records = iter_csv_records(lines, max_record_bytes)
+        feed = _RecordFeed()
+        reader = csv.reader(feed)
+
+    header = None
+    rows, errors = [], []
+    row = 0
+    async for line_number, text in records:
+        if not text.strip():
+            continue
+        try:
+            if input_format == "ndjson":
+                record = json.loads(text)
+                if not isinstance(record, dict):
+                    raise ValueError("expected a JSON object")
+                if "features" in record and isinstance(record["features"], dict):
+                    record = record["features"]
+            else:
+                feed.text = text
+                values = next(reader)
+                if header is None:
+                    header = [name.strip() for name in values]
+                    continue
+                if len(values) != len(header):
+                    raise ValueError(f"expected {len(header)} columns, got {len(values)}")
+                record = {name: _parse_float(value) for name, value in zip(header, values)}
+            rows.append((row, record))
+        except (ValueError, csv.Error) as exc:
+            errors.append((row, f"line {line_number}: {exc}"))
+        row += 1
+
+        if len(rows) + len(errors) >= chunk_size:
+            yield rows, errors
+            rows, errors = [], []
+
+    if rows or errors:
+        yield rows, errors
+
+
+def format_header(output_format):
+    """Return the text written before the first prediction."""
+    return "row,predicted_price\n" if output_format == "csv" else ""
+
+
+def format_predictions(rows, predictions, output_format, errors=()):
+    """
+    Serialize one chunk of predictions, and the rows that failed to parse, in row order.
+
+    Args:
+        rows: Row numbers of ``predictions``
+        predictions: Predicted prices
+        output_format: 'ndjson' or 'csv'
+        errors: (row, message) pairs; written as ``{"row", "error"}`` objects,
+            or ``# error:`` comment lines in CSV
+    """
+    if output_format == "csv":
+        lines = [(row, f"{row},{float(p)}") for row, p in zip(rows, predictions)]
+        lines += [(row, f"# error: row {row}: {message}") for row, message in errors]
+    else:
+        lines = [(row, json.dumps({"row": row, "predicted_price": float(p)})) for row, p in zip(rows, predictions)]
+        lines += [(row, json.dumps({"row": row, "error": message})) for row, message in errors]
+    lines.sort(key=lambda line: line[0])
+    return "".join(line + "\n" for _, line in lines)
+
+
+def format_error(message, output_format):
+    """Serialize an error raised after the response has started streaming."""
+    if output_format == "csv":
+        return f"# error: {message}\n"
+    return json.dumps({"error": message}) + "\n"
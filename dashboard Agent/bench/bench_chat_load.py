@@ -0,0 +1,170 @@
+"""
+Load-test /chat against a stub LLM server.
+
+Starts bench/stub_llm_server.py and the backend (pointed at the stub via
+OPENAI_BASE_URL), keeps ``--concurrency`` chat clients busy for
+``--duration`` seconds and, in parallel, probes /predict to check that the
+rest of the API stays responsive. Clients that get 429 wait for the
+Retry-After hint and try again. Reports chat throughput and latency, 429
+counts, /predict probe latency and the backend's peak thread count.
+
+Usage:
+    python bench/bench_chat_load.py [--concurrency 64] [--duration 20] [--llm-latency-ms 500]
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+CHAT_BODY = {"messages": [{"role": "user", "content": "What would a house with median income 5 cost?"}]}
+PROBE_FEATURES = {"features": {"MedInc": 5.0, "HouseAge": 20.0}}
+
+
+def start_process(args, env=None):
+    return subprocess.Popen(args, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_until_up(url, timeout=60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.25)
+    raise RuntimeError(f"{url} did not come up within {timeout:g}s")
+
+
+def thread_count(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("Threads:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def percentiles(values):
+    if not values:
+        return "n/a"
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return f"p50 {p50:.0f}ms  p95 {p95:.0f}ms  p99 {p99:.0f}ms"
+
+
+async def chat_client(client, deadline, results):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await client.post("/chat", json=CHAT_BODY)
+        except httpx.HTTPError as exc:
+            results["errors"] += 1
+            results["first_error"] = results["first_error"] or repr(exc)
+            continue
+        if response.status_code == 429:
+            results["rejected"] += 1
+            retry_after = float(response.headers.get("Retry-After", "1"))
+            await asyncio.sleep(min(retry_after, max(0.0, deadline - time.perf_counter())))
+        elif response.status_code == 200:
+            results["latencies"].append((time.perf_counter() - start) * 1000.0)
+        else:
+            results["errors"] += 1
+            results["first_error"] = results["first_error"] or f"{response.status_code} {response.text[:200]}"
+
+
+async def probe(client, deadline, latencies, interval=0.1):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.post("/predict", json=PROBE_FEATURES)
+        if response.status_code == 200:
+            latencies.append((time.perf_counter() - start) * 1000.0)
+        await asyncio.sleep(interval)
+
+
+async def sample_threads(pid, deadline, samples):
+    while time.perf_counter() < deadline:
+        count = thread_count(pid)
+        if count is not None:
+            samples.append(count)
+        await asyncio.sleep(0.5)
+
+
+async def run_load(base_url, pid, concurrency, duration):
+    results = {"latencies": [], "rejected": 0, "errors": 0, "first_error": None}
+    probe_latencies = []
+    thread_samples = []
+    limits = httpx.Limits(max_connections=concurrency + 4, max_keepalive_connections=concurrency + 4)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(
+            *[chat_client(client, deadline, results) for _ in range(concurrency)],
+            probe(client, deadline, probe_latencies),
+            sample_threads(pid, deadline, thread_samples),
+        )
+        # Chats in flight at the deadline still finish, so use the real wall time
+        results["elapsed"] = time.perf_counter() - start
+        limiter = (await client.get("/chat/concurrency/stats")).json()
+    return results, probe_latencies, thread_samples, limiter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=64, help="Concurrent chat clients")
+    parser.add_argument('--duration', type=float, default=20.0, help="Seconds of load")
+    parser.add_argument('--llm-latency-ms', type=float, default=500.0, help="Stub LLM delay per completion")
+    parser.add_argument('--max-concurrency', type=int, default=16, help="CHAT_MAX_CONCURRENCY for the backend")
+    parser.add_argument('--max-queued', type=int, default=32, help="CHAT_MAX_QUEUED for the backend")
+    parser.add_argument('--backend-port', type=int, default=8200)
+    parser.add_argument('--llm-port', type=int, default=8100)
+    args = parser.parse_args()
+
+    llm = start_process([sys.executable, 'bench/stub_llm_server.py', '--port', str(args.llm_port),
+                         '--latency-ms', str(args.llm_latency_ms)])
+    env = dict(
+        os.environ,
+        OPENAI_API_KEY="stub",
+        OPENAI_BASE_URL=f"http://127.0.0.1:{args.llm_port}/v1",
+        CHAT_MAX_CONCURRENCY=str(args.max_concurrency),
+        CHAT_MAX_QUEUED=str(args.max_queued),
+        PYTHONPATH=ROOT,
+    )
+    backend = start_process([sys.executable, '-m', 'uvicorn', 'backend.main:app',
+                             '--port', str(args.backend_port), '--log-level', 'warning'], env=env)
+    base_url = f"http://127.0.0.1:{args.backend_port}"
+    try:
+        wait_until_up(f"http://127.0.0.1:{args.llm_port}/docs")
+        wait_until_up(f"{base_url}/health")
+        idle_threads = thread_count(backend.pid)
+
+        results, probe_latencies, thread_samples, limiter = asyncio.run(
+            run_load(base_url, backend.pid, args.concurrency, args.duration)
+        )
+    finally:
+        backend.terminate()
+        llm.terminate()
+        backend.wait()
+        llm.wait()
+
+    completed = len(results["latencies"])
+    print(f"Clients: {args.concurrency}, limiter: {args.max_concurrency} running / {args.max_queued} queued, "
+          f"stub LLM latency {args.llm_latency_ms:g}ms per call (2 calls per chat)")
+    print(f"Chats completed: {completed} in {results['elapsed']:.1f}s ({completed / results['elapsed']:.1f}/s), "
+          f"429 responses: {results['rejected']}, errors: {results['errors']}")
+    if results["first_error"]:
+        print(f"First error: {results['first_error']}")
+    print(f"Chat latency:     {percentiles(results['latencies'])}")
+    print(f"/predict probe:   {percentiles(probe_latencies)} ({len(probe_latencies)} probes)")
+    print(f"Backend threads:  idle {idle_threads}, peak {max(thread_samples) if thread_samples else 'n/a'}")
+    print(f"Limiter queue wait: mean {limiter['queue_wait_ms']['mean']:.0f}ms, max {limiter['queue_wait_ms']['max']:.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Compare model cold start: four joblib pickles against the single-file bundle.
+
+Each method runs in a fresh Python process with the model files evicted from
+the page cache first (``posix_fadvise(DONTNEED)``; ``--warm`` skips that). It
+reports import time, load time (what the backend does at startup or on a
+hot swap), the first single-row prediction (which pays for any pages still
+to be read) and the process RSS afterwards.
+
+Methods:
+    pickle          load_model_artifacts (MODEL_ENGINE=sklearn)
+    pickle+compile  pickles, then CompiledForest conversion (the old 'compiled' start)
+    bundle          model.bundle read into memory (MODEL_ENGINE=compiled)
+    bundle-mmap     model.bundle memory-mapped, header only (MODEL_ENGINE=mmap)
+    bundle-mmap-v   memory-mapped with the data CRC32 re-checked (MODEL_VERIFY_CHECKSUM=1)
+
+Usage:
+    python bench/bench_cold_start.py [--models-dir models] [--version ID] [--repeat 3] [--warm]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+METHODS = ['pickle', 'pickle+compile', 'bundle', 'bundle-mmap', 'bundle-mmap-v']
+FEATURES = [5.0, 20.0, 5.0, 1.0, 1000.0, 3.0, 35.0, -119.0]
+
+
+def evict(path):
+    """Drop the clean page-cache pages of every file under ``path``."""
+    for name in os.listdir(path):
+        file_path = os.path.join(path, name)
+        if os.path.isfile(file_path):
+            fd = os.open(file_path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024.0
+    return 0.0
+
+
+def child(method, path):
+    """Runs in the measured process; prints one JSON line."""
+    start = time.perf_counter()
+    from ml.compiled_forest import compile_model
+    from ml.model_file import BUNDLE_FILE, load_model_file
+    from ml.preprocessing import ServingPreprocessor, load_model_artifacts
+    # Every loader needs scikit-learn (the scaler); it is imported lazily, so count it here
+    import sklearn.preprocessing  # noqa: F401
+    imported = time.perf_counter()
+
+    bundle_path = os.path.join(path, BUNDLE_FILE)
+    if method == 'pickle':
+        model, scaler, feature_names, _ = load_model_artifacts(path)
+    elif method == 'pickle+compile':
+        model, scaler, feature_names, _ = load_model_artifacts(path)
+        model = compile_model(model)
+    elif method == 'bundle':
+        model, scaler, feature_names, _ = load_model_file(bundle_path, mmap_mode=None)
+    else:
+        model, scaler, feature_names, _ = load_model_file(bundle_path, verify=method == 'bundle-mmap-v')
+    preprocessor = ServingPreprocessor(feature_names, scaler)
+    loaded = time.perf_counter()
+
+    model.predict(preprocessor.transform(dict(zip(feature_names, FEATURES))))
+    predicted = time.perf_counter()
+    print(json.dumps({
+        'import_s': imported - start,
+        'load_s': loaded - imported,
+        'first_predict_s': predicted - loaded,
+        'rss_mb': rss_mb(),
+    }))
+
+
+def run(method, path, warm):
+    if not warm:
+        evict(path)
+    output = subprocess.run(
+        [sys.executable, __file__, '--child', method, path],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--models-dir', default=os.path.join(ROOT, 'models'))
+    parser.add_argument('--version', default=None, help="Version to load (default: the active one)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--warm', action='store_true', help="Keep the files in the page cache")
+    parser.add_argument('--child', nargs=2, metavar=('METHOD', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    from ml.model_file import BUNDLE_FILE, convert_artifacts
+    from ml.registry import resolve_version
+    version, path = resolve_version(args.models_dir, args.version)
+    if not os.path.exists(os.path.join(path, BUNDLE_FILE)):
+        print(f"Converting version {version} to {BUNDLE_FILE}...")
+        convert_artifacts(path)
+
+    pickle_mb = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)
+                    if name.endswith('.pkl')) / 1e6
+    bundle_mb = os.path.getsize(os.path.join(path, BUNDLE_FILE)) / 1e6
+    print(f"Version {version}: pickles {pickle_mb:.1f} MB, bundle {bundle_mb:.1f} MB, "
+          f"{'warm' if args.warm else 'cold'} page cache, median of {args.repeat}")
+    print(f"{'method':<16} {'import ms':>10} {'load ms':>10} {'1st predict ms':>15} {'total ms':>10} {'RSS MB':>8}")
+    for method in METHODS:
+        runs = [run(method, path, args.warm) for _ in range(args.repeat)]
+        median = {key: float(np.median([r[key] for r in runs])) for key in runs[0]}
+        total = median['load_s'] + median['first_predict_s']
+        print(f"{method:<16} {median['import_s'] * 1000:>10.1f} {median['load_s'] * 1000:>10.1f} "
+              f"{median['first_predict_s'] * 1000:>15.2f} {total * 1000:>10.1f} {median['rss_mb']:>8.0f}")
+
+
+if __name__ == '__main__':
+    main()
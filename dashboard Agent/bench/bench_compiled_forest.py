@@ -0,0 +1,78 @@
+"""
+Benchmark CompiledForest against RandomForestRegressor.predict.
+
+Exits with status 1 if the two disagree by more than ``--tolerance`` on any batch.
+
+Usage:
+    python bench/bench_compiled_forest.py [--models-dir models] [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from ml.preprocessing import load_model_artifacts
+from ml.model_trainer import train_model
+from ml.compiled_forest import CompiledForest
+
+BATCH_SIZES = [1, 64, 10_000]
+TOLERANCE = 1e-9
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'california_housing.csv')
+
+
+def time_call(fn, X, repeat):
+    """Return the median wall time of ``fn(X)`` in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(X)
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--models-dir', default=os.path.join(os.path.dirname(__file__), '..', 'models'))
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help="Largest allowed absolute difference")
+    args = parser.parse_args()
+
+    df = pd.read_csv(DATA_PATH)
+    model, scaler, feature_names, _ = load_model_artifacts(args.models_dir)
+    if model is None:
+        print("No saved model found, training one on the California dataset...")
+        model, scaler, _, feature_names = train_model(df)
+
+    compiled = CompiledForest.from_sklearn(model)
+    X_all = scaler.transform(df[feature_names])
+    rng = np.random.default_rng(42)
+
+    print(f"Trees: {compiled.n_trees}, nodes: {compiled.node_count}")
+    print(f"{'batch':>8} {'sklearn ms':>12} {'compiled ms':>12} {'speedup':>9} {'max abs diff':>14}")
+    mismatched = []
+    for batch_size in BATCH_SIZES:
+        X = X_all[rng.integers(0, len(X_all), size=batch_size)]
+        repeat = args.repeat if batch_size < 10_000 else max(3, args.repeat // 5)
+
+        max_diff = float(np.abs(model.predict(X) - compiled.predict(X)).max())
+        if not max_diff <= args.tolerance:
+            mismatched.append(batch_size)
+        sklearn_ms = time_call(model.predict, X, repeat)
+        compiled_ms = time_call(compiled.predict, X, repeat)
+
+        print(f"{batch_size:>8} {sklearn_ms:>12.3f} {compiled_ms:>12.3f} "
+              f"{sklearn_ms / compiled_ms:>8.1f}x {max_diff:>14.2e}")
+
+    if mismatched:
+        print(f"Predictions differ by more than {args.tolerance:g} for batch sizes: "
+              f"{', '.join(map(str, mismatched))}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Pareto report of compressed variants of the active model.
+
+Every variant in ml.compression.DEFAULT_CANDIDATES (pruned depth, leaves and
+tree count, distilled gradient boosting and linear students) is scored on the
+holdout rows stored with the version for RMSE/R2, pickled size, load time and single-row latency.
+Rows marked '*' are Pareto-optimal on RMSE, size and p50 latency. Publish one
+with ``POST /model/compress?variant=<name>``.
+
+Usage:
+    python bench/bench_compression.py [--models-dir models] [--engine sklearn] [--output report.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from ml.compression import compress_model, format_report, holdout_split
+from ml.model_trainer import load_base_dataset
+from ml.preprocessing import load_holdout
+from ml.registry import load_bundle, resolve_version
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'california_housing.csv')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--models-dir', default=os.path.join(os.path.dirname(__file__), '..', 'models'))
+    parser.add_argument('--version', default=None, help="Version to compress (default: the active one)")
+    parser.add_argument('--engine', default='sklearn', help="Serving engine the latency is measured with")
+    parser.add_argument('--output', default=None, help="Also write the report rows to this JSON file")
+    args = parser.parse_args()
+
+    bundle = load_bundle(args.models_dir, args.version)
+    if bundle is None:
+        sys.exit("No saved model found; train one first")
+    holdout = load_holdout(resolve_version(args.models_dir, bundle.version)[1])
+    X_train, X_test, _, y_test = holdout_split(load_base_dataset(DATA_PATH), bundle.scaler, bundle.feature_names,
+                                               holdout)
+
+    start = time.perf_counter()
+    report, _ = compress_model(bundle.model, X_train, X_test, y_test, engine=args.engine,
+                               progress=lambda fraction, stage: print(f"[{fraction:4.0%}] {stage}", flush=True))
+    print(f"\nModel version {bundle.version} ({type(bundle.model).__name__}), engine {args.engine}, "
+          f"{len(y_test)} holdout rows, {time.perf_counter() - start:.0f}s")
+    print(format_report(report))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'version': bundle.version, 'engine': args.engine, 'report': report}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark CSV parsing against memory-mapped DatasetStore loads.
+
+Synthetic California-housing-shaped CSVs are generated in a temp directory,
+then timed for: pd.read_csv, one-time DatasetStore ingest, and warm
+DatasetStore opens (index lookup + mmap) followed by a full column scan.
+
+Usage:
+    python bench/bench_dataset_loader.py [--sizes 20000 1000000 10000000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from ml.dataset_store import DatasetStore
+
+COLUMNS = ['MedInc', 'HouseAge', 'AveRooms', 'AveBedrms', 'Population',
+           'AveOccup', 'Latitude', 'Longitude', 'target']
+
+
+def write_synthetic_csv(path, n_rows, chunk_rows=1_000_000):
+    rng = np.random.default_rng(0)
+    for start in range(0, n_rows, chunk_rows):
+        n = min(chunk_rows, n_rows - start)
+        chunk = pd.DataFrame(rng.normal(size=(n, len(COLUMNS))), columns=COLUMNS)
+        chunk.to_csv(path, mode='a', header=start == 0, index=False, float_format='%.6f')
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20_000, 1_000_000, 10_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'csv MB':>8} {'read_csv ms':>12} {'ingest ms':>10} {'mmap open ms':>13} "
+          f"{'open+scan ms':>13} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in args.sizes:
+            csv_path = os.path.join(tmp, f"housing_{n_rows}.csv")
+            write_synthetic_csv(csv_path, n_rows)
+            store = DatasetStore(os.path.join(tmp, 'store'))
+
+            _, read_ms = timed(lambda: pd.read_csv(csv_path))
+            _, ingest_ms = timed(lambda: store.ingest_csv(csv_path))
+            _, open_ms = timed(lambda: store.load_csv(csv_path))
+            _, scan_ms = timed(lambda: [float(store.load_csv(csv_path)[c].sum()) for c in COLUMNS])
+
+            size_mb = os.path.getsize(csv_path) / 1e6
+            print(f"{n_rows:>10} {size_mb:>8.1f} {read_ms:>12.1f} {ingest_ms:>10.1f} {open_ms:>13.2f} "
+                  f"{scan_ms:>13.1f} {read_ms / open_ms:>7.0f}x")
+            os.remove(csv_path)
+
+
+if __name__ == '__main__':
+    main()
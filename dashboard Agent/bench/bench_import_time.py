@@ -0,0 +1,190 @@
+"""
+Import-time and startup regression check for the entry points.
+
+Every entry point starts in a fresh process, ``--repeat`` times (medians
+reported):
+
+- backend               backend.main imported, startup handlers run (model loaded)
+- backend-predict       the same with SERVER_PROFILE=predict
+- backend-predict-mmap  SERVER_PROFILE=predict with MODEL_ENGINE=mmap
+- chat-cli              agent/chat.py until its banner is printed
+- agent                 import of agent.agent (what the first chat request pays)
+
+``ready ms`` is the wall time from process start until the entry point can
+serve (startup done, or the prompt shown). The backend runs on a scratch
+copy of models/, so nothing under models/ is written.
+
+Exits with status 1 if a backend entry point imported a module it must load
+lazily (LangChain, OpenAI, the training stack), or, with ``--compare``, if
+``ready ms`` of an entry point grew by more than ``--threshold`` percent.
+
+Usage:
+    python bench/bench_import_time.py [--repeat 5] [--output imports.json] [--compare before.json]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from bench_chat_load import ROOT
+from bench_multiworker import scratch_copy
+from bench_suite import RESULTS_DIR, git_commit
+
+# Modules a backend entry point must not import before the first /train or chat request.
+# pandas is not listed: scikit-learn imports it when the model and scaler load.
+LAZY_MODULES = ('langchain', 'langchain_core', 'langchain_openai', 'openai',
+                'ml.model_trainer', 'ml.model_search', 'ml.compression', 'ml.dataset_store', 'agent.agent')
+ENTRY_POINTS = {
+    'backend': {'kind': 'backend', 'env': {}},
+    'backend-predict': {'kind': 'backend', 'env': {'SERVER_PROFILE': 'predict'}},
+    'backend-predict-mmap': {'kind': 'backend', 'env': {'SERVER_PROFILE': 'predict', 'MODEL_ENGINE': 'mmap'}},
+    'chat-cli': {'kind': 'cli', 'env': {}},
+    'agent': {'kind': 'module', 'env': {}},
+}
+CHILD = r"""
+import asyncio, json, sys, time
+start = time.perf_counter()
+if sys.argv[1] == 'backend':
+    import backend.main as main
+    imported = time.perf_counter()
+
+    async def run(handlers):
+        for handler in handlers:
+            await handler()
+
+    asyncio.run(run(main.app.router.on_startup))
+    ready = time.perf_counter()
+else:
+    import agent.agent
+    imported = ready = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000.0,
+    'startup_ms': (ready - imported) * 1000.0,
+    'modules': sorted(set(sys.modules)),
+}), flush=True)
+"""
+
+
+def run_once(entry, models_dir):
+    """Start one entry point; return its timings and the lazy modules it loaded."""
+    spec = ENTRY_POINTS[entry]
+    env = dict(os.environ, PYTHONPATH=ROOT, MODELS_DIR=models_dir, MODEL_WATCH_INTERVAL_S="0",
+               OPENAI_API_KEY="sk-bench", **spec['env'])
+    if spec['kind'] == 'cli':
+        args = [sys.executable, os.path.join('agent', 'chat.py')]
+    else:
+        args = [sys.executable, '-c', CHILD, spec['kind']]
+
+    start = time.perf_counter()
+    process = subprocess.Popen(args, cwd=ROOT, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, text=True)
+    try:
+        if spec['kind'] == 'cli':
+            for line in process.stdout:
+                if "Type 'quit'" in line:
+                    break
+            result = {'ready_ms': (time.perf_counter() - start) * 1000.0, 'import_ms': None, 'startup_ms': None,
+                      'lazy_loaded': []}
+            process.stdin.write("quit\n")
+            process.stdin.flush()
+        else:
+            for line in process.stdout:
+                if line.startswith('{'):
+                    break
+            ready_ms = (time.perf_counter() - start) * 1000.0
+            child = json.loads(line)
+            loaded = [m for m in LAZY_MODULES if m in child['modules']]
+            result = {'ready_ms': ready_ms, 'import_ms': child['import_ms'], 'startup_ms': child['startup_ms'],
+                      'lazy_loaded': loaded if spec['kind'] == 'backend' else []}
+    finally:
+        process.stdin.close()
+        process.wait(timeout=120)
+    return result
+
+
+def summarize(runs):
+    summary = {}
+    for key in ('ready_ms', 'import_ms', 'startup_ms'):
+        values = [run[key] for run in runs if run[key] is not None]
+        summary[key] = float(np.median(values)) if values else None
+    summary['lazy_loaded'] = sorted({m for run in runs for m in run['lazy_loaded']})
+    return summary
+
+
+def compare(report, baseline, threshold):
+    """Print ready-time changes against ``baseline``; return the regressed entry points."""
+    regressed = []
+    print(f"\nCompared with {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')}):")
+    for name, current in report['entry_points'].items():
+        before = baseline['entry_points'].get(name)
+        if not before:
+            continue
+        delta = (current['ready_ms'] - before['ready_ms']) / before['ready_ms'] * 100.0
+        if delta > threshold:
+            regressed.append(name)
+        print(f"  {name:<21} ready_ms {before['ready_ms']:.0f} -> {current['ready_ms']:.0f} ({delta:+.1f}%)")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entry-points', nargs='+', default=list(ENTRY_POINTS), choices=list(ENTRY_POINTS))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help="Result JSON path (default bench/results/imports-<commit>-<time>.json)")
+    parser.add_argument('--compare', help="Earlier result JSON to check for regressions")
+    parser.add_argument('--threshold', type=float, default=20.0, help="Regression threshold in percent")
+    args = parser.parse_args()
+
+    models_dir = scratch_copy(os.path.join(ROOT, 'models'))
+    try:
+        entry_points = {}
+        for entry in args.entry_points:
+            entry_points[entry] = summarize([run_once(entry, models_dir) for _ in range(args.repeat)])
+    finally:
+        shutil.rmtree(os.path.dirname(models_dir), ignore_errors=True)
+
+    commit = git_commit()
+    timestamp = time.strftime("%Y%m%dT%H%M%S")
+    report = {
+        'meta': {'commit': commit, 'timestamp': timestamp, 'python': platform.python_version(),
+                 'repeat': args.repeat},
+        'entry_points': entry_points,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"imports-{commit or 'nogit'}-{timestamp}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    def ms(value):
+        return f"{value:.0f}" if value is not None else "-"
+
+    print(f"Median of {args.repeat} fresh processes")
+    print(f"{'entry point':<21} {'import ms':>10} {'startup ms':>11} {'ready ms':>9}  lazy modules loaded")
+    for name, row in entry_points.items():
+        print(f"{name:<21} {ms(row['import_ms']):>10} {ms(row['startup_ms']):>11} {ms(row['ready_ms']):>9}  "
+              f"{', '.join(row['lazy_loaded']) or '-'}")
+    print(f"Results written to {output}")
+
+    failed = False
+    eager = [name for name, row in entry_points.items() if row['lazy_loaded']]
+    if eager:
+        print(f"Imported modules that must load lazily: {', '.join(eager)}")
+        failed = True
+    if args.compare:
+        with open(args.compare) as f:
+            regressed = compare(report, json.load(f), args.threshold)
+        if regressed:
+            print(f"Regressed by more than {args.threshold:g}%: {', '.join(regressed)}")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Compare incremental (warm_start) retraining against a full refit.
+
+A base forest is trained on part of the California dataset, then uploads of
+increasing size are added either by refitting on base + upload or by adding
+trees with ``retrain_incremental``. Both are scored on the same holdout.
+
+Usage:
+    python bench/bench_incremental_retrain.py [--upload-sizes 10 100 1000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from ml.model_trainer import train_model, retrain_incremental, load_base_dataset
+from ml.preprocessing import preprocess_data
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'california_housing.csv')
+
+
+def score(model, scaler, test_df):
+    X_test, y_test, _ = preprocess_data(test_df, scaler=scaler, fit_scaler=False)
+    y_pred = model.predict(X_test)
+    return r2_score(y_test, y_pred), float(np.sqrt(mean_squared_error(y_test, y_pred)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--upload-sizes', type=int, nargs='+', default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    df = load_base_dataset(DATA_PATH).to_frame()
+    rest_df, test_df = train_test_split(df, test_size=0.15, random_state=0)
+    base_df, pool_df = train_test_split(rest_df, test_size=max(args.upload_sizes), random_state=0)
+
+    start = time.perf_counter()
+    model, scaler, metrics, feature_names = train_model(base_df)
+    print(f"Base model: {len(base_df)} rows, fitted in {time.perf_counter() - start:.2f}s")
+    metadata = {'metrics': metrics, 'training_samples': metrics['training_samples']}
+
+    print(f"{'upload':>7} {'full s':>8} {'incr s':>8} {'speedup':>8} {'full R2':>8} {'incr R2':>8} "
+          f"{'full RMSE':>10} {'incr RMSE':>10}")
+    for size in args.upload_sizes:
+        upload_df = pool_df.iloc[:size]
+
+        start = time.perf_counter()
+        full_model, full_scaler, _, _ = train_model(pd.concat([base_df, upload_df], ignore_index=True))
+        full_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        incr_model, incr_scaler, _, _ = retrain_incremental(upload_df, model, scaler, feature_names, metadata)
+        incr_s = time.perf_counter() - start
+
+        full_r2, full_rmse = score(full_model, full_scaler, test_df)
+        incr_r2, incr_rmse = score(incr_model, incr_scaler, test_df)
+        print(f"{size:>7} {full_s:>8.2f} {incr_s:>8.2f} {full_s / incr_s:>7.1f}x {full_r2:>8.4f} {incr_r2:>8.4f} "
+              f"{full_rmse:>10.4f} {incr_rmse:>10.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+Compare memory and startup of multi-worker serving across model engines.
+
+For each engine the backend runs under ``uvicorn --workers N`` on a scratch
+copy of models/ (hard links, so nothing is re-written) in which every version
+has a ``model.bundle`` file. The script reports:
+
+- time until every worker has loaded the model
+- RSS and PSS per worker after a /predict warm-up. PSS splits pages shared
+  through the page cache across the processes that map them, so the sum of
+  PSS is the real memory cost.
+- how long a CURRENT switch takes to reach all workers
+
+``mmap`` is started twice. The first start has to convert the active
+version's pickles into ``model.bundle``; the second only maps the file.
+
+Usage:
+    python bench/bench_multiworker.py [--workers 4] [--engines sklearn mmap]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_chat_load import ROOT
+from ml.model_file import BUNDLE_FILE, convert_models_dir
+from ml.registry import activate_version, current_version, list_versions, resolve_version
+
+FEATURES = {"features": {"MedInc": 5.0, "HouseAge": 20.0, "AveRooms": 5.0, "AveBedrms": 1.0,
+                         "Population": 1000.0, "AveOccup": 3.0, "Latitude": 35.0, "Longitude": -119.0}}
+
+
+def scratch_copy(models_dir):
+    """Hard-link models/ into a temp dir (falls back to copying) and write every version's bundle file."""
+    scratch = os.path.join(tempfile.mkdtemp(prefix="bench-workers-"), "models")
+
+    def link_or_copy(src, dst):
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+
+    shutil.copytree(models_dir, scratch, copy_function=link_or_copy)
+    convert_models_dir(scratch)
+    return scratch
+
+
+def worker_pids(master_pid):
+    """Return the uvicorn worker processes (spawned children) of ``master_pid``."""
+    pids = []
+    for tid in os.listdir(f"/proc/{master_pid}/task"):
+        with open(f"/proc/{master_pid}/task/{tid}/children") as f:
+            for child in f.read().split():
+                with open(f"/proc/{child}/cmdline", "rb") as cmd:
+                    if b"spawn_main" in cmd.read():
+                        pids.append(int(child))
+    return pids
+
+
+def memory_mb(pid):
+    """Return (RSS, PSS) of ``pid`` in MB."""
+    values = {}
+    for path, field in ((f"/proc/{pid}/status", "VmRSS:"), (f"/proc/{pid}/smaps_rollup", "Pss:")):
+        with open(path) as f:
+            for line in f:
+                if line.startswith(field):
+                    values[field] = int(line.split()[1]) / 1024.0
+                    break
+    return values["VmRSS:"], values["Pss:"]
+
+
+def start_backend(engine, workers, port, models_dir):
+    env = dict(os.environ, MODEL_ENGINE=engine, MODELS_DIR=models_dir, MODEL_WATCH_INTERVAL_S="0.5",
+               PYTHONPATH=ROOT, PYTHONUNBUFFERED="1")
+    env.pop("OPENAI_API_KEY", None)
+    return subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'backend.main:app', '--port', str(port), '--workers', str(workers),
+         '--log-level', 'warning'],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+
+
+def wait_for_workers(process, workers, timeout=600.0):
+    """Return seconds until ``workers`` processes printed that their model is loaded."""
+    start = time.perf_counter()
+    loaded = 0
+    while loaded < workers:
+        line = process.stdout.readline()
+        if not line:
+            raise RuntimeError("Backend exited during startup")
+        if line.startswith("Model loaded successfully"):
+            loaded += 1
+        if time.perf_counter() - start > timeout:
+            raise RuntimeError(f"Only {loaded} of {workers} workers loaded within {timeout:g}s")
+    return time.perf_counter() - start
+
+
+def wait_for_version(client, version, workers, timeout=60.0):
+    """Return seconds until ``4 * workers`` consecutive responses serve ``version``."""
+    start = time.perf_counter()
+    streak = 0
+    while streak < 4 * workers:
+        if time.perf_counter() - start > timeout:
+            return None
+        serving = client.get("/model/versions").json()["serving"]
+        streak = streak + 1 if serving == version else 0
+    return time.perf_counter() - start
+
+
+def run(engine, workers, port, models_dir, warmup):
+    process = start_backend(engine, workers, port, models_dir)
+    try:
+        startup_s = wait_for_workers(process, workers)
+        threading.Thread(target=process.stdout.read, daemon=True).start()
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=60.0) as client:
+            for _ in range(warmup):
+                client.post("/predict", json=FEATURES).raise_for_status()
+            memory = [memory_mb(pid) for pid in worker_pids(process.pid)]
+
+            original = current_version(models_dir)
+            others = [v for v in list_versions(models_dir) if v != original]
+            swap_s = None
+            if others:
+                activate_version(models_dir, others[-1])
+                swap_s = wait_for_version(client, others[-1], workers)
+                activate_version(models_dir, original)
+                wait_for_version(client, original, workers)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    return startup_s, memory, swap_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--engines', nargs='+', default=['sklearn', 'compiled', 'mmap'])
+    parser.add_argument('--warmup', type=int, default=200, help="/predict calls before measuring memory")
+    parser.add_argument('--port', type=int, default=8400)
+    args = parser.parse_args()
+
+    models_dir = scratch_copy(os.path.join(ROOT, 'models'))
+    runs = []
+    try:
+        for engine in args.engines:
+            labels = ["mmap (convert)", "mmap"] if engine == "mmap" else [engine]
+            for label in labels:
+                if label.endswith("(convert)"):
+                    os.remove(os.path.join(resolve_version(models_dir)[1], BUNDLE_FILE))
+                runs.append((label, *run(engine, args.workers, args.port, models_dir, args.warmup)))
+    finally:
+        shutil.rmtree(os.path.dirname(models_dir), ignore_errors=True)
+
+    print(f"{args.workers} workers, memory after {args.warmup} /predict calls")
+    print(f"{'engine':<14} {'startup s':>10} {'RSS/worker MB':>14} {'PSS/worker MB':>14} {'total PSS MB':>13} {'swap s':>7}")
+    for label, startup_s, memory, swap_s in runs:
+        rss = sum(m[0] for m in memory) / len(memory)
+        pss = sum(m[1] for m in memory)
+        swap = f"{swap_s:.2f}" if swap_s is not None else "n/a"
+        print(f"{label:<14} {startup_s:>10.2f} {rss:>14.0f} {pss / len(memory):>14.0f} {pss:>13.0f} {swap:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,389 @@
+"""
+Replay a request mix against the backend and write the results as JSON.
+
+Starts bench/stub_llm_server.py and the backend (on a scratch copy of the
+active model, so /train never touches models/), then keeps ``--concurrency``
+clients replaying the workload for ``--duration`` seconds. Training jobs are
+submitted separately, ``--train-jobs`` of them spread over the run, and
+followed until they finish.
+
+The workload is either synthetic, drawn with ``--seed`` from the
+California dataset in the proportions of ``--mix``, or a recorded JSONL
+file of ``{"name", "method", "path", "body"}`` lines (``--workload``).
+``--save-workload`` writes the synthetic mix out so a run can be replayed
+exactly.
+
+Reports p50/p95/p99 latency, throughput, 429s and errors per request type,
+training job durations and the peak RSS of the backend and its training
+workers. ``--compare`` diffs the result against an earlier JSON file and
+exits with status 1 if any request type regressed by more than
+``--threshold`` percent.
+
+Usage:
+    python bench/bench_suite.py [--mix predict=80,bulk=15,chat=5] [--concurrency 16] [--duration 30]
+    python bench/bench_suite.py --workload recorded.jsonl --output after.json --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+import pandas as pd
+
+from bench_chat_load import ROOT, start_process, wait_until_up
+
+DATA_PATH = os.path.join(ROOT, 'data', 'california_housing.csv')
+RESULTS_DIR = os.path.join(ROOT, 'bench', 'results')
+DEFAULT_MIX = "predict=80,bulk=15,chat=5"
+CHAT_TEMPLATES = [
+    # Answered by the intent router without the LLM
+    "What would a house with median income {medinc} and house age {age} cost?",
+    # Two comparisons: goes through the agent and the stub LLM
+    "Compare a house with MedInc {medinc} to one with MedInc {other}, which is pricier?",
+]
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ("predict", "bulk", "chat"):
+            raise ValueError(f"Unknown request type in --mix: {name!r} (use --train-jobs for /train)")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def synthetic_workload(mix, size, bulk_rows, seed):
+    """Draw ``size`` requests in the proportions of ``mix`` from real feature rows."""
+    rng = np.random.default_rng(seed)
+    rows = pd.read_csv(DATA_PATH).drop(columns=["target"]).round(4).to_dict(orient="records")
+    names = list(mix)
+    weights = np.array([mix[name] for name in names], dtype=float)
+    workload = []
+    for name in rng.choice(names, size=size, p=weights / weights.sum()):
+        if name == "predict":
+            body = {"features": rows[rng.integers(len(rows))]}
+            workload.append({"name": "predict", "method": "POST", "path": "/predict", "body": body})
+        elif name == "bulk":
+            body = {"data": [rows[i] for i in rng.integers(len(rows), size=bulk_rows)]}
+            workload.append({"name": "bulk", "method": "POST", "path": "/predict/bulk", "body": body})
+        else:
+            template = CHAT_TEMPLATES[rng.integers(len(CHAT_TEMPLATES))]
+            message = template.format(
+                medinc=round(rng.uniform(1, 10), 2), other=round(rng.uniform(1, 10), 2),
+                age=int(rng.integers(1, 52)),
+            )
+            workload.append({"name": "chat", "method": "POST", "path": "/chat", "body": {"message": message}})
+    return workload
+
+
+def load_workload(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_workload(workload, path):
+    with open(path, "w") as f:
+        for item in workload:
+            f.write(json.dumps(item) + "\n")
+
+
+def scratch_models_dir(models_dir):
+    """Copy the active model into a temp dir (hard links where possible)."""
+    scratch = tempfile.mkdtemp(prefix="bench-models-")
+    current = os.path.join(models_dir, "CURRENT")
+    if os.path.exists(current):
+        with open(current) as f:
+            version = f.read().strip()
+        shutil.copy2(current, scratch)
+        sources = [(os.path.join(models_dir, "versions", version), os.path.join(scratch, "versions", version))]
+    else:
+        sources = [(models_dir, scratch)]
+
+    def link_or_copy(src, dst):
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+
+    for src, dst in sources:
+        shutil.copytree(src, dst, copy_function=link_or_copy, dirs_exist_ok=True)
+    return scratch
+
+
+def process_tree(pid):
+    pids = [pid]
+    for tid in os.listdir(f"/proc/{pid}/task"):
+        try:
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                for child in f.read().split():
+                    pids.extend(process_tree(int(child)))
+        except OSError:
+            pass
+    return pids
+
+
+def status_kb(pid, field):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+async def sample_rss(pid, stop, samples, interval=0.2):
+    """Record the summed RSS (KiB) of the backend and its worker processes."""
+    while not stop.is_set():
+        try:
+            samples.append(sum(status_kb(p, "VmRSS") for p in process_tree(pid)))
+        except OSError:
+            pass
+        await asyncio.sleep(interval)
+
+
+def summarize(latencies_ms, elapsed):
+    if not latencies_ms:
+        return {"ok": 0, "throughput_per_s": 0.0}
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return {
+        "ok": len(latencies_ms),
+        "throughput_per_s": len(latencies_ms) / elapsed,
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "mean_ms": float(np.mean(latencies_ms)),
+        "max_ms": float(np.max(latencies_ms)),
+    }
+
+
+async def client_loop(client, workload, cursor, deadline, results):
+    while time.perf_counter() < deadline:
+        item = workload[next(cursor) % len(workload)]
+        stats = results.setdefault(item["name"], {"latencies": [], "rejected": 0, "errors": 0, "first_error": None})
+        start = time.perf_counter()
+        try:
+            response = await client.request(item["method"], item["path"], json=item.get("body"))
+        except httpx.HTTPError as exc:
+            stats["errors"] += 1
+            stats["first_error"] = stats["first_error"] or repr(exc)
+            continue
+        if response.status_code == 429:
+            stats["rejected"] += 1
+            await asyncio.sleep(min(float(response.headers.get("Retry-After", "1")), 1.0))
+        elif response.status_code < 300:
+            stats["latencies"].append((time.perf_counter() - start) * 1000.0)
+        else:
+            stats["errors"] += 1
+            stats["first_error"] = stats["first_error"] or f"{response.status_code} {response.text[:200]}"
+
+
+async def submit_training(client, count, duration, jobs):
+    """Submit ``count`` /train jobs evenly over the run."""
+    for _ in range(count):
+        await asyncio.sleep(duration / (count + 1))
+        start = time.perf_counter()
+        response = await client.post("/train")
+        submit_ms = (time.perf_counter() - start) * 1000.0
+        jobs.append({"status_code": response.status_code, "submit_ms": submit_ms,
+                     "job": response.json() if response.status_code == 202 else None})
+
+
+async def follow_training(client, jobs):
+    """Poll submitted training jobs until they finish."""
+    for entry in jobs:
+        job = entry["job"]
+        while job is not None and job["status"] not in ("succeeded", "failed", "cancelled"):
+            await asyncio.sleep(0.5)
+            job = (await client.get(f"/jobs/{job['id']}")).json()
+        entry["job"] = job
+
+
+async def run_suite(base_url, pid, workload, concurrency, duration, train_jobs):
+    results = {}
+    jobs = []
+    rss_samples = []
+    stop = asyncio.Event()
+    cursor = iter(range(10 ** 12))
+    limits = httpx.Limits(max_connections=concurrency + 2, max_keepalive_connections=concurrency + 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300.0, limits=limits) as client:
+        sampler = asyncio.ensure_future(sample_rss(pid, stop, rss_samples))
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(
+            *[client_loop(client, workload, cursor, deadline, results) for _ in range(concurrency)],
+            submit_training(client, train_jobs, duration, jobs),
+        )
+        elapsed = time.perf_counter() - start
+        await follow_training(client, jobs)
+        stop.set()
+        await sampler
+    return results, jobs, elapsed, rss_samples
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, threshold):
+    """Print per-type changes against ``baseline``; return the regressed types."""
+    regressed = []
+    print(f"\nCompared with {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')}):")
+    for name, current in report["requests"].items():
+        before = baseline["requests"].get(name)
+        if not before or not before.get("ok") or not current.get("ok"):
+            continue
+        changes = []
+        for key, worse_if_higher in (("p50_ms", True), ("p99_ms", True), ("throughput_per_s", False)):
+            delta = (current[key] - before[key]) / before[key] * 100.0 if before[key] else 0.0
+            if (delta if worse_if_higher else -delta) > threshold:
+                regressed.append(name)
+            changes.append(f"{key} {before[key]:.1f} -> {current[key]:.1f} ({delta:+.1f}%)")
+        print(f"  {name:<8} " + ", ".join(changes))
+    return sorted(set(regressed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="Synthetic request weights (predict, bulk, chat)")
+    parser.add_argument('--workload', help="Recorded JSONL workload to replay instead of --mix")
+    parser.add_argument('--save-workload', help="Write the workload used to this JSONL file")
+    parser.add_argument('--workload-size', type=int, default=5000, help="Synthetic requests drawn (replayed cyclically)")
+    parser.add_argument('--bulk-rows', type=int, default=100, help="Rows per synthetic /predict/bulk request")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--concurrency', type=int, default=16, help="Concurrent clients")
+    parser.add_argument('--duration', type=float, default=30.0, help="Seconds of load")
+    parser.add_argument('--train-jobs', type=int, default=1, help="/train jobs submitted during the run")
+    parser.add_argument('--llm-latency-ms', type=float, default=300.0, help="Stub LLM delay per completion")
+    parser.add_argument('--backend-env', action='append', default=[], metavar='KEY=VALUE',
+                        help="Extra backend environment variable (repeatable)")
+    parser.add_argument('--output', help="Result JSON path (default bench/results/suite-<commit>-<time>.json)")
+    parser.add_argument('--compare', help="Earlier result JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=15.0, help="Regression threshold in percent")
+    parser.add_argument('--backend-port', type=int, default=8300)
+    parser.add_argument('--llm-port', type=int, default=8101)
+    args = parser.parse_args()
+
+    workload = load_workload(args.workload) if args.workload else synthetic_workload(
+        parse_mix(args.mix), args.workload_size, args.bulk_rows, args.seed
+    )
+    if args.save_workload:
+        save_workload(workload, args.save_workload)
+
+    models_dir = scratch_models_dir(os.path.join(ROOT, 'models'))
+    backend_env = dict(item.split("=", 1) for item in args.backend_env)
+    llm = start_process([sys.executable, 'bench/stub_llm_server.py', '--port', str(args.llm_port),
+                         '--latency-ms', str(args.llm_latency_ms)])
+    env = dict(
+        os.environ,
+        OPENAI_API_KEY="stub",
+        OPENAI_BASE_URL=f"http://127.0.0.1:{args.llm_port}/v1",
+        MODELS_DIR=models_dir,
+        PYTHONPATH=ROOT,
+        **backend_env,
+    )
+    backend = start_process([sys.executable, '-m', 'uvicorn', 'backend.main:app',
+                             '--port', str(args.backend_port), '--log-level', 'warning'], env=env)
+    base_url = f"http://127.0.0.1:{args.backend_port}"
+    try:
+        wait_until_up(f"http://127.0.0.1:{args.llm_port}/docs")
+        wait_until_up(f"{base_url}/health")
+        idle_rss_kb = sum(status_kb(p, "VmRSS") for p in process_tree(backend.pid))
+        results, jobs, elapsed, rss_samples = asyncio.run(run_suite(
+            base_url, backend.pid, workload, args.concurrency, args.duration, args.train_jobs
+        ))
+        backend_hwm_kb = status_kb(backend.pid, "VmHWM")
+    finally:
+        backend.terminate()
+        llm.terminate()
+        backend.wait()
+        llm.wait()
+        shutil.rmtree(models_dir, ignore_errors=True)
+
+    requests = {}
+    for name, stats in sorted(results.items()):
+        requests[name] = {
+            **summarize(stats["latencies"], elapsed),
+            "rejected": stats["rejected"],
+            "errors": stats["errors"],
+            "first_error": stats["first_error"],
+        }
+    all_latencies = [ms for stats in results.values() for ms in stats["latencies"]]
+    train = [{
+        "status_code": entry["status_code"],
+        "submit_ms": entry["submit_ms"],
+        "status": entry["job"]["status"] if entry["job"] else None,
+        "duration_s": (entry["job"]["finished_at"] - entry["job"]["started_at"])
+        if entry["job"] and entry["job"].get("finished_at") and entry["job"].get("started_at") else None,
+    } for entry in jobs]
+
+    commit = git_commit()
+    timestamp = time.strftime("%Y%m%dT%H%M%S")
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": timestamp,
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "workload": args.workload or f"synthetic mix {args.mix} (seed {args.seed}, {len(workload)} requests)",
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "elapsed_s": elapsed,
+            "llm_latency_ms": args.llm_latency_ms,
+            "backend_env": backend_env,
+        },
+        "requests": requests,
+        "overall": summarize(all_latencies, elapsed),
+        "train_jobs": train,
+        "memory": {
+            "idle_rss_mb": idle_rss_kb / 1024.0,
+            "peak_rss_mb": max(rss_samples, default=0) / 1024.0,
+            "backend_peak_rss_mb": backend_hwm_kb / 1024.0,
+        },
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"suite-{commit or 'nogit'}-{timestamp}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{len(workload)} workload requests, {args.concurrency} clients, {elapsed:.1f}s")
+    print(f"{'type':<8} {'ok':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'429':>6} {'errors':>7}")
+    for name, row in list(requests.items()) + [("overall", report["overall"])]:
+        print(f"{name:<8} {row['ok']:>7} {row['throughput_per_s']:>9.1f} {row.get('p50_ms', 0):>9.1f} "
+              f"{row.get('p95_ms', 0):>9.1f} {row.get('p99_ms', 0):>9.1f} "
+              f"{row.get('rejected', ''):>6} {row.get('errors', ''):>7}")
+        if row.get("first_error"):
+            print(f"         first error: {row['first_error']}")
+    for job in train:
+        duration = f"{job['duration_s']:.1f}s" if job["duration_s"] is not None else "n/a"
+        print(f"train    HTTP {job['status_code']} in {job['submit_ms']:.0f}ms, job {job['status']} after {duration}")
+    memory = report["memory"]
+    print(f"RSS: idle {memory['idle_rss_mb']:.0f} MB, peak {memory['peak_rss_mb']:.0f} MB with training workers, "
+          f"backend peak {memory['backend_peak_rss_mb']:.0f} MB")
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressed = compare(report, json.load(f), args.threshold)
+        if regressed:
+            print(f"Regressed by more than {args.threshold:g}%: {', '.join(regressed)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
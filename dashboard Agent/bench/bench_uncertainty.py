@@ -0,0 +1,86 @@
+"""
+Cost of per-tree quantiles next to a plain forest predict.
+
+For each engine and batch size it times ``model.predict`` against
+``ml.uncertainty.predict_distribution`` (mean, std and the quantiles from the
+same traversal) and reports the peak NumPy allocation of both, next to
+materializing the full (n_trees, n_rows) matrix with ``predict_per_tree``.
+It also checks that the streamed quantiles match that matrix.
+
+Usage:
+    python bench/bench_uncertainty.py [--models-dir models] [--sizes 1 32 1000 100000] [--quantiles 0.05,0.5,0.95]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from ml.compiled_forest import compile_model
+from ml.registry import load_bundle
+from ml.uncertainty import parse_quantiles, predict_distribution
+
+
+def best_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000.0
+
+
+def peak_mb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--models-dir', default=os.path.join(os.path.dirname(__file__), '..', 'models'))
+    parser.add_argument('--version', default=None, help="Version to load (default: the active one)")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 32, 1000, 100000])
+    parser.add_argument('--quantiles', default="0.05,0.5,0.95")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    bundle = load_bundle(args.models_dir, args.version)
+    if bundle is None:
+        sys.exit("No saved model found; train one first")
+    quantiles = parse_quantiles(args.quantiles)
+    compiled = compile_model(bundle.model)
+    engines = {'sklearn': bundle.model, 'compiled': compiled}
+
+    rng = np.random.RandomState(0)
+    print(f"Model version {bundle.version}: {compiled.n_trees} trees, quantiles {args.quantiles}")
+    print(f"{'engine':<9} {'rows':>7} {'predict ms':>11} {'spread ms':>10} {'overhead':>9} "
+          f"{'spread MB':>10} {'per-tree MB':>12}")
+    for size in args.sizes:
+        # Standardized features, as the serving preprocessor produces them
+        X = rng.normal(size=(size, compiled.n_features))
+        # Streaming must give exactly what the full per-tree matrix gives
+        full = compiled.predict_per_tree(X[:2000])
+        check = predict_distribution(compiled, X[:2000], quantiles, max_cells=compiled.n_trees * 97)
+        assert np.allclose(check['quantiles'], np.quantile(full, quantiles, axis=0))
+        assert np.allclose(check['std'], full.std(axis=0))
+
+        for name, model in engines.items():
+            repeat = args.repeat if size < 10000 else max(1, args.repeat // 2)
+            predict_ms = best_ms(lambda: model.predict(X), repeat)
+            spread_ms = best_ms(lambda: predict_distribution(model, X, quantiles), repeat)
+            spread_mb = peak_mb(lambda: predict_distribution(model, X, quantiles))
+            per_tree_mb = peak_mb(lambda: compiled.predict_per_tree(X)) if name == 'compiled' else float('nan')
+            print(f"{name:<9} {size:>7} {predict_ms:>11.2f} {spread_ms:>10.2f} "
+                  f"{(spread_ms / predict_ms - 1) * 100:>8.0f}% {spread_mb:>10.1f} {per_tree_mb:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Scripted chat model for exercising the agent without OpenAI.
+
+``FakeStreamingChatModel`` replays a list of AIMessages (optionally with an
+OpenAI ``function_call``) and reports each word of the content to the
+callbacks as a streamed token, like ``ChatOpenAI(streaming=True)``::
+
+    from agent.agent import create_agent
+    llm = FakeStreamingChatModel(responses=[
+        function_call("predict_housing_price", MedInc=5.0),
+        AIMessage(content="That house would cost about $250,000."),
+    ])
+    agent_executor = create_agent(llm=llm)
+"""
+import asyncio
+import json
+import re
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+def function_call(name, **arguments):
+    """Build an AIMessage asking the agent to call tool ``name``."""
+    return AIMessage(content="", additional_kwargs={
+        "function_call": {"name": name, "arguments": json.dumps(arguments)}
+    })
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """Chat model that cycles through scripted responses, streaming word tokens."""
+
+    responses: List[BaseMessage]
+    token_delay: Optional[float] = None
+    i: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming-chat-model"
+
+    def _next_response(self):
+        response = self.responses[self.i]
+        self.i = (self.i + 1) % len(self.responses)
+        return response
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        response = self._next_response()
+        for token in re.findall(r"\S+\s*", response.content):
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            if run_manager is not None:
+                run_manager.on_llm_new_token(token)
+        return ChatResult(generations=[ChatGeneration(message=response)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        response = self._next_response()
+        for token in re.findall(r"\S+\s*", response.content):
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            if run_manager is not None:
+                await run_manager.on_llm_new_token(token)
+        return ChatResult(generations=[ChatGeneration(message=response)])
@@ -0,0 +1,107 @@
+"""
+Minimal OpenAI-compatible chat completions server for load tests.
+
+Answers ``POST /v1/chat/completions`` (streaming and non-streaming) after a
+configurable delay. When the request offers functions and no function result
+is in the conversation yet, it asks for ``predict_housing_price`` with a
+random median income; otherwise it returns a short text answer that quotes
+the last function result. Point the backend at it with::
+
+    OPENAI_BASE_URL=http://127.0.0.1:8100/v1 OPENAI_API_KEY=stub python backend/main.py
+
+Usage:
+    python bench/stub_llm_server.py [--port 8100] [--latency-ms 300] [--token-ms 10]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+app = FastAPI(title="Stub LLM")
+settings = {"latency_ms": 300.0, "token_ms": 10.0}
+
+
+def plan_reply(body):
+    """Return ('function_call', {...}) or ('content', text) for a request body."""
+    messages = body.get("messages", [])
+    function_results = [m for m in messages if m.get("role") == "function"]
+    if body.get("functions") and not function_results:
+        arguments = {"MedInc": round(random.uniform(1.0, 10.0), 2), "HouseAge": 25.0}
+        return "function_call", {"name": "predict_housing_price", "arguments": json.dumps(arguments)}
+    if function_results:
+        return "content", f"Here is what the model says: {function_results[-1].get('content', '')}"
+    return "content", "I can estimate California housing prices from a few property features."
+
+
+def completion(body, kind, payload):
+    message = {"role": "assistant", "content": payload if kind == "content" else None}
+    if kind == "function_call":
+        message["function_call"] = payload
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "message": message,
+                     "finish_reason": "function_call" if kind == "function_call" else "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def chunk(body, completion_id, delta, finish_reason=None):
+    data = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(data)}\n\n"
+
+
+async def stream_completion(body, kind, payload):
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    yield chunk(body, completion_id, {"role": "assistant", "content": "" if kind == "content" else None})
+    if kind == "function_call":
+        yield chunk(body, completion_id, {"function_call": {"name": payload["name"], "arguments": ""}})
+        yield chunk(body, completion_id, {"function_call": {"arguments": payload["arguments"]}})
+        yield chunk(body, completion_id, {}, "function_call")
+    else:
+        for word in payload.split(" "):
+            await asyncio.sleep(settings["token_ms"] / 1000.0)
+            yield chunk(body, completion_id, {"content": word + " "})
+        yield chunk(body, completion_id, {}, "stop")
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    await asyncio.sleep(settings["latency_ms"] / 1000.0)
+    kind, payload = plan_reply(body)
+    if body.get("stream"):
+        return StreamingResponse(stream_completion(body, kind, payload), media_type="text/event-stream")
+    return completion(body, kind, payload)
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8100)
+    parser.add_argument('--latency-ms', type=float, default=300.0, help="Delay before each response")
+    parser.add_argument('--token-ms', type=float, default=10.0, help="Delay between streamed words")
+    args = parser.parse_args()
+
+    settings.update(latency_ms=args.latency_ms, token_ms=args.token_ms)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == '__main__':
+    main()
@@ -10,14 +10,14 @@ function Chatbot({ onPrediction }) {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   const messagesEndRef = useRef(null);
-  const messagesRef = useRef(messages);
+  // Conversation history lives on the server; only the new message is sent
+  const sessionIdRef = useRef(null);
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
   };
 
   useEffect(() => {
-    messagesRef.current = messages;
     scrollToBottom();
   }, [messages]);
 
@@ -81,6 +81,81 @@ function Chatbot({ onPrediction }) {
     return <span>{message.content}</span>;
   };
 
+  const parseSseEvent = (rawEvent) => {
+    let event = 'message';
+    const dataLines = [];
+    rawEvent.split('\n').forEach((line) => {
+      if (line.startsWith('event:')) {
+        event = line.slice(6).trim();
+      } else if (line.startsWith('data:')) {
+        dataLines.push(line.slice(5).trim());
+      }
+    });
+    if (dataLines.length === 0) return null;
+    return { event, data: JSON.parse(dataLines.join('\n')) };
+  };
+
+  const appendToken = (text) => {
+    setMessages(prev => {
+      const last = prev[prev.length - 1];
+      if (last && last.role === 'assistant' && last.streaming) {
+        return [...prev.slice(0, -1), { ...last, content: last.content + text }];
+      }
+      return [...prev, { role: 'assistant', content: text, streaming: true }];
+    });
+  };
+
+  const startTool = ({ tool, tool_input: toolInput }) => {
+    const toolMeta = formatToolOutput({ tool, tool_input: toolInput, output: 'Running...' });
+    setMessages(prev => [
+      ...prev.map(message => (message.streaming ? { ...message, streaming: false } : message)),
+      { role: 'tool', content: `Tool ${tool} running.`, toolMeta, pending: true }
+    ]);
+  };
+
+  const finishTool = ({ tool, output }) => {
+    setMessages(prev => {
+      const index = prev.map(message => message.role === 'tool' && message.pending && message.toolMeta.tool === tool)
+        .lastIndexOf(true);
+      if (index === -1) return prev;
+      const next = [...prev];
+      next[index] = {
+        ...next[index],
+        content: `Tool ${tool} executed.`,
+        toolMeta: { ...next[index].toolMeta, output },
+        pending: false
+      };
+      return next;
+    });
+  };
+
+  const finishReply = ({ reply, session_id: sessionId }) => {
+    if (sessionId) sessionIdRef.current = sessionId;
+    setMessages(prev => {
+      const last = prev[prev.length - 1];
+      const content = reply || "I'm not sure how to respond to that.";
+      if (last && last.role === 'assistant' && last.streaming) {
+        return [...prev.slice(0, -1), { role: 'assistant', content }];
+      }
+      return [...prev, { role: 'assistant', content }];
+    });
+  };
+
+  const handleStreamEvent = ({ event, data }) => {
+    if (event === 'token') {
+      appendToken(data.text);
+    } else if (event === 'tool_start') {
+      startTool(data);
+    } else if (event === 'tool_output') {
+      finishTool(data);
+    } else if (event === 'done') {
+      finishReply(data);
+      handleToolSideEffects(data.tool_outputs);
+    } else if (event === 'error') {
+      throw new Error(data.detail || 'Chat request failed');
+    }
+  };
+
   const handleSubmit = async (e) => {
     e.preventDefault();
     if (!input.trim() || loading) return;
@@ -92,11 +167,10 @@ function Chatbot({ onPrediction }) {
     setError(null);
 
     try {
-      const conversation = [...messagesRef.current, { role: 'user', content: userMessage }];
-      const response = await fetch('http://localhost:8000/chat', {
+      const response = await fetch('http://localhost:8000/chat/stream', {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ messages: conversation })
+        headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+        body: JSON.stringify({ message: userMessage, session_id: sessionIdRef.current })
       });
 
       if (!response.ok) {
@@ -104,41 +178,38 @@ function Chatbot({ onPrediction }) {
         throw new Error(errorData.detail || 'Chat request failed');
       }
 
-      const data = await response.json();
-      const assistantMessage = data.reply || "I'm not sure how to respond to that.";
-
-      setMessages(prev => {
-        let next = [...prev, { role: 'assistant', content: assistantMessage }];
-
-        if (Array.isArray(data.tool_outputs) && data.tool_outputs.length > 0) {
-          data.tool_outputs.forEach((toolOutput) => {
-            const toolMeta = formatToolOutput(toolOutput);
-            next = [
-              ...next,
-              {
-                role: 'tool',
-                content: `Tool ${toolMeta.tool} executed.`,
-                toolMeta,
-              }
-            ];
-          });
-        }
-
-        return next;
-      });
-
-      handleToolSideEffects(data.tool_outputs);
+      // Render tool calls and tokens as the server sends them
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const rawEvents = buffer.split('\n\n');
+        buffer = rawEvents.pop();
+        rawEvents.forEach((rawEvent) => {
+          const parsed = parseSseEvent(rawEvent);
+          if (parsed) handleStreamEvent(parsed);
+        });
+      }
     } catch (error) {
       setError(error.message);
-      setMessages(prev => [...prev, { 
-        role: 'assistant', 
-        content: 'Sorry, I encountered an error. Please make sure the backend server is running and the agent is configured.' 
-      }]);
+      setMessages(prev => [
+        ...prev.map(message => (message.streaming ? { ...message, streaming: false } : message)),
+        {
+          role: 'assistant',
+          content: 'Sorry, I encountered an error. Please make sure the backend server is running and the agent is configured.'
+        }
+      ]);
     } finally {
       setLoading(false);
     }
   };
 
+  const lastMessage = messages[messages.length - 1];
+  const showTyping = loading && !(lastMessage && lastMessage.streaming);
+
   return (
     <div className="chatbot-container">
       <div className="chatbot-card">
@@ -160,7 +231,7 @@ function Chatbot({ onPrediction }) {
               </div>
             </div>
           ))}
-          {loading && (
+          {showTyping && (
             <div className="message assistant">
               <div className="message-icon">
                 <Bot size={20} />
@@ -7,6 +7,7 @@ function FileUpload({ onModelRetrained }) {
   const [uploading, setUploading] = useState(false);
   const [result, setResult] = useState(null);
   const [error, setError] = useState(null);
+  const [jobStage, setJobStage] = useState(null);
 
   const handleFileChange = (e) => {
     const selectedFile = e.target.files[0];
@@ -20,6 +21,26 @@ function FileUpload({ onModelRetrained }) {
     }
   };
 
+  const waitForJob = async (job) => {
+    let current = job;
+    while (!['succeeded', 'failed', 'cancelled'].includes(current.status)) {
+      setJobStage(`${current.stage} (${Math.round(current.progress * 100)}%)`);
+      await new Promise(resolve => setTimeout(resolve, 1000));
+
+      const response = await fetch(`http://localhost:8000/jobs/${current.id}`);
+      if (!response.ok) {
+        throw new Error('Job status request failed');
+      }
+      current = await response.json();
+    }
+    setJobStage(null);
+
+    if (current.status !== 'succeeded') {
+      throw new Error(current.error || `Training job ${current.status}`);
+    }
+    return current.result;
+  };
+
   const handleUpload = async () => {
     if (!file) return;
 
@@ -40,7 +61,7 @@ function FileUpload({ onModelRetrained }) {
         throw new Error('Upload failed');
       }
 
-      const data = await response.json();
+      const data = await waitForJob(await response.json());
       setResult(data);
       if (onModelRetrained) {
         onModelRetrained();
@@ -49,6 +70,7 @@ function FileUpload({ onModelRetrained }) {
       setError('Failed to upload and retrain model. Make sure the backend is running and the CSV has a "target" column.');
     } finally {
       setUploading(false);
+      setJobStage(null);
     }
   };
 
@@ -66,7 +88,7 @@ function FileUpload({ onModelRetrained }) {
         throw new Error('Training failed');
       }
 
-      const data = await response.json();
+      const data = await waitForJob(await response.json());
       setResult(data);
       if (onModelRetrained) {
         onModelRetrained();
@@ -75,6 +97,7 @@ function FileUpload({ onModelRetrained }) {
       setError('Failed to train model. Make sure the backend is running and the California dataset exists.');
     } finally {
       setUploading(false);
+      setJobStage(null);
     }
   };
 
@@ -149,6 +172,13 @@ function FileUpload({ onModelRetrained }) {
           )}
         </div>
 
+        {jobStage && (
+          <div className="alert">
+            <Loader className="spin" size={20} />
+            <span>Training in background: {jobStage}</span>
+          </div>
+        )}
+
         {error && (
           <div className="alert error">
             <AlertCircle size={20} />
@@ -0,0 +1,166 @@
+import numpy as np
+
+TREE_LEAF = -1
+ARRAY_NAMES = ('feature', 'threshold', 'left', 'right', 'value', 'roots', 'children')
+
+
+class CompiledForest:
+    """
+    Flat-array evaluator for sklearn regression tree ensembles.
+
+    All trees are packed into shared ``feature``, ``threshold``, ``left``,
+    ``right`` and ``value`` arrays (child indices are global), and a batch is
+    evaluated level by level: every (tree, row) pair that has not reached a
+    leaf advances one node per step with vectorized NumPy gathers. Trees are
+    processed in blocks of about ``block_size`` (tree, row) pairs so the node
+    arrays being walked stay cache resident.
+
+    Args:
+        feature: Split feature per node (negative for leaves)
+        threshold: Split threshold per node
+        left: Global index of the left child, or -1 for leaves
+        right: Global index of the right child, or -1 for leaves
+        value: Leaf (and node) prediction values
+        roots: Global index of each tree's root node
+        n_features: Number of input features
+        block_size: Target number of (tree, row) pairs walked at once
+        children: Precomputed interleaved child array (built from left/right if omitted)
+
+    Arrays already in the right dtype are used as-is, so read-only memory
+    maps from ``ml.model_file.load_model_file`` are shared instead of copied.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, n_features, block_size=16384,
+                 children=None):
+        self.feature = np.ascontiguousarray(feature, dtype=np.intp)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.left = np.ascontiguousarray(left, dtype=np.intp)
+        self.right = np.ascontiguousarray(right, dtype=np.intp)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.intp)
+        self.n_features = int(n_features)
+        self.n_features_in_ = self.n_features
+        self.block_size = int(block_size)
+
+        # Interleave children so one gather at 2 * node + go_right picks the next node
+        if children is None:
+            children = np.empty(2 * len(self.left), dtype=np.intp)
+            children[0::2] = self.left
+            children[1::2] = self.right
+        self._children = np.ascontiguousarray(children, dtype=np.intp)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def node_count(self):
+        return len(self.feature)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Export a fitted forest (or single tree) regressor into packed arrays."""
+        estimators = getattr(model, 'estimators_', None)
+        if estimators is None:
+            estimators = [model]
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            if tree.n_outputs != 1:
+                raise ValueError("CompiledForest only supports single-output regressors")
+
+            is_leaf = tree.children_left == TREE_LEAF
+            features.append(np.where(is_leaf, -2, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(is_leaf, TREE_LEAF, tree.children_left + offset))
+            rights.append(np.where(is_leaf, TREE_LEAF, tree.children_right + offset))
+            values.append(tree.value[:, 0, 0])
+            roots.append(offset)
+            offset += tree.node_count
+
+        return cls(
+            np.concatenate(features),
+            np.concatenate(thresholds),
+            np.concatenate(lefts),
+            np.concatenate(rights),
+            np.concatenate(values),
+            np.array(roots),
+            model.n_features_in_,
+        )
+
+    def _leaves(self, X, roots):
+        n_rows = X.shape[0]
+        flat_X = X.ravel()
+        rows = np.tile(np.arange(n_rows, dtype=np.intp) * self.n_features, len(roots))
+        nodes = np.repeat(roots, n_rows)
+        leaves = nodes.copy()
+        positions = np.flatnonzero(self.feature[nodes] >= 0)
+        nodes = nodes[positions]
+        rows = rows[positions]
+
+        while positions.size:
+            go_right = flat_X[rows + self.feature[nodes]] > self.threshold[nodes]
+            nodes = self._children[2 * nodes + go_right]
+            internal = self.feature[nodes] >= 0
+            finished = ~internal
+            leaves[positions[finished]] = nodes[finished]
+            positions = positions[internal]
+            nodes = nodes[internal]
+            rows = rows[internal]
+
+        return leaves.reshape(len(roots), n_rows)
+
+    def iter_tree_blocks(self, X):
+        """
+        Yield ``(tree_slice, row_slice, values)`` blocks of per-tree predictions.
+
+        ``values`` has shape (n_trees_in_block, n_rows_in_block). Consumers can
+        reduce blocks as they arrive to keep memory bounded for large batches.
+        """
+        # sklearn compares float32 inputs against float64 thresholds; match it exactly
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected input with {self.n_features} features, got shape {X.shape}")
+
+        rows_per_block = max(1, self.block_size)
+        for row_start in range(0, X.shape[0], rows_per_block):
+            row_slice = slice(row_start, min(row_start + rows_per_block, X.shape[0]))
+            X_block = X[row_slice]
+            trees_per_block = max(1, self.block_size // X_block.shape[0])
+            for tree_start in range(0, self.n_trees, trees_per_block):
+                tree_slice = slice(tree_start, min(tree_start + trees_per_block, self.n_trees))
+                leaves = self._leaves(X_block, self.roots[tree_slice])
+                yield tree_slice, row_slice, self.value[leaves]
+
+    def predict_per_tree(self, X):
+        """
+        Evaluate every tree on ``X``.
+
+        Args:
+            X: Array of shape (n_rows, n_features)
+
+        Returns:
+            Array of shape (n_trees, n_rows) with each tree's prediction
+        """
+        out = np.empty((self.n_trees, len(X)), dtype=np.float64)
+        for tree_slice, row_slice, values in self.iter_tree_blocks(X):
+            out[tree_slice, row_slice] = values
+        return out
+
+    def predict(self, X):
+        """Predict the ensemble mean, matching ``model.predict``."""
+        total = np.zeros(len(X), dtype=np.float64)
+        for _, row_slice, values in self.iter_tree_blocks(X):
+            total[row_slice] += values.sum(axis=0)
+        return total / self.n_trees
+
+
+def compile_model(model):
+    """Return a CompiledForest for tree-based regressors, or the model unchanged."""
+    if hasattr(model, 'estimators_') or hasattr(model, 'tree_'):
+        estimators = getattr(model, 'estimators_', [model])
+        if all(hasattr(estimator, 'tree_') for estimator in estimators):
+            return CompiledForest.from_sklearn(model)
+    return model
@@ -0,0 +1,309 @@
+import heapq
+import io
+import time
+
+import joblib
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+from .compiled_forest import TREE_LEAF, CompiledForest
+from .model_search import measure_latency
+
+# Compression candidates tried by default. 'prune' cuts the trained trees
+# (depth, leaves per tree, number of trees); 'distill' fits a small student
+# model to the forest's predictions.
+DEFAULT_CANDIDATES = (
+    {'name': 'depth-8', 'method': 'prune', 'max_depth': 8},
+    {'name': 'depth-12', 'method': 'prune', 'max_depth': 12},
+    {'name': 'depth-16', 'method': 'prune', 'max_depth': 16},
+    {'name': 'leaves-256', 'method': 'prune', 'max_leaves': 256},
+    {'name': 'leaves-1024', 'method': 'prune', 'max_leaves': 1024},
+    {'name': 'trees-10', 'method': 'prune', 'n_trees': 10},
+    {'name': 'trees-25', 'method': 'prune', 'n_trees': 25},
+    {'name': 'trees-50', 'method': 'prune', 'n_trees': 50},
+    {'name': 'trees-25-leaves-1024', 'method': 'prune', 'n_trees': 25, 'max_leaves': 1024},
+    {'name': 'distill-hgb', 'method': 'distill', 'student': 'hist_gradient_boosting'},
+    {'name': 'distill-linear', 'method': 'distill', 'student': 'linear'},
+)
+PARETO_KEYS = ('rmse', 'artifact_bytes', 'p50_ms')
+
+
+def _tree_estimators(model):
+    estimators = getattr(model, 'estimators_', None)
+    if estimators is None:
+        estimators = [model]
+    if not all(hasattr(estimator, 'tree_') for estimator in estimators):
+        return None
+    return estimators
+
+
+def _expanded_nodes(tree, max_depth=None, max_leaves=None):
+    """
+    Return a mask of the internal nodes that keep their split.
+
+    With ``max_leaves`` nodes are expanded best first by weighted impurity
+    decrease, the order sklearn itself grows ``max_leaf_nodes`` trees in, so
+    the result is the tree sklearn would have grown with that limit.
+    """
+    left, right = tree.children_left, tree.children_right
+    internal = left != TREE_LEAF
+    depth = np.zeros(tree.node_count, dtype=np.intp)
+    frontier = np.array([0])
+    while frontier.size:
+        frontier = frontier[internal[frontier]]
+        children = np.concatenate([left[frontier], right[frontier]])
+        depth[children] = np.concatenate([depth[frontier], depth[frontier]]) + 1
+        frontier = children
+
+    allowed = internal if max_depth is None else internal & (depth < max_depth)
+    if max_leaves is None:
+        return allowed
+
+    weighted = tree.weighted_n_node_samples * tree.impurity
+    gain = np.where(internal, weighted - weighted[left] - weighted[right], 0.0)
+    expanded = np.zeros(tree.node_count, dtype=bool)
+    heap = [(-gain[0], 0)] if allowed[0] else []
+    leaves = 1
+    while heap and leaves < max_leaves:
+        _, node = heapq.heappop(heap)
+        expanded[node] = True
+        leaves += 1
+        for child in (left[node], right[node]):
+            if allowed[child]:
+                heapq.heappush(heap, (-gain[child], child))
+    return expanded
+
+
+def prune_forest(model, max_depth=None, max_leaves=None, n_trees=None):
+    """
+    Cut a trained tree ensemble down without refitting it.
+
+    Internal nodes below the limits become leaves predicting their own node
+    value (the mean target of the training rows that reached them), so a
+    pruned tree predicts exactly what the same tree grown with that limit
+    would. Forest trees are exchangeable, so ``n_trees`` keeps the first ones.
+
+    Args:
+        model: Fitted forest (or single tree) regressor
+        max_depth: Maximum depth of every tree
+        max_leaves: Maximum leaves per tree
+        n_trees: Number of trees kept
+
+    Returns:
+        CompiledForest with the pruned trees
+    """
+    estimators = _tree_estimators(model)
+    if estimators is None:
+        raise ValueError(f"Cannot prune a {type(model).__name__}, only tree ensembles")
+    if n_trees is not None:
+        estimators = estimators[:n_trees]
+
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    for estimator in estimators:
+        tree = estimator.tree_
+        expanded = _expanded_nodes(tree, max_depth, max_leaves)
+
+        kept = np.zeros(tree.node_count, dtype=bool)
+        kept[0] = True
+        frontier = np.array([0])
+        while frontier.size:
+            frontier = frontier[expanded[frontier]]
+            frontier = np.concatenate([tree.children_left[frontier], tree.children_right[frontier]])
+            kept[frontier] = True
+        nodes = np.flatnonzero(kept)
+        index = np.full(tree.node_count, TREE_LEAF, dtype=np.intp)
+        index[nodes] = np.arange(len(nodes)) + offset
+
+        split = expanded[nodes]
+        features.append(np.where(split, tree.feature[nodes], -2))
+        thresholds.append(tree.threshold[nodes])
+        lefts.append(np.where(split, index[tree.children_left[nodes]], TREE_LEAF))
+        rights.append(np.where(split, index[tree.children_right[nodes]], TREE_LEAF))
+        values.append(tree.value[nodes, 0, 0])
+        roots.append(offset)
+        offset += len(nodes)
+
+    return CompiledForest(
+        np.concatenate(features),
+        np.concatenate(thresholds),
+        np.concatenate(lefts),
+        np.concatenate(rights),
+        np.concatenate(values),
+        np.array(roots),
+        model.n_features_in_,
+    )
+
+
+def make_student(student, random_state=42):
+    """Build an unfitted distillation student."""
+    if student == 'hist_gradient_boosting':
+        from sklearn.ensemble import HistGradientBoostingRegressor
+        return HistGradientBoostingRegressor(max_iter=300, max_leaf_nodes=31, learning_rate=0.1,
+                                             random_state=random_state)
+    if student == 'linear':
+        # Per-feature splines plus pairwise products, so a ridge fit can follow
+        # the forest's non-linear effects (location, income) at linear cost
+        from sklearn.linear_model import Ridge
+        from sklearn.pipeline import make_pipeline, make_union
+        from sklearn.preprocessing import PolynomialFeatures, SplineTransformer
+        features = make_union(
+            SplineTransformer(n_knots=12, degree=3),
+            PolynomialFeatures(degree=2, interaction_only=True, include_bias=False),
+        )
+        return make_pipeline(features, Ridge(alpha=1.0))
+    raise ValueError(f"Unknown distillation student: {student}")
+
+
+def distill(teacher, X, student='hist_gradient_boosting', augment=2, noise=0.05, random_state=42):
+    """
+    Fit a small model to reproduce ``teacher``'s predictions.
+
+    The student learns from the teacher's outputs on the training rows plus
+    ``augment`` jittered copies of them (Gaussian noise of ``noise`` standard
+    deviations, the features being standardized), which fills in the space
+    between training points where the forest's smoothing matters most.
+
+    Args:
+        teacher: Fitted model to imitate
+        X: Scaled training features
+        student: 'hist_gradient_boosting' or 'linear' (ridge on spline and
+            interaction features)
+        augment: Number of jittered copies added
+        noise: Jitter scale in standard deviations
+        random_state: Seed for the jitter and the student
+
+    Returns:
+        Fitted student model
+    """
+    rng = np.random.default_rng(random_state)
+    X_fit = np.concatenate([X] + [X + rng.normal(0.0, noise, X.shape) for _ in range(augment)])
+    model = make_student(student, random_state)
+    model.fit(X_fit, teacher.predict(X_fit))
+    return model
+
+
+def build_candidate(model, spec, X_train):
+    """Build the compressed model described by one candidate spec."""
+    options = {key: value for key, value in spec.items() if key not in ('name', 'method')}
+    if spec['method'] == 'prune':
+        return prune_forest(model, **options)
+    if spec['method'] == 'distill':
+        return distill(model, X_train, **options)
+    raise ValueError(f"Unknown compression method: {spec['method']}")
+
+
+def artifact_stats(model):
+    """Return the pickled size of ``model`` in bytes and how long it takes to load."""
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    size = buffer.tell()
+    buffer.seek(0)
+    start = time.perf_counter()
+    joblib.load(buffer)
+    return size, (time.perf_counter() - start) * 1000.0
+
+
+def evaluate_model(model, X_test, y_test, engine='sklearn'):
+    """Accuracy, artifact size and serving latency of one model on the holdout."""
+    y_pred = model.predict(X_test)
+    residual = y_test - y_pred
+    size, load_ms = artifact_stats(model)
+    latency = measure_latency(model, X_test, engine)
+    return {
+        'rmse': float(np.sqrt(np.mean(residual ** 2))),
+        'mae': float(np.mean(np.abs(residual))),
+        'r2': float(1.0 - np.sum(residual ** 2) / np.sum((y_test - np.mean(y_test)) ** 2)),
+        'artifact_bytes': size,
+        'load_ms': load_ms,
+        'p50_ms': latency['p50_ms'],
+        'p99_ms': latency['p99_ms'],
+        'batch_ms': latency['batch_ms'],
+    }
+
+
+def pareto_front(rows, keys=PARETO_KEYS):
+    """Mark each row ``pareto=True`` unless another row is no worse on every key and better on one."""
+    for row in rows:
+        row['pareto'] = not any(
+            all(other[key] <= row[key] for key in keys) and any(other[key] < row[key] for key in keys)
+            for other in rows if other is not row
+        )
+    return rows
+
+
+def compress_model(model, X_train, X_test, y_test, candidates=DEFAULT_CANDIDATES, engine='sklearn',
+                   progress=None):
+    """
+    Build and evaluate compressed variants of a trained model.
+
+    Pruning candidates are skipped for models that are not tree ensembles;
+    distillation works for any teacher.
+
+    Args:
+        model: Trained model to compress
+        X_train: Scaled training features (distillation inputs)
+        X_test, y_test: Holdout the variants are scored on
+        candidates: Candidate specs (default DEFAULT_CANDIDATES)
+        engine: Serving engine the latency is measured with
+        progress: Optional callback ``progress(fraction, stage)``
+
+    Returns:
+        (report, models): report rows (the original model first, named
+        'original') with accuracy, size, latency and ``pareto``, and a dict of
+        the built models by name
+    """
+    candidates = [spec for spec in candidates
+                  if spec['method'] != 'prune' or _tree_estimators(model) is not None]
+    models = {'original': model}
+    rows = [dict(evaluate_model(model, X_test, y_test, engine), name='original', method=None)]
+    for i, spec in enumerate(candidates):
+        if progress is not None:
+            progress(i / len(candidates), f"compressing: {spec['name']}")
+        start = time.perf_counter()
+        compressed = build_candidate(model, spec, X_train)
+        build_seconds = time.perf_counter() - start
+        models[spec['name']] = compressed
+        row = evaluate_model(compressed, X_test, y_test, engine)
+        row.update(name=spec['name'], method=spec['method'], build_seconds=build_seconds)
+        rows.append(row)
+    return pareto_front(rows), models
+
+
+def holdout_split(dataset, scaler, feature_names, holdout=None):
+    """
+    Rebuild the train/holdout split ``train_model`` uses, with the model's own scaler.
+
+    Args:
+        dataset: ColumnarDataset of the base training data
+        scaler: Scaler the model was trained with
+        feature_names: Feature order of the model
+        holdout: (X, y) holdout rows stored with the model version; when
+            given, they replace the base split's test rows, so a model retrained
+            on uploads is scored on the rows its own metrics came from
+
+    Returns:
+        X_train, X_test, y_train, y_test
+    """
+    from .preprocessing import preprocess_arrays
+    X, y, _ = preprocess_arrays(dataset.matrix(list(feature_names)), np.array(dataset['target']),
+                                scaler=scaler, fit_scaler=False)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    if holdout is not None:
+        X_test, y_test, _ = preprocess_arrays(np.array(holdout[0], dtype=np.float64), holdout[1],
+                                              scaler=scaler, fit_scaler=False)
+    return X_train, X_test, y_train, y_test
+
+
+def format_report(rows):
+    """Render report rows as a text table, Pareto-optimal variants marked with '*'."""
+    lines = [f"{'variant':<22} {'rmse':>7} {'r2':>7} {'size MB':>9} {'load ms':>9} {'p50 ms':>8} "
+             f"{'p99 ms':>8} {'1k rows ms':>11}"]
+    for row in rows:
+        marker = '*' if row['pareto'] else ' '
+        lines.append(
+            f"{marker}{row['name']:<21} {row['rmse']:>7.4f} {row['r2']:>7.4f} "
+            f"{row['artifact_bytes'] / 1e6:>9.2f} {row['load_ms']:>9.1f} {row['p50_ms']:>8.3f} "
+            f"{row['p99_ms']:>8.3f} {row['batch_ms']:>11.2f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+
+MANIFEST_FILE = 'manifest.json'
+INDEX_FILE = 'index.json'
+INGEST_CHUNK_ROWS = 1_000_000
+
+
+class ColumnarDataset:
+    """
+    Read-only set of equal-length float64 columns.
+
+    Columns opened from a DatasetStore are ``np.memmap`` views of the on-disk
+    ``.npy`` files, so opening costs no parsing and no copying.
+    """
+
+    def __init__(self, columns, key=None):
+        self.columns = dict(columns)
+        self.key = key
+        lengths = {len(values) for values in self.columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns must have the same length")
+        self.n_rows = lengths.pop() if lengths else 0
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __len__(self):
+        return self.n_rows
+
+    @property
+    def column_names(self):
+        return list(self.columns)
+
+    def matrix(self, names, rows=None):
+        """Stack the given columns (optionally a row subset) into a C-contiguous 2D array."""
+        out = np.empty((self.n_rows if rows is None else len(rows), len(names)), dtype=np.float64)
+        for j, name in enumerate(names):
+            out[:, j] = self.columns[name] if rows is None else self.columns[name][rows]
+        return out
+
+    def append_frame(self, df):
+        """
+        Return an in-memory dataset with the rows of ``df`` appended.
+
+        Columns missing from ``df`` are filled with NaN (imputed at training
+        time).
+
+        Raises:
+            ValueError: If ``df`` has columns the dataset does not
+        """
+        extra = [str(name) for name in df.columns if name not in self.columns]
+        if extra:
+            raise ValueError(f"Uploaded columns not in the base dataset: {', '.join(extra)}")
+
+        def frame_column(name):
+            if name in df.columns:
+                return df[name].to_numpy(dtype=np.float64)
+            return np.full(len(df), np.nan)
+
+        return ColumnarDataset({
+            name: np.concatenate([values, frame_column(name)])
+            for name, values in self.columns.items()
+        })
+
+    def to_frame(self):
+        """Materialize as a pandas DataFrame (copies the data)."""
+        return pd.DataFrame({name: np.asarray(values) for name, values in self.columns.items()})
+
+
+def hash_file(path, block_size=1 << 20):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_npy_from_raw(raw_path, npy_path, n_rows):
+    header = {'descr': np.lib.format.dtype_to_descr(np.dtype(np.float64)),
+              'fortran_order': False, 'shape': (n_rows,)}
+    with open(npy_path, 'wb') as out, open(raw_path, 'rb') as raw:
+        np.lib.format.write_array_header_1_0(out, header)
+        shutil.copyfileobj(raw, out, 1 << 20)
+
+
+class DatasetStore:
+    """
+    Content-addressed store of CSV datasets converted to per-column ``.npy`` files.
+
+    Each CSV is ingested once into ``<root>/<sha256>/`` (one float64 ``.npy``
+    per column plus a manifest) and later opened with ``mmap_mode='r'``. A
+    small index keyed on path, size and mtime avoids re-hashing files that
+    have not changed.
+
+    Args:
+        root: Directory holding the converted datasets
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def _index_path(self):
+        return os.path.join(self.root, INDEX_FILE)
+
+    def _read_index(self):
+        try:
+            with open(self._index_path()) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_index(self, index):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self._index_path()}.{uuid.uuid4().hex}"
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self._index_path())
+
+    def key_for(self, csv_path):
+        """Return the content hash of ``csv_path``, reusing the index when the file is unchanged."""
+        stat = os.stat(csv_path)
+        index_key = os.path.abspath(csv_path)
+        entry = self._read_index().get(index_key)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            if os.path.exists(os.path.join(self.root, entry['key'], MANIFEST_FILE)):
+                return entry['key']
+        return hash_file(csv_path)
+
+    def ingest_csv(self, csv_path, chunk_rows=INGEST_CHUNK_ROWS):
+        """
+        Convert a numeric CSV into the store (no-op if already present).
+
+        The CSV is parsed in chunks and appended to per-column raw files, so
+        memory stays bounded by ``chunk_rows`` regardless of file size.
+
+        Returns:
+            The dataset key (content hash)
+        """
+        stat = os.stat(csv_path)
+        key = self.key_for(csv_path)
+        dataset_dir = os.path.join(self.root, key)
+
+        if not os.path.exists(os.path.join(dataset_dir, MANIFEST_FILE)):
+            os.makedirs(self.root, exist_ok=True)
+            tmp_dir = os.path.join(self.root, f".tmp-{key}-{uuid.uuid4().hex[:8]}")
+            os.makedirs(tmp_dir)
+            raw_files = {}
+            try:
+                columns = None
+                n_rows = 0
+                for chunk in pd.read_csv(csv_path, chunksize=chunk_rows):
+                    if columns is None:
+                        columns = [str(c) for c in chunk.columns]
+                        raw_files = {
+                            name: open(os.path.join(tmp_dir, f"{i}.raw"), 'wb')
+                            for i, name in enumerate(columns)
+                        }
+                    for name in columns:
+                        raw_files[name].write(chunk[name].to_numpy(dtype=np.float64).tobytes())
+                    n_rows += len(chunk)
+                for f in raw_files.values():
+                    f.close()
+
+                for i, name in enumerate(columns or []):
+                    raw_path = os.path.join(tmp_dir, f"{i}.raw")
+                    _write_npy_from_raw(raw_path, os.path.join(tmp_dir, f"{i}.npy"), n_rows)
+                    os.remove(raw_path)
+
+                with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w') as f:
+                    json.dump({'columns': columns or [], 'n_rows': n_rows,
+                               'source': os.path.basename(csv_path)}, f)
+                try:
+                    os.rename(tmp_dir, dataset_dir)
+                except OSError:
+                    # Another process ingested the same content first
+                    shutil.rmtree(tmp_dir, ignore_errors=True)
+            except BaseException:
+                for f in raw_files.values():
+                    f.close()
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                raise
+
+        index = self._read_index()
+        entry = {'key': key, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        if index.get(os.path.abspath(csv_path)) != entry:
+            index[os.path.abspath(csv_path)] = entry
+            self._write_index(index)
+        return key
+
+    def open(self, key):
+        """Memory-map a stored dataset read-only."""
+        dataset_dir = os.path.join(self.root, key)
+        with open(os.path.join(dataset_dir, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        columns = {
+            name: np.load(os.path.join(dataset_dir, f"{i}.npy"), mmap_mode='r')
+            for i, name in enumerate(manifest['columns'])
+        }
+        return ColumnarDataset(columns, key=key)
+
+    def load_csv(self, csv_path):
+        """Ingest ``csv_path`` if needed and return it as a memory-mapped dataset."""
+        return self.open(self.ingest_csv(csv_path))
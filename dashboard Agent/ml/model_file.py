@@ -0,0 +1,283 @@
+"""
+Single-file model artifact format (``model.bundle``).
+
+Layout::
+
+    prefix   8s magic | u32 format version | u32 header CRC32 | u64 header length
+    header   UTF-8 JSON: feature names, metadata, scaler parameters, model
+             description, array table and the data checksum
+    padding  to a multiple of ALIGNMENT
+    data     raw little-endian arrays, each starting on an ALIGNMENT boundary
+
+Tree ensembles are stored as the CompiledForest node arrays, so loading maps
+them straight out of the file instead of unpickling thousands of tree
+objects. Other models (linear, boosting, pipelines) are small and are stored
+as one pickled buffer in the data section.
+
+Convert the existing pickle layout with ``python -m ml.model_file models``.
+"""
+import json
+import mmap
+import os
+import pickle
+import struct
+import sys
+import tempfile
+import zlib
+
+import numpy as np
+
+from .compiled_forest import ARRAY_NAMES, CompiledForest, compile_model
+
+MAGIC = b'HPMODEL\x00'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+BUNDLE_FILE = 'model.bundle'
+_PREFIX = struct.Struct('<8sIIQ')
+
+
+class ModelFileError(ValueError):
+    """Raised for files that are not valid model bundles (bad magic, version or checksum)."""
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _scaler_header(scaler):
+    return {
+        'mean': scaler.mean_.tolist(),
+        'scale': scaler.scale_.tolist(),
+        'var': scaler.var_.tolist(),
+        'n_samples_seen': int(np.max(scaler.n_samples_seen_)),
+        'feature_medians': getattr(scaler, 'feature_medians_', np.zeros(len(scaler.mean_))).tolist(),
+        'feature_names_in': getattr(scaler, 'feature_names_in_', np.array([])).tolist(),
+    }
+
+
+def _scaler_from_header(params):
+    from sklearn.preprocessing import StandardScaler
+    scaler = StandardScaler()
+    scaler.mean_ = np.array(params['mean'], dtype=np.float64)
+    scaler.scale_ = np.array(params['scale'], dtype=np.float64)
+    scaler.var_ = np.array(params['var'], dtype=np.float64)
+    scaler.n_samples_seen_ = params['n_samples_seen']
+    scaler.n_features_in_ = len(scaler.mean_)
+    scaler.feature_medians_ = np.array(params['feature_medians'], dtype=np.float64)
+    if params['feature_names_in']:
+        scaler.feature_names_in_ = np.array(params['feature_names_in'], dtype=object)
+    return scaler
+
+
+def save_model_file(path, model, scaler, feature_names, metadata):
+    """
+    Write model, scaler, feature names and metadata into one bundle file.
+
+    The file is written next to ``path``, read back and checked against its
+    checksum, and only then renamed into place, so readers never see a
+    partial or corrupt file and loads can skip the checksum pass.
+
+    Args:
+        path: Destination file
+        model: Fitted model (tree ensembles are stored as CompiledForest arrays)
+        scaler: Fitted StandardScaler
+        feature_names: Feature order of the model
+        metadata: JSON-serializable metadata (NumPy scalars and arrays are converted)
+    """
+    model = compile_model(model)
+    if isinstance(model, CompiledForest):
+        description = {'kind': 'compiled_forest', 'n_features': model.n_features, 'block_size': model.block_size}
+        arrays = {name: getattr(model, name) for name in ARRAY_NAMES[:-1]}
+        arrays['children'] = model._children
+    else:
+        description = {'kind': 'pickle', 'class': type(model).__name__}
+        arrays = {'model': np.frombuffer(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL), dtype=np.uint8)}
+
+    table = {}
+    checksum = 0
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        dtype = array.dtype.newbyteorder('<') if array.dtype.byteorder == '>' else array.dtype
+        arrays[name] = array.astype(dtype, copy=False)
+        offset = _align(offset)
+        table[name] = {'dtype': dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += array.nbytes
+
+    # Checksum the data section as it will be written, padding included
+    position = 0
+    for name, array in arrays.items():
+        checksum = zlib.crc32(b'\x00' * (table[name]['offset'] - position), checksum)
+        checksum = zlib.crc32(memoryview(array).cast('B'), checksum)
+        position = table[name]['offset'] + array.nbytes
+
+    # A unique name per writer, so concurrent saves never share a temp file
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp',
+                                    dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        # mkstemp creates the file readable by its owner only
+        os.chmod(tmp_path, 0o644)
+        with os.fdopen(fd, 'wb') as f:
+            header = json.dumps({
+                'format_version': FORMAT_VERSION,
+                'feature_names': list(feature_names),
+                'metadata': metadata or {},
+                'scaler': _scaler_header(scaler),
+                'model': description,
+                'arrays': table,
+                'data_length': offset,
+                'checksum': {'algorithm': 'crc32', 'value': checksum},
+            }, default=_json_default).encode('utf-8')
+            f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, zlib.crc32(header), len(header)))
+            f.write(header)
+            f.write(b'\x00' * (_align(_PREFIX.size + len(header)) - _PREFIX.size - len(header)))
+
+            position = 0
+            for name, array in arrays.items():
+                f.write(b'\x00' * (table[name]['offset'] - position))
+                f.write(memoryview(array).cast('B'))
+                position = table[name]['offset'] + array.nbytes
+            f.flush()
+            os.fsync(f.fileno())
+        verify_model_file(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def read_header(f):
+    """Read and validate the prefix and JSON header of an open bundle file; returns (header, data_offset)."""
+    prefix = f.read(_PREFIX.size)
+    if len(prefix) < _PREFIX.size:
+        raise ModelFileError("File too short for a model bundle")
+    magic, format_version, header_crc, header_length = _PREFIX.unpack(prefix)
+    if magic != MAGIC:
+        raise ModelFileError("Not a model bundle (bad magic)")
+    if format_version > FORMAT_VERSION:
+        raise ModelFileError(f"Model bundle format {format_version} is newer than supported ({FORMAT_VERSION})")
+    header = f.read(header_length)
+    if len(header) < header_length or zlib.crc32(header) != header_crc:
+        raise ModelFileError("Model bundle header is corrupt (checksum mismatch)")
+    return json.loads(header), _align(_PREFIX.size + header_length)
+
+
+def verify_model_file(path, chunk_size=1 << 22):
+    """
+    Check a bundle's header and data section against their CRC32s.
+
+    Reads the file sequentially in ``chunk_size`` pieces, so it does not
+    need memory for the whole data section.
+
+    Raises:
+        ModelFileError: If the file is not a valid bundle or fails the checksum
+    """
+    with open(path, 'rb') as f:
+        header, data_offset = read_header(f)
+        f.seek(data_offset)
+        remaining = header['data_length']
+        checksum = 0
+        while remaining:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                raise ModelFileError("Model bundle is truncated")
+            checksum = zlib.crc32(chunk, checksum)
+            remaining -= len(chunk)
+    if checksum != header['checksum']['value']:
+        raise ModelFileError("Model bundle data is corrupt (checksum mismatch)")
+
+
+def load_model_file(path, mmap_mode='r', verify=False):
+    """
+    Load a bundle written by ``save_model_file``.
+
+    With ``mmap_mode='r'`` the arrays are read-only views of a memory map of
+    the file: loading costs a header parse regardless of the model size, and
+    every process serving the file shares its pages. ``mmap_mode=None`` reads
+    the file into process memory instead.
+
+    The header checksum and the file length are always checked. The data
+    checksum was verified when the file was written; ``verify=True`` checks
+    it again, which reads every page of the file.
+
+    Args:
+        path: Bundle file
+        mmap_mode: 'r' to memory-map the data, None to read it
+        verify: Check the data section against its CRC32 again (one sequential pass)
+
+    Returns:
+        model, scaler, feature_names, metadata
+
+    Raises:
+        ModelFileError: If the file is not a valid bundle or fails the checksum
+    """
+    with open(path, 'rb') as f:
+        header, data_offset = read_header(f)
+        data_length = header['data_length']
+        if os.fstat(f.fileno()).st_size < data_offset + data_length:
+            raise ModelFileError("Model bundle is truncated")
+        if mmap_mode is None:
+            f.seek(data_offset)
+            data = bytearray(data_length)
+            f.readinto(data)
+        elif data_length:
+            data = mmap.mmap(f.fileno(), data_offset + data_length, access=mmap.ACCESS_READ)
+            data = memoryview(data)[data_offset:]
+        else:
+            data = bytearray()
+
+    if verify and zlib.crc32(data) != header['checksum']['value']:
+        raise ModelFileError("Model bundle data is corrupt (checksum mismatch)")
+
+    arrays = {}
+    for name, entry in header['arrays'].items():
+        dtype = np.dtype(entry['dtype'])
+        count = int(np.prod(entry['shape'], dtype=np.int64))
+        arrays[name] = np.frombuffer(data, dtype=dtype, count=count, offset=entry['offset']).reshape(entry['shape'])
+
+    description = header['model']
+    if description['kind'] == 'compiled_forest':
+        model = CompiledForest(n_features=description['n_features'], block_size=description['block_size'],
+                               **arrays)
+    elif description['kind'] == 'pickle':
+        model = pickle.loads(arrays['model'])
+    else:
+        raise ModelFileError(f"Unknown model kind in bundle: {description['kind']}")
+
+    return model, _scaler_from_header(header['scaler']), header['feature_names'], header['metadata']
+
+
+def convert_artifacts(models_dir):
+    """
+    Write ``model.bundle`` for a directory in the four-pickle layout.
+
+    Returns:
+        Path of the bundle, or None if the directory has no model
+    """
+    from .preprocessing import load_model_artifacts
+    model, scaler, feature_names, metadata = load_model_artifacts(models_dir)
+    if model is None:
+        return None
+    path = os.path.join(models_dir, BUNDLE_FILE)
+    save_model_file(path, model, scaler, feature_names, metadata)
+    return path
+
+
+def convert_models_dir(models_dir='models'):
+    """Convert the flat legacy layout and every published version under ``models_dir``; returns the bundle paths."""
+    from .registry import VERSIONS_DIR, list_versions
+    directories = [models_dir] + [os.path.join(models_dir, VERSIONS_DIR, v) for v in list_versions(models_dir)]
+    return [path for path in map(convert_artifacts, directories) if path is not None]
+
+
+if __name__ == '__main__':
+    for written in convert_models_dir(sys.argv[1] if len(sys.argv) > 1 else 'models'):
+        print(f"Wrote {written} ({os.path.getsize(written) / 1e6:.1f} MB)")
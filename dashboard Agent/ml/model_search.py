@@ -0,0 +1,217 @@
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+import numpy as np
+from sklearn.model_selection import KFold, ParameterGrid
+
+# Hyperparameter grids per model family, expanded with ParameterGrid
+SEARCH_SPACE = {
+    'random_forest': {'n_estimators': [50, 100], 'max_depth': [None, 14], 'min_samples_leaf': [1, 4]},
+    'extra_trees': {'n_estimators': [50, 100], 'max_depth': [None, 14], 'min_samples_leaf': [1, 4]},
+    'hist_gradient_boosting': {'learning_rate': [0.05, 0.1], 'max_iter': [200, 400], 'max_leaf_nodes': [31, 63]},
+    'linear': {'alpha': [0.1, 1.0, 10.0]},
+}
+DEFAULT_LATENCY_BUDGET_MS = 20.0
+LATENCY_SAMPLES = 200
+
+_X = None
+_y = None
+
+
+def make_estimator(family, params, n_jobs=1, random_state=42):
+    """Build an unfitted estimator for one search configuration."""
+    if family == 'random_forest':
+        from sklearn.ensemble import RandomForestRegressor
+        return RandomForestRegressor(random_state=random_state, n_jobs=n_jobs, **params)
+    if family == 'extra_trees':
+        from sklearn.ensemble import ExtraTreesRegressor
+        return ExtraTreesRegressor(random_state=random_state, n_jobs=n_jobs, **params)
+    if family == 'hist_gradient_boosting':
+        from sklearn.ensemble import HistGradientBoostingRegressor
+        return HistGradientBoostingRegressor(random_state=random_state, **params)
+    if family == 'linear':
+        from sklearn.linear_model import Ridge
+        return Ridge(**params)
+    raise ValueError(f"Unknown model family: {family}")
+
+
+def measure_latency(model, X, engine='sklearn', samples=LATENCY_SAMPLES, batch_size=1000):
+    """
+    Time single-row and batch predictions the way the backend serves them.
+
+    Args:
+        model: Fitted estimator
+        X: Rows to predict (scaled features)
+        engine: 'sklearn', or 'compiled'/'mmap' to time the CompiledForest engine
+        samples: Number of single-row predictions timed
+        batch_size: Rows in the timed batch prediction
+
+    Returns:
+        Dict with p50_ms and p99_ms for one row and batch_ms for ``batch_size`` rows
+    """
+    if engine in ('compiled', 'mmap'):
+        from .compiled_forest import compile_model
+        model = compile_model(model)
+
+    rows = X[np.arange(samples) % len(X)]
+    timings = np.empty(samples)
+    for i in range(samples):
+        start = time.perf_counter()
+        model.predict(rows[i:i + 1])
+        timings[i] = time.perf_counter() - start
+
+    batch = X[np.arange(batch_size) % len(X)]
+    start = time.perf_counter()
+    model.predict(batch)
+    batch_ms = (time.perf_counter() - start) * 1000.0
+
+    p50, p99 = np.percentile(timings * 1000.0, [50, 99])
+    return {'p50_ms': float(p50), 'p99_ms': float(p99), 'batch_ms': float(batch_ms), 'batch_size': batch_size}
+
+
+def _init_worker(X, y):
+    global _X, _y
+    _X, _y = X, y
+
+
+def _evaluate_fold(family, params, train_idx, test_idx, model_path=None):
+    """
+    Fit one configuration on one fold; runs in a search worker process.
+
+    With ``model_path`` the fitted model is saved there for the parent to
+    time once the round is over.
+    """
+    model = make_estimator(family, params)
+    start = time.perf_counter()
+    model.fit(_X[train_idx], _y[train_idx])
+    fit_seconds = time.perf_counter() - start
+
+    y_pred = model.predict(_X[test_idx])
+    result = {
+        'rmse': float(np.sqrt(np.mean((_y[test_idx] - y_pred) ** 2))),
+        'fit_seconds': fit_seconds,
+    }
+    if model_path is not None:
+        import joblib
+        joblib.dump(model, model_path)
+    return result
+
+
+def search_models(X, y, space=None, folds=3, latency_budget_ms=DEFAULT_LATENCY_BUDGET_MS, max_workers=None,
+                  prune_margin=0.1, engine='sklearn', random_state=42, progress=None):
+    """
+    Cross-validated search over model families and hyperparameter grids.
+
+    Configurations are evaluated fold by fold in rounds, each round in
+    parallel across a process pool. After every round a configuration is
+    dropped when its mean RMSE so far is more than ``prune_margin`` worse than
+    the best one. After the first fold, configurations over the latency budget
+    are dropped too, as long as at least one stays within it. Single-row
+    latency is timed on each configuration's first-fold model, in this
+    process and one model at a time after the round has finished, so the
+    timings do not compete with other fits for CPU.
+
+    Args:
+        X, y: Scaled training features and target (arrays, or a DataFrame and Series)
+        space: Dict of family -> parameter grid (default SEARCH_SPACE)
+        folds: Number of cross-validation folds
+        latency_budget_ms: Maximum single-row p99 prediction latency (None for no budget)
+        max_workers: Search processes (default: CPU count)
+        prune_margin: Relative RMSE gap to the leader at which a configuration is dropped
+        engine: Serving engine the latency is measured with
+        random_state: Seed for the fold split and the models
+        progress: Optional callback ``progress(fraction, stage)``
+
+    Returns:
+        Dict with the chosen family and params, its CV RMSE and latency, and
+        every configuration's results
+    """
+    space = space or SEARCH_SPACE
+    # Workers index rows by position; a pandas target would be looked up by label
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    configs = [
+        {'family': family, 'params': params, 'fold_rmse': [], 'fit_seconds': [], 'latency': None, 'pruned': None}
+        for family, grid in space.items() for params in ParameterGrid(grid)
+    ]
+    splits = list(KFold(n_splits=folds, shuffle=True, random_state=random_state).split(X))
+    start = time.perf_counter()
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), mp_context=context,
+                             initializer=_init_worker, initargs=(X, y)) as pool, \
+            tempfile.TemporaryDirectory(prefix='model-search-') as models_dir:
+        for fold, (train_idx, test_idx) in enumerate(splits):
+            alive = [config for config in configs if config['pruned'] is None]
+            if progress is not None:
+                progress(fold / folds, f"search fold {fold + 1}/{folds}: {len(alive)} configurations")
+            model_paths = [os.path.join(models_dir, f"{i}.joblib") if fold == 0 else None
+                           for i in range(len(alive))]
+            futures = [
+                pool.submit(_evaluate_fold, config['family'], config['params'], train_idx, test_idx, path)
+                for config, path in zip(alive, model_paths)
+            ]
+            for config, future in zip(alive, futures):
+                result = future.result()
+                config['fold_rmse'].append(result['rmse'])
+                config['fit_seconds'].append(result['fit_seconds'])
+
+            if fold == 0:
+                import joblib
+                # Every fit of the round is done, so the pool is idle while the models are timed
+                for config, path in zip(alive, model_paths):
+                    config['latency'] = measure_latency(joblib.load(path), X[test_idx], engine)
+                    os.remove(path)
+
+            if fold == 0 and latency_budget_ms is not None:
+                within = [c for c in alive if c['latency']['p99_ms'] <= latency_budget_ms]
+                if within:
+                    for config in alive:
+                        if config not in within:
+                            config['pruned'] = f"p99 {config['latency']['p99_ms']:.2f}ms over budget"
+                    alive = within
+
+            if fold < folds - 1:
+                best = min(np.mean(c['fold_rmse']) for c in alive)
+                for config in alive:
+                    if np.mean(config['fold_rmse']) > best * (1 + prune_margin):
+                        config['pruned'] = f"rmse {np.mean(config['fold_rmse']):.4f} after {fold + 1} folds"
+
+    finished = [c for c in configs if c['pruned'] is None]
+    for config in configs:
+        config['cv_rmse'] = float(np.mean(config['fold_rmse']))
+    within = [c for c in finished
+              if latency_budget_ms is None or c['latency']['p99_ms'] <= latency_budget_ms]
+    if within:
+        best = min(within, key=lambda c: c['cv_rmse'])
+    else:
+        best = min(finished, key=lambda c: c['latency']['p99_ms'])
+
+    return {
+        'family': best['family'],
+        'params': best['params'],
+        'cv_rmse': best['cv_rmse'],
+        'latency': best['latency'],
+        'latency_budget_ms': latency_budget_ms,
+        'within_budget': bool(within),
+        'engine': engine,
+        'folds': folds,
+        'configurations': len(configs),
+        'pruned': sum(1 for c in configs if c['pruned'] is not None),
+        'search_seconds': time.perf_counter() - start,
+        'results': [
+            {
+                'family': c['family'],
+                'params': c['params'],
+                'cv_rmse': c['cv_rmse'],
+                'folds_run': len(c['fold_rmse']),
+                'mean_fit_seconds': float(np.mean(c['fit_seconds'])),
+                'p99_ms': c['latency']['p99_ms'],
+                'pruned': c['pruned'],
+            }
+            for c in sorted(configs, key=lambda c: c['cv_rmse'])
+        ],
+    }
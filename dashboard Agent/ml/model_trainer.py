@@ -3,27 +3,59 @@ import numpy as np
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
-from .preprocessing import preprocess_data, save_model_artifacts
+from .preprocessing import preprocess_data, preprocess_arrays, save_model_artifacts
+from .dataset_store import ColumnarDataset, DatasetStore
+from .model_search import search_models, make_estimator, measure_latency
+import copy
+import math
 import os
 
-def train_model(df, model_type='random_forest'):
+# Full refit is forced once incremental updates exceed any of these limits
+INCREMENTAL_MAX_ROW_FRACTION = 0.2
+INCREMENTAL_MAX_UPDATES = 10
+INCREMENTAL_MAX_TREE_FACTOR = 2.0
+INCREMENTAL_MAX_NEW_TREES = 20
+
+def train_model(df, model_type='random_forest', search_options=None, progress=None, return_holdout=False):
     """
     Train a housing price prediction model.
     
     Args:
-        df: DataFrame with features and target column
-        model_type: Type of model to train
+        df: DataFrame or ColumnarDataset with features and target column
+        model_type: 'random_forest', 'linear', or 'search' to pick the model
+            family and hyperparameters with ``search_models``
+        search_options: Keyword arguments for ``search_models`` (model_type='search')
+        progress: Optional callback ``progress(fraction, stage)`` for the search
+        return_holdout: Also return the (X, y) holdout rows, unscaled, for
+            ``publish_version`` to store with the model
     
     Returns:
-        model, scaler, metrics, feature_names
+        model, scaler, metrics, feature_names (and holdout with return_holdout)
+    
+    With model_type='search' the cross-validated search runs on the training
+    split, the winner is refit on all of it and ``metrics['search']`` holds
+    the chosen configuration, its latency profile and every candidate's score.
     """
-    X_scaled, y, scaler = preprocess_data(df, fit_scaler=True)
+    feature_names = [col for col in (df.column_names if isinstance(df, ColumnarDataset) else df.columns)
+                     if col != 'target']
+    
+    if isinstance(df, ColumnarDataset):
+        X_scaled, y, scaler = preprocess_arrays(
+            df.matrix(feature_names), np.array(df['target']),
+            fit_scaler=True, feature_names=feature_names
+        )
+    else:
+        X_scaled, y, scaler = preprocess_data(df, fit_scaler=True)
     
     X_train, X_test, y_train, y_test = train_test_split(
         X_scaled, y, test_size=0.2, random_state=42
     )
     
-    if model_type == 'random_forest':
+    search = None
+    if model_type == 'search':
+        search = search_models(X_train, y_train, progress=progress, **(search_options or {}))
+        model = make_estimator(search['family'], search['params'], n_jobs=-1)
+    elif model_type == 'random_forest':
         model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
     else:
         from sklearn.linear_model import LinearRegression
@@ -43,27 +75,190 @@ def train_model(df, model_type='random_forest'):
         'r2': float(r2),
         'training_samples': len(X_train)
     }
+    if search is not None:
+        search['final_latency'] = measure_latency(model, X_test, search['engine'])
+        metrics['search'] = search
     
-    feature_names = [col for col in df.columns if col != 'target']
-    
+    if return_holdout:
+        return model, scaler, metrics, feature_names, (scaler.inverse_transform(X_test), np.asarray(y_test))
     return model, scaler, metrics, feature_names
 
 
-def retrain_with_user_data(user_df, base_data_path='data/california_housing.csv'):
+def load_base_dataset(base_data_path):
+    """
+    Load the base CSV as a memory-mapped ColumnarDataset.
+    
+    The CSV is converted once into the DatasetStore under ``.cache/datasets``
+    next to it; later loads only map the per-column ``.npy`` files.
+    """
+    store = DatasetStore(os.path.join(os.path.dirname(base_data_path), '.cache', 'datasets'))
+    return store.load_csv(base_data_path)
+
+
+def features_match(user_df, feature_names):
+    """Whether an upload has exactly the model's feature columns (plus 'target')."""
+    return sorted(col for col in user_df.columns if col != 'target') == sorted(feature_names)
+
+
+def choose_retrain_mode(user_df, model, feature_names, metadata):
+    """
+    Decide whether new data can be added incrementally or needs a full refit.
+    
+    Returns:
+        (mode, reason) where mode is 'incremental' or 'full'
+    """
+    if not isinstance(model, RandomForestRegressor):
+        return 'full', 'current model does not support adding trees'
+    
+    if not features_match(user_df, feature_names):
+        return 'full', 'uploaded columns differ from the model features'
+    
+    state = (metadata or {}).get('metrics', {}).get('incremental', {})
+    base_rows = state.get('base_rows', (metadata or {}).get('training_samples', 0))
+    pending_rows = state.get('rows', 0) + len(user_df)
+    base_estimators = state.get('base_estimators', model.n_estimators)
+    
+    if not base_rows or pending_rows > INCREMENTAL_MAX_ROW_FRACTION * base_rows:
+        return 'full', f'incremental rows exceed {INCREMENTAL_MAX_ROW_FRACTION:.0%} of the base training set'
+    if state.get('updates', 0) + 1 > INCREMENTAL_MAX_UPDATES:
+        return 'full', f'more than {INCREMENTAL_MAX_UPDATES} incremental updates since the last full fit'
+    if model.n_estimators >= INCREMENTAL_MAX_TREE_FACTOR * base_estimators:
+        return 'full', 'forest has grown past its tree budget'
+    
+    return 'incremental', 'small upload on a compatible forest'
+
+
+def retrain_incremental(user_df, model, scaler, feature_names, metadata=None, base_data_path=None,
+                        holdout=None, return_holdout=False):
+    """
+    Add trees fitted on new data to an existing RandomForest (``warm_start``).
+    
+    The scaler is kept as is so the existing trees stay valid. The number of
+    new trees is proportional to the new data's share of all training rows, so
+    the upload gets roughly its fair weight in the ensemble average.
+    
+    Args:
+        user_df: User's uploaded DataFrame
+        model: Fitted RandomForestRegressor (not modified)
+        scaler: Scaler the model was trained with
+        feature_names: Feature order of the model
+        metadata: Metadata of the current model version
+        base_data_path: Base dataset whose split is the evaluation holdout
+            when the current version has no stored ``holdout``
+        holdout: (X, y) holdout rows stored with the current version
+        return_holdout: Also return the evaluation rows (the current holdout
+            plus the upload's held-out rows) to store with the new version
+    
+    Returns:
+        model, scaler, metrics, feature_names (and holdout with return_holdout)
+    
+    Raises:
+        ValueError: If the upload's columns differ from ``feature_names``
+    """
+    if not features_match(user_df, feature_names):
+        raise ValueError("Uploaded columns differ from the model features; incremental retraining needs a full refit")
+    
+    metadata = metadata or {}
+    state = dict(metadata.get('metrics', {}).get('incremental', {}))
+    base_rows = state.get('base_rows', metadata.get('training_samples', 0))
+    state.setdefault('base_rows', base_rows)
+    state.setdefault('base_estimators', model.n_estimators)
+    
+    user_df = user_df[list(feature_names) + ['target']].dropna(subset=['target'])
+    if len(user_df) >= 5:
+        fit_df, holdout_df = train_test_split(user_df, test_size=0.2, random_state=42)
+    else:
+        fit_df, holdout_df = user_df, user_df.iloc[:0]
+    
+    X_new, y_new, _ = preprocess_data(fit_df, scaler=scaler, fit_scaler=False)
+    
+    training_samples = metadata.get('training_samples', base_rows) + len(fit_df)
+    n_new_trees = math.ceil(state['base_estimators'] * len(fit_df) / max(1, training_samples))
+    n_new_trees = int(min(max(1, n_new_trees), INCREMENTAL_MAX_NEW_TREES))
+    
+    model = copy.deepcopy(model)
+    model.set_params(warm_start=True, n_estimators=model.n_estimators + n_new_trees)
+    model.fit(X_new, y_new)
+    model.set_params(warm_start=False)
+    
+    X_eval = [holdout_df[list(feature_names)].to_numpy(dtype=np.float64)]
+    y_eval = [holdout_df['target'].to_numpy(dtype=np.float64)]
+    if holdout is not None:
+        X_eval.append(holdout[0])
+        y_eval.append(holdout[1])
+    elif base_data_path and os.path.exists(base_data_path):
+        base = load_base_dataset(base_data_path)
+        _, holdout_rows = train_test_split(np.arange(len(base)), test_size=0.2, random_state=42)
+        holdout_rows.sort()
+        X_eval.append(base.matrix(list(feature_names), rows=holdout_rows))
+        y_eval.append(np.asarray(base['target'][holdout_rows]))
+    new_holdout = (np.concatenate(X_eval), np.concatenate(y_eval))
+    X_eval, y_eval, _ = preprocess_arrays(
+        new_holdout[0].copy(), new_holdout[1], scaler=scaler, fit_scaler=False
+    )
+    
+    y_pred = model.predict(X_eval)
+    state['updates'] = state.get('updates', 0) + 1
+    state['rows'] = state.get('rows', 0) + len(user_df)
+    
+    metrics = {
+        'rmse': float(np.sqrt(mean_squared_error(y_eval, y_pred))),
+        'mae': float(mean_absolute_error(y_eval, y_pred)),
+        'r2': float(r2_score(y_eval, y_pred)),
+        'training_samples': int(training_samples),
+        'trees_added': n_new_trees,
+        'incremental': state
+    }
+    
+    if return_holdout:
+        return model, scaler, metrics, list(feature_names), new_holdout
+    return model, scaler, metrics, list(feature_names)
+
+
+def retrain_with_user_data(user_df, base_data_path='data/california_housing.csv', current=None, mode='full',
+                           holdout=None, return_holdout=False):
     """
     Retrain model by combining user data with California housing dataset.
     
     Args:
         user_df: User's uploaded DataFrame
         base_data_path: Path to California housing dataset
+        current: Optional (model, scaler, feature_names, metadata) of the
+            serving model, required for incremental retraining
+        mode: 'full' to refit on base + user data, 'incremental' to add trees
+            to the current model, or 'auto' to let choose_retrain_mode decide.
+            An incremental request falls back to a full refit when the upload's
+            columns differ from the current model's features.
+        holdout: (X, y) holdout rows stored with the current version
+        return_holdout: Also return the holdout rows of the new model
     
     Returns:
-        model, scaler, metrics, feature_names
+        model, scaler, metrics, feature_names (and holdout with return_holdout)
     """
-    if os.path.exists(base_data_path):
-        base_df = pd.read_csv(base_data_path)
-        combined_df = pd.concat([base_df, user_df], ignore_index=True)
+    reason = 'full refit requested'
+    if mode != 'full':
+        if current is None or current[0] is None:
+            mode, reason = 'full', 'no current model to update'
+        elif mode == 'auto':
+            mode, reason = choose_retrain_mode(user_df, current[0], current[2], current[3])
+        elif not isinstance(current[0], RandomForestRegressor):
+            mode, reason = 'full', 'current model does not support adding trees'
+        elif not features_match(user_df, current[2]):
+            mode, reason = 'full', 'uploaded columns differ from the model features'
+        else:
+            reason = 'incremental update requested'
+    
+    if mode == 'incremental':
+        model, scaler, feature_names, metadata = current
+        result = retrain_incremental(user_df, model, scaler, feature_names, metadata, base_data_path,
+                                     holdout=holdout, return_holdout=return_holdout)
     else:
-        combined_df = user_df
+        if os.path.exists(base_data_path):
+            combined = load_base_dataset(base_data_path).append_frame(user_df)
+        else:
+            combined = user_df
+        result = train_model(combined, return_holdout=return_holdout)
     
-    return train_model(combined_df)
+    result[2]['retrain_mode'] = mode
+    result[2]['retrain_reason'] = reason
+    return result
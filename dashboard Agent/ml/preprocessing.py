@@ -1,9 +1,9 @@
-import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
 import joblib
 import os
 
+HOLDOUT_FILE = 'holdout.npz'
+
 def preprocess_data(df, scaler=None, fit_scaler=True):
     """
     Preprocess the housing data.
@@ -15,6 +15,9 @@ def preprocess_data(df, scaler=None, fit_scaler=True):
     
     Returns:
         X_scaled, y, scaler
+    
+    When the scaler is fitted, the training medians used for imputation are
+    stored on it as ``feature_medians_`` so serving can reuse them.
     """
     df = df.copy()
     
@@ -28,34 +31,177 @@ def preprocess_data(df, scaler=None, fit_scaler=True):
         y = None
     
     if scaler is None:
+        from sklearn.preprocessing import StandardScaler
         scaler = StandardScaler()
     
     if fit_scaler:
         X_scaled = scaler.fit_transform(X)
+        scaler.feature_medians_ = X.median().to_numpy(dtype=np.float64)
     else:
         X_scaled = scaler.transform(X)
     
     return X_scaled, y, scaler
 
 
-def load_model_artifacts(models_dir='models'):
-    """Load model, scaler, and metadata."""
+def preprocess_arrays(X, y=None, scaler=None, fit_scaler=True, feature_names=None):
+    """
+    Array counterpart of ``preprocess_data`` for columnar training data.
+    
+    Args:
+        X: float64 array of shape (n_rows, n_features); imputed and scaled in place
+        y: Optional target array; missing values are filled with its median,
+            as ``preprocess_data`` does
+        scaler: StandardScaler object (optional)
+        fit_scaler: Whether to fit the scaler
+        feature_names: Column names recorded on a fitted scaler
+    
+    Returns:
+        X_scaled, y, scaler
+    """
+    if scaler is None:
+        from sklearn.preprocessing import StandardScaler
+        scaler = StandardScaler()
+    
+    missing = np.isnan(X)
+    if fit_scaler:
+        medians = np.nanmedian(X, axis=0) if missing.any() else np.median(X, axis=0)
+    else:
+        medians = getattr(scaler, 'feature_medians_', np.zeros(X.shape[1]))
+    if missing.any():
+        np.copyto(X, np.broadcast_to(medians, X.shape), where=missing)
+    
+    if fit_scaler:
+        scaler.fit(X)
+        scaler.feature_medians_ = np.asarray(medians, dtype=np.float64)
+        if feature_names is not None:
+            # Match scalers fitted on DataFrames so both training paths are interchangeable
+            scaler.feature_names_in_ = np.asarray(feature_names, dtype=object)
+    
+    X -= scaler.mean_
+    X /= scaler.scale_
+    
+    if y is not None:
+        y = np.asarray(y, dtype=np.float64)
+        missing = np.isnan(y)
+        if missing.any():
+            y = np.where(missing, np.nanmedian(y), y)
+    return X, y, scaler
+
+
+class ServingPreprocessor:
+    """
+    Pandas-free feature preparation for serving.
+    
+    Maps feature dicts straight into a contiguous float64 array ordered by
+    ``feature_names``. Missing or NaN values are filled with the medians
+    captured at training time, and the StandardScaler is applied in place
+    with a precomputed scale and offset.
+    
+    Args:
+        feature_names: Feature order expected by the model
+        scaler: Fitted StandardScaler
+        medians: Imputation values per feature (defaults to the scaler's
+            ``feature_medians_``, or 0.0 for artifacts trained without them)
+    """
+    
+    def __init__(self, feature_names, scaler, medians=None):
+        self.feature_names = list(feature_names)
+        n_features = len(self.feature_names)
+        
+        if medians is None:
+            medians = getattr(scaler, 'feature_medians_', None)
+        if medians is None:
+            medians = np.zeros(n_features)
+        self.medians = np.ascontiguousarray(medians, dtype=np.float64)
+        
+        scale = scaler.scale_ if scaler.scale_ is not None else np.ones(n_features)
+        mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n_features)
+        self.inv_scale = 1.0 / np.asarray(scale, dtype=np.float64)
+        self.offset = np.asarray(mean, dtype=np.float64) * self.inv_scale
+        
+        self._defaults = list(zip(self.feature_names, self.medians.tolist()))
+    
+    def fill(self, rows, out=None):
+        """Write raw (unscaled) feature values for ``rows`` into an array."""
+        if isinstance(rows, dict):
+            rows = [rows]
+        
+        n_rows = len(rows)
+        if out is None:
+            out = np.empty((n_rows, len(self.feature_names)), dtype=np.float64)
+        else:
+            out = out[:n_rows]
+        
+        defaults = self._defaults
+        for i, row in enumerate(rows):
+            out[i] = [row.get(name, default) for name, default in defaults]
+        
+        missing = np.isnan(out)
+        if missing.any():
+            np.copyto(out, np.broadcast_to(self.medians, out.shape), where=missing)
+        
+        return out
+    
+    def scale(self, X):
+        """Standardize a float64 array in place."""
+        X *= self.inv_scale
+        X -= self.offset
+        return X
+    
+    def transform(self, rows, out=None):
+        """
+        Build the scaled model input for one feature dict or a list of them.
+        
+        Args:
+            rows: Feature dict or list of feature dicts
+            out: Optional preallocated (n_rows, n_features) float64 buffer
+        
+        Returns:
+            Scaled feature array
+        """
+        return self.scale(self.fill(rows, out=out))
+
+
+def load_model_artifacts(models_dir='models', engine='sklearn'):
+    """
+    Load model, scaler, and metadata.
+    
+    Args:
+        models_dir: Directory containing the saved artifacts
+        engine: 'sklearn' to serve the estimator as trained, or 'compiled' to
+            convert tree ensembles into a flat-array CompiledForest
+    
+    Returns:
+        model, scaler, feature_names, metadata
+    """
     model_path = os.path.join(models_dir, 'housing_model.pkl')
-    scaler_path = os.path.join(models_dir, 'scaler.pkl')
-    feature_names_path = os.path.join(models_dir, 'feature_names.pkl')
-    metadata_path = os.path.join(models_dir, 'metadata.pkl')
     
     if not os.path.exists(model_path):
         return None, None, None, None
     
     model = joblib.load(model_path)
-    scaler = joblib.load(scaler_path)
-    feature_names = joblib.load(feature_names_path)
-    metadata = joblib.load(metadata_path) if os.path.exists(metadata_path) else {}
+    scaler, feature_names, metadata = load_support_artifacts(models_dir)
+    
+    if engine == 'compiled':
+        from .compiled_forest import compile_model
+        model = compile_model(model)
     
     return model, scaler, feature_names, metadata
 
 
+def load_support_artifacts(models_dir='models'):
+    """
+    Load everything except the model: scaler, feature_names, metadata.
+    
+    Used when the model itself comes from elsewhere (e.g. memory-mapped arrays).
+    """
+    metadata_path = os.path.join(models_dir, 'metadata.pkl')
+    scaler = joblib.load(os.path.join(models_dir, 'scaler.pkl'))
+    feature_names = joblib.load(os.path.join(models_dir, 'feature_names.pkl'))
+    metadata = joblib.load(metadata_path) if os.path.exists(metadata_path) else {}
+    return scaler, feature_names, metadata
+
+
 def save_model_artifacts(model, scaler, feature_names, metadata, models_dir='models'):
     """Save model, scaler, and metadata."""
     os.makedirs(models_dir, exist_ok=True)
@@ -64,3 +210,24 @@ def save_model_artifacts(model, scaler, feature_names, metadata, models_dir='mod
     joblib.dump(scaler, os.path.join(models_dir, 'scaler.pkl'))
     joblib.dump(feature_names, os.path.join(models_dir, 'feature_names.pkl'))
     joblib.dump(metadata, os.path.join(models_dir, 'metadata.pkl'))
+
+
+def save_holdout(X, y, models_dir='models'):
+    """
+    Save the evaluation rows of a model version (unscaled features and target).
+    
+    Later versions derived from it (incremental retrains, compressed variants)
+    are scored on the same rows instead of a split rebuilt from the base data.
+    """
+    os.makedirs(models_dir, exist_ok=True)
+    np.savez(os.path.join(models_dir, HOLDOUT_FILE),
+             X=np.asarray(X, dtype=np.float64), y=np.asarray(y, dtype=np.float64))
+
+
+def load_holdout(models_dir='models'):
+    """Load the evaluation rows saved with a model version, or None if it has none."""
+    path = os.path.join(models_dir, HOLDOUT_FILE)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return data['X'], data['y']
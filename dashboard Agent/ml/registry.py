@@ -0,0 +1,258 @@
+import os
+import shutil
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from .preprocessing import ServingPreprocessor, load_model_artifacts, save_holdout, save_model_artifacts
+from .compiled_forest import compile_model
+from .model_file import BUNDLE_FILE, convert_artifacts, load_model_file, save_model_file
+
+VERSIONS_DIR = 'versions'
+CURRENT_FILE = 'CURRENT'
+LEGACY_VERSION = 'legacy'
+
+
+@dataclass(frozen=True)
+class ModelBundle:
+    """
+    Immutable set of everything needed to serve one model version.
+
+    The backend holds a single reference to the active bundle and swaps it in
+    one assignment, so a request that grabbed a bundle keeps a consistent
+    model/scaler/feature_names/metadata set even if a new version goes live.
+    """
+    version: str
+    model: Any
+    scaler: Any
+    feature_names: Tuple[str, ...]
+    metadata: Dict[str, Any]
+    preprocessor: ServingPreprocessor
+
+
+def make_bundle(model, scaler, feature_names, metadata, version, engine='sklearn'):
+    """Build a ModelBundle from in-memory artifacts."""
+    if engine == 'compiled':
+        model = compile_model(model)
+    return ModelBundle(
+        version=version,
+        model=model,
+        scaler=scaler,
+        feature_names=tuple(feature_names),
+        metadata=dict(metadata or {}),
+        preprocessor=ServingPreprocessor(feature_names, scaler),
+    )
+
+
+def _versions_root(models_dir):
+    return os.path.join(models_dir, VERSIONS_DIR)
+
+
+def _fsync_dir(path):
+    if os.name != 'posix':
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def new_version_id():
+    """Return a sortable, unique version id."""
+    timestamp = datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S-%f')
+    return f"{timestamp}-{uuid.uuid4().hex[:4]}"
+
+
+def list_versions(models_dir='models'):
+    """Return published version ids, oldest first."""
+    root = _versions_root(models_dir)
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        name for name in os.listdir(root)
+        if not name.startswith('.') and os.path.isdir(os.path.join(root, name))
+    )
+
+
+def current_version(models_dir='models'):
+    """Return the active version id, or None if nothing has been published."""
+    try:
+        with open(os.path.join(models_dir, CURRENT_FILE)) as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return version or None
+
+
+def activate_version(models_dir, version):
+    """Atomically point CURRENT at an already published version."""
+    if version not in list_versions(models_dir):
+        raise ValueError(f"Unknown model version: {version}")
+
+    tmp_path = os.path.join(models_dir, f".{CURRENT_FILE}.{uuid.uuid4().hex}")
+    with open(tmp_path, 'w') as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(models_dir, CURRENT_FILE))
+    _fsync_dir(models_dir)
+
+
+def publish_version(model, scaler, feature_names, metadata, models_dir='models', activate=True, keep=5,
+                    holdout=None):
+    """
+    Write artifacts to a new version directory and optionally activate it.
+
+    Artifacts are written to a hidden temp directory first and moved into
+    ``versions/`` with a single rename, so a crash never leaves a partially
+    written version behind. Activation is an atomic replace of CURRENT.
+    Besides the pickles, the version gets a ``model.bundle`` file that the
+    'compiled' and 'mmap' engines load without unpickling.
+
+    Args:
+        model, scaler, feature_names, metadata: Artifacts to publish
+        models_dir: Root models directory
+        activate: Whether to make the new version current
+        keep: Number of most recent versions to retain (None keeps all)
+        holdout: Optional (X, y) evaluation rows, unscaled, saved with the version
+
+    Returns:
+        The new version id
+    """
+    root = _versions_root(models_dir)
+    os.makedirs(root, exist_ok=True)
+
+    version = new_version_id()
+    metadata = dict(metadata or {}, version=version)
+    tmp_dir = os.path.join(root, f".tmp-{version}")
+    try:
+        save_model_artifacts(model, scaler, feature_names, metadata, tmp_dir)
+        save_model_file(os.path.join(tmp_dir, BUNDLE_FILE), model, scaler, feature_names, metadata)
+        if holdout is not None:
+            save_holdout(*holdout, tmp_dir)
+        os.rename(tmp_dir, os.path.join(root, version))
+        _fsync_dir(root)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    if activate:
+        activate_version(models_dir, version)
+    if keep is not None:
+        prune_versions(models_dir, keep)
+
+    return version
+
+
+def prune_versions(models_dir='models', keep=5):
+    """Delete the oldest versions beyond ``keep``, never touching the active one or its rollback target."""
+    active = current_version(models_dir)
+    protected = {active, previous_version(models_dir, active)} if active else set()
+    versions = list_versions(models_dir)
+    for version in versions[:max(0, len(versions) - keep)]:
+        if version not in protected:
+            shutil.rmtree(os.path.join(_versions_root(models_dir), version), ignore_errors=True)
+
+
+def delete_version(models_dir, version):
+    """Delete a published version that is not active (e.g. a discarded training result)."""
+    if version == current_version(models_dir):
+        raise ValueError(f"Cannot delete the active model version {version}")
+    if version in list_versions(models_dir):
+        shutil.rmtree(os.path.join(_versions_root(models_dir), version), ignore_errors=True)
+
+
+def resolve_version(models_dir='models', version=None):
+    """
+    Return ``(version, artifacts_dir)`` for a version (default: the active one).
+
+    Falls back to the flat pre-versioning layout in ``models_dir`` when no
+    version has been published yet.
+    """
+    version = version or current_version(models_dir)
+    if version is None:
+        return LEGACY_VERSION, models_dir
+    return version, os.path.join(_versions_root(models_dir), version)
+
+
+def load_file_bundle(path, version, mmap_mode='r', verify=False):
+    """
+    Load a version from its ``model.bundle`` file.
+
+    Versions published before the bundle format existed are converted from
+    their pickles on first load; every later load (in any process) only
+    parses the header and maps the arrays. With ``mmap_mode='r'`` worker
+    processes share one copy of the weights through the page cache. The data
+    checksum is verified when the file is written; ``verify=True`` checks it
+    again on load, at the cost of reading the whole file.
+
+    Raises:
+        ModelFileError: If the bundle is not a valid model file
+    """
+    bundle_path = os.path.join(path, BUNDLE_FILE)
+    if not os.path.exists(bundle_path) and convert_artifacts(path) is None:
+        return None
+    model, scaler, feature_names, metadata = load_model_file(bundle_path, mmap_mode=mmap_mode, verify=verify)
+    return make_bundle(model, scaler, feature_names, metadata, version)
+
+
+def load_bundle(models_dir='models', version=None, engine='sklearn', verify=False):
+    """
+    Load a published version (the active one by default) as a ModelBundle.
+
+    Args:
+        models_dir: Root models directory
+        version: Version to load (default: the active one)
+        engine: 'sklearn' (the pickled estimator), 'compiled' (CompiledForest
+            read from model.bundle into process memory) or 'mmap' (memory-mapped
+            from model.bundle, shared by workers)
+        verify: Re-check the model.bundle data checksum ('compiled' and 'mmap')
+
+    Returns None if nothing can be loaded.
+    """
+    version, path = resolve_version(models_dir, version)
+    if engine in ('compiled', 'mmap'):
+        return load_file_bundle(path, version, mmap_mode='r' if engine == 'mmap' else None, verify=verify)
+    model, scaler, feature_names, metadata = load_model_artifacts(path)
+    if model is None:
+        return None
+    return make_bundle(model, scaler, feature_names, metadata, version, engine=engine)
+
+
+def previous_version(models_dir='models', version=None):
+    """Return the version published just before ``version`` (default: the active one)."""
+    version = version or current_version(models_dir)
+    versions = list_versions(models_dir)
+    if version not in versions:
+        return versions[-1] if versions else None
+    index = versions.index(version)
+    return versions[index - 1] if index > 0 else None
+
+
+def rollback(models_dir='models', version: Optional[str] = None, engine='sklearn', verify=False):
+    """
+    Re-activate an earlier version without retraining.
+
+    Args:
+        models_dir: Root models directory
+        version: Version to activate (default: the one before the active version)
+        engine: Inference engine for the returned bundle
+        verify: Re-check the model.bundle data checksum
+
+    Returns:
+        The loaded ModelBundle for the re-activated version
+    """
+    if version is not None and version not in list_versions(models_dir):
+        raise ValueError(f"Unknown model version: {version}")
+
+    target = version or previous_version(models_dir)
+    if target is None:
+        raise ValueError("No earlier model version to roll back to")
+
+    bundle = load_bundle(models_dir, target, engine=engine, verify=verify)
+    if bundle is None:
+        raise ValueError(f"Model version {target} has no artifacts")
+    activate_version(models_dir, target)
+    return bundle
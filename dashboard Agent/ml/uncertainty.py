@@ -0,0 +1,122 @@
+"""
+Prediction spread of tree ensembles, from the per-tree outputs of one pass.
+
+A random forest predicts the mean of its trees, and the traversal that
+produces that mean already visits every tree's leaf. Keeping those per-tree
+values instead of only their sum gives the standard deviation and quantiles
+of the tree predictions at the cost of sorting each row's tree values. The spread measures
+how much the trees disagree (it widens away from the training data); it is
+not a calibrated interval on the true price.
+"""
+import numpy as np
+
+from .compiled_forest import CompiledForest
+
+# Largest (tree, row) buffer predict_distribution allocates: 8 MB of float64
+DEFAULT_MAX_CELLS = 1 << 20
+
+
+def parse_quantiles(text):
+    """
+    Parse comma-separated probabilities ("0.05,0.5,0.95") into a sorted tuple.
+
+    Raises:
+        ValueError: If a value is not a number in [0, 1]
+    """
+    quantiles = set()
+    for part in text.split(','):
+        if not part.strip():
+            continue
+        try:
+            value = float(part)
+        except ValueError:
+            raise ValueError(f"Quantiles must be numbers, got {part.strip()!r}") from None
+        if not 0.0 <= value <= 1.0:
+            raise ValueError(f"Quantiles must be between 0 and 1, got {part.strip()}")
+        quantiles.add(value)
+    return tuple(sorted(quantiles))
+
+
+def n_averaged_trees(model):
+    """Number of trees ``model`` averages, or 0 if its prediction is not a mean of trees."""
+    if isinstance(model, CompiledForest):
+        return model.n_trees
+    # RandomForest/ExtraTrees keep a list of trees; gradient boosting's 2-D array of
+    # trees is a sum of corrections, and bagging may give each tree its own features
+    estimators = getattr(model, 'estimators_', None)
+    if (isinstance(estimators, list) and len(estimators) > 1 and not hasattr(model, 'estimators_features_')
+            and all(hasattr(estimator, 'tree_') for estimator in estimators)):
+        return len(estimators)
+    return 0
+
+
+def _fill_per_tree(model, X, out):
+    """Write each tree's prediction for ``X`` into ``out`` of shape (n_trees, n_rows)."""
+    if isinstance(model, CompiledForest):
+        for tree_slice, row_slice, values in model.iter_tree_blocks(X):
+            out[tree_slice, row_slice] = values
+        return
+
+    from joblib import Parallel, delayed
+
+    # Same threaded per-tree loop as the forest's own predict, keeping the values
+    X = np.ascontiguousarray(X, dtype=np.float32)
+
+    def fill(index, estimator):
+        out[index] = estimator.predict(X, check_input=False)
+
+    Parallel(n_jobs=getattr(model, 'n_jobs', None), require='sharedmem')(
+        delayed(fill)(index, estimator) for index, estimator in enumerate(model.estimators_)
+    )
+
+
+def predict_distribution(model, X, quantiles=None, max_cells=DEFAULT_MAX_CELLS):
+    """
+    Predict ``X`` along with the spread of the per-tree predictions.
+
+    Rows are evaluated in chunks of ``max_cells // n_trees``, reusing one
+    per-tree buffer, so memory stays bounded however large the batch is; only
+    the per-row results grow with it.
+
+    Args:
+        model: Fitted model or CompiledForest
+        X: Array of shape (n_rows, n_features)
+        quantiles: Probabilities in [0, 1]; None skips the spread (a plain predict)
+        max_cells: Largest per-tree buffer, in (tree, row) values
+
+    Returns:
+        Dict with 'mean' (the model's prediction), 'std' (standard deviation
+        across trees) and 'quantiles' (array of shape (len(quantiles), n_rows)).
+        'std' and 'quantiles' are None when ``quantiles`` is None or the model
+        does not average trees.
+    """
+    n_trees = n_averaged_trees(model)
+    if quantiles is None or not n_trees:
+        return {'mean': model.predict(X), 'std': None, 'quantiles': None}
+
+    # Linear interpolation between order statistics, as np.quantile's default method
+    positions = np.asarray(quantiles, dtype=np.float64) * (n_trees - 1)
+    lower = np.floor(positions).astype(np.intp)
+    upper = np.minimum(lower + 1, n_trees - 1)
+    weight = (positions - lower)[:, None]
+
+    n_rows = X.shape[0]
+    mean = np.empty(n_rows, dtype=np.float64)
+    std = np.empty(n_rows, dtype=np.float64)
+    values = np.empty((len(positions), n_rows), dtype=np.float64)
+
+    rows_per_chunk = max(1, int(max_cells) // n_trees)
+    buffer = np.empty((n_trees, min(rows_per_chunk, n_rows)), dtype=np.float64)
+    for start in range(0, n_rows, rows_per_chunk):
+        stop = min(start + rows_per_chunk, n_rows)
+        per_tree = buffer[:, :stop - start]
+        _fill_per_tree(model, X[start:stop], per_tree)
+        mean[start:stop] = per_tree.mean(axis=0)
+        std[start:stop] = per_tree.std(axis=0)
+        if len(positions):
+            # Sorting each column in place is several times faster than np.quantile's
+            # per-column partitions; the buffer is refilled for the next chunk anyway
+            per_tree.sort(axis=0)
+            values[:, start:stop] = per_tree[lower] * (1.0 - weight) + per_tree[upper] * weight
+
+    return {'mean': mean, 'std': std, 'quantiles': values}
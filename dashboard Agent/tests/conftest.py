@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+
+FEATURE_NAMES = ['MedInc', 'HouseAge', 'AveRooms', 'AveBedrms', 'Population', 'AveOccup', 'Latitude', 'Longitude']
+
+
+@pytest.fixture(scope='session')
+def housing_data():
+    """Small synthetic regression problem shaped like the housing features."""
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(400, len(FEATURE_NAMES)))
+    y = 2.0 + X[:, 0] - 0.5 * X[:, 6] * X[:, 7] + rng.normal(scale=0.3, size=len(X))
+    return X, y
+
+
+@pytest.fixture(scope='session')
+def forest(housing_data):
+    X, y = housing_data
+    return RandomForestRegressor(n_estimators=12, max_depth=8, random_state=0).fit(X, y)
+
+
+@pytest.fixture(scope='session')
+def scaler(housing_data):
+    scaler = StandardScaler().fit(housing_data[0])
+    scaler.feature_medians_ = np.median(housing_data[0], axis=0)
+    return scaler
@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+import httpx
+import numpy as np
+import pytest
+
+from backend.batcher import MicroBatcher
+from backend.prediction_cache import PredictionCache
+from conftest import FEATURE_NAMES
+from ml.registry import make_bundle
+
+
+def run_batcher(batcher, scenario):
+    async def main():
+        batcher.start()
+        try:
+            return await scenario(batcher)
+        finally:
+            await batcher.stop()
+
+    return asyncio.run(main())
+
+
+def test_concurrent_submits_are_coalesced_up_to_the_batch_size():
+    calls = []
+
+    def predict(context, rows):
+        calls.append(len(rows))
+        return [row['x'] * 2 for row in rows]
+
+    batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=50)
+
+    results = run_batcher(batcher, lambda b: asyncio.gather(*(b.submit({'x': i}) for i in range(10))))
+
+    assert results == [i * 2 for i in range(10)]
+    assert calls == [4, 4, 2]
+    assert batcher.batch_sizes.count == 3 and batcher.batch_sizes.max == 4
+
+
+def test_a_lone_row_is_flushed_after_max_wait():
+    batcher = MicroBatcher(lambda context, rows: [1.0] * len(rows), max_batch_size=32, max_wait_ms=50)
+
+    async def scenario(b):
+        start = time.perf_counter()
+        result = await b.submit({'x': 1})
+        return result, time.perf_counter() - start
+
+    result, elapsed = run_batcher(batcher, scenario)
+
+    assert result == 1.0
+    assert 0.045 <= elapsed < 1.0
+    assert batcher.queue_wait_ms.max >= 45
+
+
+def test_rows_with_different_contexts_are_never_mixed():
+    calls = []
+
+    def predict(context, rows):
+        calls.append((context, len(rows)))
+        return [context] * len(rows)
+
+    batcher = MicroBatcher(predict, max_batch_size=8, max_wait_ms=20)
+
+    results = run_batcher(batcher, lambda b: asyncio.gather(*(b.submit({}, 'v1' if i % 2 else 'v2') for i in range(6))))
+
+    assert results == ['v2', 'v1'] * 3
+    assert sorted(calls) == [('v1', 3), ('v2', 3)]
+
+
+def test_a_failing_batch_fails_every_waiter():
+    error = ValueError("model exploded")
+
+    def predict(context, rows):
+        raise error
+
+    batcher = MicroBatcher(predict, max_batch_size=8, max_wait_ms=20)
+
+    results = run_batcher(batcher, lambda b: asyncio.gather(*(b.submit({'x': i}) for i in range(5)),
+                                                            return_exceptions=True))
+
+    assert results == [error] * 5
+
+
+def test_stats_endpoint_reports_batch_size_and_queue_wait(monkeypatch, forest, scaler, housing_data):
+    import backend.main as main
+    batcher = MicroBatcher(main.predict_batch, max_batch_size=4, max_wait_ms=20)
+    monkeypatch.setattr(main, 'batcher', batcher)
+    monkeypatch.setattr(main, 'prediction_cache', PredictionCache(max_entries=0))
+    monkeypatch.setattr(main, 'bundle', make_bundle(forest, scaler, FEATURE_NAMES, {}, 'v1'))
+    rows = [dict(zip(FEATURE_NAMES, map(float, row))) for row in housing_data[0][:6]]
+
+    async def scenario(b):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            predictions = await asyncio.gather(*(http.post("/predict", json={"features": row}) for row in rows))
+            return predictions, await http.get("/predict/batching/stats")
+
+    predictions, response = run_batcher(batcher, scenario)
+
+    expected = forest.predict(scaler.transform(housing_data[0][:6])) * 100000
+    np.testing.assert_allclose([p.json()["predicted_price"] for p in predictions], expected)
+    stats = response.json()
+    assert stats["max_batch_size"] == 4 and stats["max_wait_ms"] == pytest.approx(20)
+    batches = stats["batch_size"]["count"]
+    assert batches >= 2 and sum(stats["batch_size"]["buckets"].values()) == batches
+    assert stats["batch_size"]["mean"] * batches == pytest.approx(6)
+    assert 1 < stats["batch_size"]["max"] <= 4
+    assert stats["queue_wait_ms"]["count"] == 6
+    assert sum(stats["queue_wait_ms"]["buckets"].values()) == 6
+    assert stats["queued"] == 0
@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+from langchain_core.messages import AIMessage
+
+from agent.agent import create_agent
+from backend.chat_stream import stream_agent_events
+from bench.fake_llm import FakeStreamingChatModel, function_call
+
+
+class FakeTransport:
+    base_url = "http://test"
+
+    async def apredict(self, features):
+        return {"predicted_price": 250000.0, "features_used": features}
+
+    def predict(self, features):
+        return {"predicted_price": 250000.0, "features_used": features}
+
+
+def parse_sse(chunks):
+    events = []
+    for chunk in chunks:
+        event, data = chunk.strip().split("\n")
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def run_stream(responses, extra=None):
+    llm = FakeStreamingChatModel(responses=responses)
+    agent = create_agent(llm=llm, transport=FakeTransport(), route=False)
+    results = []
+
+    async def collect():
+        return [chunk async for chunk in stream_agent_events(
+            agent, {"input": "How much is a house with MedInc 5?", "chat_history": []},
+            on_result=results.append, extra=extra,
+        )]
+
+    return parse_sse(asyncio.run(collect())), results
+
+
+def test_stream_emits_tool_events_then_tokens_then_done():
+    events, results = run_stream([
+        function_call("predict_housing_price", MedInc=5.0),
+        AIMessage(content="That house would cost about $250,000."),
+    ], extra={"session_id": "s1"})
+
+    names = [name for name, _ in events]
+    assert names[:2] == ["tool_start", "tool_output"]
+    assert set(names[2:-1]) == {"token"}
+    assert names[-1] == "done"
+
+    assert events[0][1] == {"tool": "predict_housing_price", "tool_input": {"MedInc": 5.0}}
+    assert events[1][1]["tool"] == "predict_housing_price"
+    assert "$250,000.00" in events[1][1]["output"]
+    assert "".join(data["text"] for name, data in events if name == "token") == \
+        "That house would cost about $250,000."
+
+    done = events[-1][1]
+    assert done["reply"] == "That house would cost about $250,000."
+    assert done["tool_outputs"][0]["tool_input"] == {"MedInc": 5.0}
+    assert done["session_id"] == "s1"
+    assert len(results) == 1
+
+
+def test_stream_reports_agent_failures_as_an_error_event():
+    events, results = run_stream([])
+
+    assert events[-1][0] == "error"
+    assert events[-1][1]["detail"].startswith("Agent error:")
+    assert "done" not in [name for name, _ in events]
+    assert results == []
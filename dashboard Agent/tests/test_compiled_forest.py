@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesRegressor, GradientBoostingRegressor
+from sklearn.linear_model import Ridge
+from sklearn.tree import DecisionTreeRegressor
+
+from ml.compiled_forest import CompiledForest, compile_model
+
+
+@pytest.fixture(scope='module')
+def extra_trees(housing_data):
+    X, y = housing_data
+    return ExtraTreesRegressor(n_estimators=7, random_state=0).fit(X, y)
+
+
+@pytest.fixture(scope='module')
+def single_tree(housing_data):
+    X, y = housing_data
+    return DecisionTreeRegressor(max_depth=6, random_state=0).fit(X, y)
+
+
+def threshold_rows(model, n_features):
+    """Rows whose features sit exactly on split thresholds, where float32 rounding decides the branch."""
+    compiled = CompiledForest.from_sklearn(model)
+    internal = np.flatnonzero(compiled.feature >= 0)[:50]
+    X = np.zeros((len(internal), n_features))
+    X[np.arange(len(internal)), compiled.feature[internal]] = compiled.threshold[internal]
+    return X
+
+
+@pytest.mark.parametrize('name', ['forest', 'extra_trees', 'single_tree'])
+@pytest.mark.parametrize('block_size', [1, 7, 64, 16384])
+def test_predictions_match_sklearn(request, housing_data, name, block_size):
+    model = request.getfixturevalue(name)
+    X = np.vstack([housing_data[0], threshold_rows(model, housing_data[0].shape[1])])
+    compiled = CompiledForest.from_sklearn(model)
+    compiled.block_size = block_size
+
+    np.testing.assert_allclose(compiled.predict(X), model.predict(X), rtol=0, atol=1e-12)
+    np.testing.assert_allclose(compiled.predict(X[:1]), model.predict(X[:1]), rtol=0, atol=1e-12)
+
+
+def test_per_tree_predictions_match_each_estimator(forest, housing_data):
+    X = housing_data[0][:37]
+    compiled = CompiledForest.from_sklearn(forest)
+    compiled.block_size = 10
+
+    per_tree = compiled.predict_per_tree(X)
+
+    expected = np.stack([tree.predict(X.astype(np.float32)) for tree in forest.estimators_])
+    np.testing.assert_array_equal(per_tree, expected)
+    assert compiled.n_trees == len(forest.estimators_)
+
+
+def test_compile_model_only_converts_averaged_trees(forest, housing_data):
+    X, y = housing_data
+    boosting = GradientBoostingRegressor(n_estimators=5).fit(X, y)
+    ridge = Ridge().fit(X, y)
+
+    assert isinstance(compile_model(forest), CompiledForest)
+    assert compile_model(boosting) is boosting
+    assert compile_model(ridge) is ridge
+
+
+def test_rejects_inputs_with_the_wrong_number_of_features(forest, housing_data):
+    compiled = CompiledForest.from_sklearn(forest)
+
+    with pytest.raises(ValueError, match="Expected input with 8 features"):
+        compiled.predict(housing_data[0][:, :5])
+    with pytest.raises(ValueError, match="Expected input with 8 features"):
+        compiled.predict(housing_data[0][0])
+
+
+def test_rejects_multi_output_models(housing_data):
+    X, y = housing_data
+    model = DecisionTreeRegressor(max_depth=3).fit(X, np.column_stack([y, -y]))
+
+    with pytest.raises(ValueError, match="single-output"):
+        CompiledForest.from_sklearn(model)
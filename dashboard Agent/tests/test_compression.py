@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from sklearn.metrics import mean_squared_error
+
+from backend.jobs import run_compression_job
+from conftest import FEATURE_NAMES
+from ml.compression import holdout_split
+from ml.dataset_store import ColumnarDataset
+from ml.registry import publish_version
+
+
+@pytest.fixture(scope='module')
+def base(housing_data):
+    X, y = housing_data
+    return ColumnarDataset(dict({name: X[:, j] for j, name in enumerate(FEATURE_NAMES)}, target=y))
+
+
+@pytest.fixture(scope='module')
+def holdout(housing_data):
+    rng = np.random.RandomState(1)
+    X = rng.normal(size=(30, len(FEATURE_NAMES)))
+    return X, 2.0 + X[:, 0]
+
+
+def test_holdout_split_uses_the_stored_holdout(base, scaler, holdout):
+    X_train, X_test, y_train, y_test = holdout_split(base, scaler, FEATURE_NAMES, holdout)
+    _, base_test, _, _ = holdout_split(base, scaler, FEATURE_NAMES)
+
+    assert X_train.shape == (320, len(FEATURE_NAMES))
+    assert len(base_test) == 80
+    np.testing.assert_allclose(X_test, scaler.transform(holdout[0]))
+    np.testing.assert_array_equal(y_test, holdout[1])
+
+
+def test_compression_job_scores_on_the_version_holdout(tmp_path, base, forest, scaler, holdout):
+    models_dir = str(tmp_path / 'models')
+    csv_path = str(tmp_path / 'base.csv')
+    base.to_frame().to_csv(csv_path, index=False)
+    publish_version(forest, scaler, FEATURE_NAMES, {'metrics': {}}, models_dir, holdout=holdout)
+
+    result = run_compression_job('job', 'compress', models_dir, csv_path)
+
+    original = next(row for row in result['report'] if row['name'] == 'original')
+    expected = np.sqrt(mean_squared_error(holdout[1], forest.predict(scaler.transform(holdout[0]))))
+    assert original['rmse'] == pytest.approx(expected)
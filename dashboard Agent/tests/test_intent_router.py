@@ -0,0 +1,70 @@
+import pytest
+
+from agent.agent import IntentRouter, make_tools
+from shared.routing import RoutedAgent
+
+
+class FakeTransport:
+    base_url = "http://test"
+
+    def predict(self, features):
+        return {"predicted_price": 250000.0, "features_used": features}
+
+    def model_info(self):
+        return {"model_loaded": False}
+
+
+class FakeExecutor:
+    def __init__(self):
+        self.calls = []
+
+    def invoke(self, inputs, config=None, **kwargs):
+        self.calls.append(inputs)
+        return {**inputs, "output": "from the LLM"}
+
+
+@pytest.mark.parametrize("text, features", [
+    ("predict price with MedInc=5, HouseAge=10", {"MedInc": 5.0, "HouseAge": 10.0}),
+    ("how much for median income 6 and latitude 37.8", {"MedInc": 6.0, "Latitude": 37.8}),
+    ("estimate the value with house age 30, longitude -122.2", {"HouseAge": 30.0, "Longitude": -122.2}),
+])
+def test_routes_named_features(text, features):
+    assert IntentRouter().route(text) == ("predict_housing_price", features)
+
+
+@pytest.mark.parametrize("text", [
+    "price for a home where the owner is age 45",
+    "what is the price if my income is 120000",
+    "estimate the price at lon -122 and lat 37",
+    "how much is a house that is 20 years old",
+    "compare the price with MedInc=5 and MedInc=8",
+    "predict the price with MedInc=5 in 2 years",
+    "price with MedInc=5 and MedInc=6",
+    "tell me about latitude 37",
+])
+def test_leaves_unclear_messages_to_the_llm(text):
+    assert IntentRouter().route(text) is None
+
+
+def test_routed_agent_answers_without_the_llm():
+    executor = FakeExecutor()
+    agent = RoutedAgent(executor, make_tools(FakeTransport()), IntentRouter())
+
+    result = agent.invoke({"input": "predict price with MedInc=5", "chat_history": []})
+
+    assert executor.calls == []
+    assert "$250,000.00" in result["output"]
+    assert result["intermediate_steps"][0][0].tool_input == {"MedInc": 5.0}
+    assert agent.router_stats.stats()["routed"] == 1
+
+
+def test_routed_agent_sends_follow_up_turns_to_the_llm():
+    executor = FakeExecutor()
+    agent = RoutedAgent(executor, make_tools(FakeTransport()), IntentRouter())
+
+    result = agent.invoke({"input": "now predict the price with MedInc=8", "chat_history": ["HouseAge is 30"]})
+
+    assert result["output"] == "from the LLM"
+    assert len(executor.calls) == 1
+    stats = agent.router_stats.stats()
+    assert (stats["routed"], stats["fallthrough"]) == (0, 1)
@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+from backend.jobs import JobQueue, JobStatusStore, report_progress
+
+
+def timed_job(job_id, seconds):
+    start = time.time()
+    time.sleep(seconds)
+    return {'start': start, 'end': time.time()}
+
+
+def staged_job(job_id, stages, seconds):
+    for stage in range(stages):
+        report_progress(job_id, stage / stages, f"stage {stage}")
+        time.sleep(seconds)
+    return {'end': time.time()}
+
+
+def run_queue(scenario, **kwargs):
+    activated = {}
+
+    async def on_success(job, result):
+        await asyncio.sleep(0.05)
+        activated[job.id] = time.time()
+
+    async def main():
+        queue = JobQueue(on_success, **dict({'max_workers': 2}, **kwargs))
+        queue.start()
+        try:
+            jobs = scenario(queue)
+            while any(job.finished_at is None for job in jobs):
+                await asyncio.sleep(0.02)
+            return jobs
+        finally:
+            queue.shutdown()
+
+    return asyncio.run(main()), activated
+
+
+def test_jobs_with_the_same_serial_key_run_one_after_another():
+    (first, second, other), activated = run_queue(lambda queue: [
+        queue.submit('retrain', timed_job, 0.3, serial_key='incremental'),
+        queue.submit('retrain', timed_job, 0.1, serial_key='incremental'),
+        queue.submit('train', timed_job, 0.1),
+    ])
+
+    assert [job.status for job in (first, second, other)] == ['succeeded'] * 3
+    # The second job starts only once the first one's result has been activated
+    assert second.result['start'] >= activated[first.id]
+    assert other.result['start'] < first.result['end']
+
+
+def test_cancelling_a_waiting_serial_job_never_starts_it():
+    def scenario(queue):
+        first = queue.submit('retrain', timed_job, 0.3, serial_key='incremental')
+        second = queue.submit('retrain', timed_job, 0.1, serial_key='incremental')
+        third = queue.submit('retrain', timed_job, 0.1, serial_key='incremental')
+        queue.cancel(second.id)
+        return [first, second, third]
+
+    (first, second, third), _ = run_queue(scenario)
+
+    assert [job.status for job in (first, second, third)] == ['succeeded', 'cancelled', 'succeeded']
+    assert second.future is None
+    assert third.result['start'] >= first.result['end']
+
+
+def test_other_workers_read_and_cancel_jobs_through_the_store(tmp_path):
+    # Two queues sharing a directory stand in for two server workers
+    other_worker = JobQueue(None, store=JobStatusStore(str(tmp_path)))
+    discarded = []
+    seen = {}
+
+    def scenario(queue):
+        queue.on_discard = lambda job, result: discarded.append(job.id)
+        first = queue.submit('train', timed_job, 0.3)
+        second = queue.submit('train', timed_job, 0.1)
+        seen['running'] = other_worker.status(first.id)
+        seen['cancel'] = other_worker.request_cancel(first.id)
+        return [first, second]
+
+    (first, second), activated = run_queue(scenario, store=JobStatusStore(str(tmp_path)))
+
+    assert seen['running']['id'] == first.id and seen['running']['status'] in ('queued', 'running')
+    assert seen['cancel']['cancel_requested'] and seen['cancel']['stage'] == 'cancelling'
+    assert (first.status, second.status) == ('cancelled', 'succeeded')
+    assert discarded == [first.id] and list(activated) == [second.id]
+    assert other_worker.status(first.id)['status'] == 'cancelled'
+    assert [job['id'] for job in other_worker.statuses()] == [second.id, first.id]
+    assert other_worker.status('missing') is None and other_worker.status('../CURRENT') is None
+
+
+def test_cancelling_a_running_job_stops_its_worker_at_the_next_stage():
+    discarded = []
+
+    async def on_success(job, result):
+        pass
+
+    async def main():
+        queue = JobQueue(on_success, on_discard=lambda job, result: discarded.append(job.id), max_workers=1)
+        queue.start()
+        try:
+            running = queue.submit('train', staged_job, 50, 0.1)
+            waiting = queue.submit('train', timed_job, 0.1)
+            while running.status != 'running':
+                await asyncio.sleep(0.02)
+            cancelled_at = time.time()
+            queue.cancel(running.id)
+            reported = (running.status, running.stage)
+            while waiting.finished_at is None:
+                await asyncio.sleep(0.02)
+            return running, waiting, reported, cancelled_at
+        finally:
+            queue.shutdown()
+
+    running, waiting, reported, cancelled_at = asyncio.run(main())
+
+    assert reported == ('running', 'cancelling')
+    assert (running.status, running.stage) == ('cancelled', 'cancelled')
+    assert waiting.status == 'succeeded'
+    # The worker was freed long before the 5 s the job would have taken
+    assert waiting.result['start'] - cancelled_at < 1.0
+    assert discarded == []
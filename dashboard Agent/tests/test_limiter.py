@@ -0,0 +1,102 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend.limiter import ConcurrencyLimiter, ConcurrencyLimitExceeded
+from backend.semantic_cache import SemanticCache
+from backend.sessions import InMemorySessionStore
+
+
+def free_slots(limiter):
+    # Every slot is either free in the semaphore or counted as active
+    return limiter._semaphore._value
+
+
+def test_requests_beyond_the_queue_are_rejected():
+    async def scenario():
+        limiter = ConcurrencyLimiter(max_concurrent=1, max_queued=1, queue_timeout=5)
+        started = await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(ConcurrencyLimitExceeded) as rejected:
+            await limiter.acquire()
+        limiter.release(started)
+        limiter.release(await waiter)
+        return limiter, rejected.value
+
+    limiter, rejected = asyncio.run(scenario())
+
+    assert rejected.retry_after >= 1
+    assert limiter.stats()["rejected"] == 1 and limiter.stats()["completed"] == 2
+    assert limiter.active == limiter.queued == 0 and free_slots(limiter) == 1
+
+
+def test_a_waiter_that_times_out_is_rejected_and_holds_no_slot():
+    async def scenario():
+        limiter = ConcurrencyLimiter(max_concurrent=1, max_queued=1, queue_timeout=0.05)
+        started = await limiter.acquire()
+        with pytest.raises(ConcurrencyLimitExceeded, match="no slot free after 0.05s"):
+            await limiter.acquire()
+        limiter.release(started)
+        return limiter
+
+    limiter = asyncio.run(scenario())
+
+    assert limiter.queued == limiter.active == 0 and free_slots(limiter) == 1
+
+
+def test_a_waiter_cancelled_as_its_slot_frees_up_does_not_keep_it():
+    async def scenario():
+        limiter = ConcurrencyLimiter(max_concurrent=1, max_queued=1, queue_timeout=5)
+        started = await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        # The slot is handed to the waiter, which is cancelled (e.g. the client left) before it resumes
+        limiter.release(started)
+        waiter.cancel()
+        results = await asyncio.gather(waiter, return_exceptions=True)
+        return limiter, results
+
+    limiter, results = asyncio.run(scenario())
+
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert limiter.active == limiter.queued == 0 and free_slots(limiter) == 1
+
+
+class BlockingAgent:
+    """Agent whose runs wait until the test lets them finish."""
+
+    def __init__(self):
+        self.running = asyncio.Event()
+        self.finish = asyncio.Event()
+
+    async def ainvoke(self, inputs, config=None):
+        self.running.set()
+        await self.finish.wait()
+        return {"output": f"You said: {inputs['input']}", "intermediate_steps": []}
+
+
+def test_chat_returns_429_once_the_queue_is_full(monkeypatch):
+    import backend.main as main
+    monkeypatch.setattr(main, 'chat_limiter', ConcurrencyLimiter(max_concurrent=1, max_queued=0))
+    monkeypatch.setattr(main, 'chat_cache', SemanticCache(max_entries=0))
+    monkeypatch.setattr(main, 'session_store', InMemorySessionStore())
+
+    async def scenario():
+        agent = BlockingAgent()
+        monkeypatch.setattr(main, 'agent_executor', agent)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            first = asyncio.create_task(http.post("/chat", json={"message": "hello"}))
+            await agent.running.wait()
+            rejected = await http.post("/chat", json={"message": "hello again"})
+            agent.finish.set()
+            return await first, rejected
+
+    first, rejected = asyncio.run(scenario())
+
+    assert first.status_code == 200 and first.json()["reply"] == "You said: hello"
+    assert rejected.status_code == 429
+    assert int(rejected.headers["Retry-After"]) >= 1
+    assert main.chat_limiter.stats()["rejected"] == 1 and main.chat_limiter.active == 0
@@ -0,0 +1,116 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from sklearn.linear_model import Ridge
+
+from conftest import FEATURE_NAMES
+from ml.compiled_forest import CompiledForest
+from ml.model_file import (
+    BUNDLE_FILE, ModelFileError, convert_artifacts, load_model_file, save_model_file, verify_model_file,
+)
+from ml.preprocessing import save_model_artifacts
+
+METADATA = {'model_type': 'RandomForestRegressor', 'metrics': {'rmse': np.float64(0.5)}}
+
+
+@pytest.fixture
+def bundle_path(tmp_path, forest, scaler):
+    path = str(tmp_path / BUNDLE_FILE)
+    save_model_file(path, forest, scaler, FEATURE_NAMES, METADATA)
+    return path
+
+
+def corrupt(path, offset_from_end, value=b'\xff'):
+    with open(path, 'r+b') as f:
+        f.seek(-offset_from_end, os.SEEK_END)
+        f.write(value)
+
+
+@pytest.mark.parametrize('mmap_mode', ['r', None])
+def test_forest_round_trip_predicts_exactly_like_sklearn(bundle_path, forest, scaler, housing_data, mmap_mode):
+    model, loaded_scaler, feature_names, metadata = load_model_file(bundle_path, mmap_mode=mmap_mode, verify=True)
+
+    X = housing_data[0]
+    assert isinstance(model, CompiledForest)
+    np.testing.assert_allclose(model.predict(X), forest.predict(X), rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(loaded_scaler.transform(X), scaler.transform(X))
+    np.testing.assert_array_equal(loaded_scaler.feature_medians_, scaler.feature_medians_)
+    assert feature_names == FEATURE_NAMES
+    assert metadata == {'model_type': 'RandomForestRegressor', 'metrics': {'rmse': 0.5}}
+
+
+def test_other_models_round_trip_as_pickles(tmp_path, scaler, housing_data):
+    X, y = housing_data
+    ridge = Ridge().fit(X, y)
+    path = str(tmp_path / BUNDLE_FILE)
+    save_model_file(path, ridge, scaler, FEATURE_NAMES, {})
+
+    model, _, _, _ = load_model_file(path)
+
+    np.testing.assert_array_equal(model.predict(X), ridge.predict(X))
+
+
+def test_concurrent_saves_to_one_path_leave_a_valid_file(tmp_path, forest, scaler):
+    path = str(tmp_path / BUNDLE_FILE)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda i: save_model_file(path, forest, scaler, FEATURE_NAMES, {'writer': i}), range(8)))
+
+    verify_model_file(path)
+    assert os.listdir(tmp_path) == [BUNDLE_FILE]
+
+
+def test_convert_artifacts_writes_an_equivalent_bundle(tmp_path, forest, scaler, housing_data):
+    save_model_artifacts(forest, scaler, FEATURE_NAMES, METADATA, str(tmp_path))
+
+    path = convert_artifacts(str(tmp_path))
+
+    model, _, _, _ = load_model_file(path)
+    np.testing.assert_allclose(model.predict(housing_data[0]), forest.predict(housing_data[0]), rtol=0, atol=1e-12)
+    assert convert_artifacts(str(tmp_path / 'empty')) is None
+
+
+def test_data_corruption_is_caught_by_verification(bundle_path):
+    corrupt(bundle_path, 100)
+
+    with pytest.raises(ModelFileError, match="checksum"):
+        verify_model_file(bundle_path)
+    with pytest.raises(ModelFileError, match="checksum"):
+        load_model_file(bundle_path, verify=True)
+    with pytest.raises(ModelFileError, match="checksum"):
+        load_model_file(bundle_path, mmap_mode=None, verify=True)
+
+
+def test_header_corruption_is_always_caught(bundle_path):
+    with open(bundle_path, 'r+b') as f:
+        f.seek(40)
+        byte = f.read(1)
+        f.seek(40)
+        f.write(bytes([byte[0] ^ 0xff]))
+
+    with pytest.raises(ModelFileError, match="header"):
+        load_model_file(bundle_path)
+
+
+def test_bad_magic_and_truncation_are_rejected(bundle_path, tmp_path):
+    not_a_bundle = tmp_path / 'model.pkl'
+    not_a_bundle.write_bytes(b'\x80\x04' + b'not a bundle' * 8)
+    with pytest.raises(ModelFileError, match="magic"):
+        load_model_file(str(not_a_bundle))
+
+    size = os.path.getsize(bundle_path)
+    with open(bundle_path, 'r+b') as f:
+        f.truncate(size - 64)
+    with pytest.raises(ModelFileError, match="truncated"):
+        load_model_file(bundle_path)
+
+
+def test_newer_format_version_is_rejected(bundle_path):
+    with open(bundle_path, 'r+b') as f:
+        f.seek(8)
+        f.write((99).to_bytes(4, 'little'))
+
+    with pytest.raises(ModelFileError, match="newer"):
+        load_model_file(bundle_path)
@@ -0,0 +1,49 @@
+import numpy as np
+
+from ml.model_search import search_models
+
+SPACE = {
+    'random_forest': {'n_estimators': [5], 'max_depth': [4, 8]},
+    'linear': {'alpha': [1.0]},
+}
+
+
+def test_search_times_every_first_fold_model(housing_data):
+    X, y = housing_data
+
+    result = search_models(X, y, space=SPACE, folds=2, latency_budget_ms=None, max_workers=2)
+
+    assert result['configurations'] == 3
+    assert len(result['results']) == 3
+    for row in result['results']:
+        assert row['folds_run'] >= 1
+        assert np.isfinite(row['p99_ms']) and row['p99_ms'] > 0
+    assert set(result['latency']) == {'p50_ms', 'p99_ms', 'batch_ms', 'batch_size'}
+
+
+def test_search_drops_configurations_over_the_latency_budget(housing_data):
+    X, y = housing_data
+
+    result = search_models(X, y, space=SPACE, folds=2, latency_budget_ms=1e-6, max_workers=2)
+
+    # Nothing fits a budget this small, so nothing is pruned for latency and the fastest model wins
+    assert not result['within_budget']
+    assert all('over budget' not in (row['pruned'] or '') for row in result['results'])
+
+
+def test_search_from_a_dataframe_uses_positional_rows(housing_data):
+    import pandas as pd
+
+    from conftest import FEATURE_NAMES
+    from ml.model_trainer import train_model
+
+    X, y = housing_data
+    df = pd.DataFrame(X, columns=FEATURE_NAMES).assign(target=y)
+
+    model, _, metrics, feature_names = train_model(
+        df, 'search', {'space': SPACE, 'folds': 2, 'latency_budget_ms': None, 'max_workers': 2}
+    )
+
+    assert feature_names == FEATURE_NAMES
+    assert metrics['search']['configurations'] == 3
+    assert type(model).__name__ in ('RandomForestRegressor', 'Ridge')
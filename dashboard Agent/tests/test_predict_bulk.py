@@ -0,0 +1,39 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from conftest import FEATURE_NAMES
+from ml.registry import make_bundle
+
+
+@pytest.fixture
+def main(monkeypatch, forest, scaler):
+    import backend.main as main
+    monkeypatch.setattr(main, 'bundle', make_bundle(forest, scaler, FEATURE_NAMES, {}, 'v1'))
+    return main
+
+
+def test_predict_bulk_runs_the_model_off_the_event_loop(main, monkeypatch, forest, scaler, housing_data):
+    threads = []
+    predict_rows = main.predict_rows
+
+    def recording_predict_rows(*args):
+        threads.append(threading.get_ident())
+        return predict_rows(*args)
+
+    monkeypatch.setattr(main, 'predict_rows', recording_predict_rows)
+    X = housing_data[0][:5]
+    request = main.BulkPredictionRequest(data=[dict(zip(FEATURE_NAMES, row)) for row in X.tolist()])
+
+    async def call():
+        return threading.get_ident(), await main.predict_bulk(request, SimpleNamespace(state=SimpleNamespace()), "")
+
+    loop_thread, response = asyncio.run(call())
+
+    assert threads and threads[0] != loop_thread
+    assert response['count'] == 5
+    np.testing.assert_allclose(response['predictions'], forest.predict(scaler.transform(X)) * 100000)
+    assert response['prediction_std'] is None
@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+import pytest
+
+import backend.prediction_cache as prediction_cache_module
+from backend.prediction_cache import PredictionCache
+from backend.semantic_cache import SemanticCache
+from conftest import FEATURE_NAMES
+from ml.registry import make_bundle
+
+QUESTION = "What is the price with MedInc 5?"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(prediction_cache_module, 'time', SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_prediction_cache_evicts_the_least_recently_used_entry():
+    cache = PredictionCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert cache.stats()['evictions'] == 1 and cache.stats()['size'] == 2
+
+
+def test_prediction_cache_entries_expire(clock):
+    cache = PredictionCache(ttl_seconds=10)
+    cache.put('a', 1)
+
+    clock[0] += 9.9
+    assert cache.get('a') == 1
+    clock[0] += 0.1
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1 and cache.stats()['size'] == 0
+
+
+def test_prediction_cache_keys_share_filled_and_rounded_features(forest, scaler):
+    cache = PredictionCache(decimals=4)
+    bundle = make_bundle(forest, scaler, FEATURE_NAMES, {}, 'v1')
+    medians = dict(zip(FEATURE_NAMES, scaler.feature_medians_))
+    noisy = {name: value + 1e-7 for name, value in medians.items()}
+
+    assert cache.key_for(bundle, {}) == cache.key_for(bundle, medians) == cache.key_for(bundle, noisy)
+    assert cache.key_for(bundle, {'MedInc': 5.0}) != cache.key_for(bundle, {'MedInc': 5.1})
+    assert cache.key_for(make_bundle(forest, scaler, FEATURE_NAMES, {}, 'v2'), {}) != cache.key_for(bundle, {})
+
+
+def test_model_swap_invalidates_both_caches(monkeypatch, forest, scaler):
+    import backend.main as main
+    monkeypatch.setattr(main, 'prediction_cache', PredictionCache())
+    monkeypatch.setattr(main, 'chat_cache', SemanticCache())
+    monkeypatch.setattr(main, 'bundle', make_bundle(forest, scaler, FEATURE_NAMES, {}, 'v1'))
+    main.prediction_cache.put('a', 1)
+    main.chat_cache.add(QUESTION, {'reply': 'About $250,000.'}, 'v1')
+
+    main.set_bundle(make_bundle(forest, scaler, FEATURE_NAMES, {}, 'v1'))
+    assert main.prediction_cache.get('a') == 1
+
+    main.set_bundle(make_bundle(forest, scaler, FEATURE_NAMES, {}, 'v2'))
+    assert main.prediction_cache.get('a') is None
+    assert main.chat_cache.lookup(QUESTION, 'v1') is None
+    assert main.prediction_cache.stats()['invalidations'] == 1
+    assert main.chat_cache.stats()['invalidations'] == 1
@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import FEATURE_NAMES
+from ml.preprocessing import ServingPreprocessor, preprocess_data
+
+TRAINING_CSV = os.path.join(os.path.dirname(__file__), '..', 'data', 'california_housing.csv')
+
+
+@pytest.fixture(scope='module')
+def training_frame():
+    df = pd.read_csv(TRAINING_CSV)
+    rng = np.random.RandomState(0)
+    for name in ('MedInc', 'HouseAge', 'AveOccup', 'Longitude'):
+        df.loc[rng.choice(len(df), 50, replace=False), name] = np.nan
+    return df
+
+
+@pytest.fixture(scope='module')
+def fitted(training_frame):
+    X_scaled, _, scaler = preprocess_data(training_frame)
+    return X_scaled, scaler
+
+
+def test_serving_matches_training_preprocessing(training_frame, fitted):
+    X_scaled, scaler = fitted
+    preprocessor = ServingPreprocessor(FEATURE_NAMES, scaler)
+    rows = training_frame[FEATURE_NAMES].to_dict('records')
+
+    np.testing.assert_allclose(preprocessor.transform(rows), X_scaled, rtol=1e-12, atol=1e-12)
+
+
+def test_missing_values_are_imputed_with_the_training_medians(training_frame, fitted):
+    X_scaled, scaler = fitted
+    preprocessor = ServingPreprocessor(FEATURE_NAMES, scaler)
+    incomplete = training_frame.index[training_frame[FEATURE_NAMES].isna().any(axis=1)][:20]
+    rows = training_frame.loc[incomplete, FEATURE_NAMES].to_dict('records')
+    # Serving requests may also leave a feature out altogether
+    absent = [{name: value for name, value in row.items() if not pd.isna(value)} for row in rows]
+
+    assert len(rows) == 20
+    np.testing.assert_allclose(scaler.feature_medians_, training_frame[FEATURE_NAMES].median())
+    np.testing.assert_allclose(preprocessor.transform(rows), X_scaled[incomplete], rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(preprocessor.transform(absent), X_scaled[incomplete], rtol=1e-12, atol=1e-12)
+
+
+def test_a_single_row_uses_the_preallocated_buffer(training_frame, fitted):
+    X_scaled, scaler = fitted
+    preprocessor = ServingPreprocessor(FEATURE_NAMES, scaler)
+    out = np.empty((4, len(FEATURE_NAMES)))
+
+    scaled = preprocessor.transform(training_frame.loc[0, FEATURE_NAMES].to_dict(), out=out)
+
+    assert scaled.shape == (1, len(FEATURE_NAMES)) and np.shares_memory(scaled, out)
+    np.testing.assert_allclose(scaled[0], X_scaled[0], rtol=1e-12, atol=1e-12)
@@ -0,0 +1,106 @@
+import asyncio
+import os
+
+import pytest
+
+import ml.registry as registry
+from conftest import FEATURE_NAMES
+from ml.registry import (
+    activate_version, current_version, list_versions, load_bundle, make_bundle, publish_version, rollback,
+)
+
+
+@pytest.fixture
+def publish(tmp_path, forest, scaler):
+    models_dir = str(tmp_path / 'models')
+
+    def publish(activate=True, keep=5):
+        return publish_version(forest, scaler, FEATURE_NAMES, {}, models_dir, activate=activate, keep=keep)
+
+    publish.models_dir = models_dir
+    return publish
+
+
+def test_a_failed_publish_leaves_nothing_behind(publish, monkeypatch, forest, scaler):
+    first = publish()
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    # The last write before the version directory is renamed into place
+    monkeypatch.setattr(registry, 'save_holdout', fail)
+    with pytest.raises(OSError):
+        publish_version(forest, scaler, FEATURE_NAMES, {}, publish.models_dir, holdout=([], []))
+
+    assert list_versions(publish.models_dir) == [first]
+    assert os.listdir(os.path.join(publish.models_dir, registry.VERSIONS_DIR)) == [first]
+    assert current_version(publish.models_dir) == first
+
+
+def test_publish_only_activates_complete_versions(publish):
+    version = publish(activate=False)
+
+    assert current_version(publish.models_dir) is None
+    assert load_bundle(publish.models_dir, version, engine='mmap').version == version
+    activate_version(publish.models_dir, version)
+    assert current_version(publish.models_dir) == version
+    with pytest.raises(ValueError, match="Unknown model version"):
+        activate_version(publish.models_dir, 'missing')
+
+
+def test_pruning_keeps_the_newest_versions(publish):
+    versions = [publish() for _ in range(7)]
+
+    assert list_versions(publish.models_dir) == versions[2:]
+
+
+def test_pruning_never_deletes_the_active_version_or_its_rollback_target(publish):
+    versions = [publish() for _ in range(3)]
+    rollback(publish.models_dir)
+    # Training output published but not yet activated pushes the old versions out
+    newer = [publish(activate=False) for _ in range(5)]
+
+    assert current_version(publish.models_dir) == versions[1]
+    assert list_versions(publish.models_dir) == versions[:2] + newer
+    assert rollback(publish.models_dir).version == versions[0]
+
+
+def test_rollback_switches_current(publish):
+    versions = [publish() for _ in range(3)]
+
+    bundle = rollback(publish.models_dir)
+
+    assert bundle.version == versions[1]
+    assert current_version(publish.models_dir) == versions[1]
+    assert rollback(publish.models_dir, versions[2]).version == versions[2]
+    assert current_version(publish.models_dir) == versions[2]
+    with pytest.raises(ValueError, match="Unknown model version"):
+        rollback(publish.models_dir, 'missing')
+    rollback(publish.models_dir, versions[0])
+    with pytest.raises(ValueError, match="No earlier model version"):
+        rollback(publish.models_dir)
+
+
+def test_watcher_picks_up_a_new_current_version(publish, monkeypatch, forest, scaler):
+    import backend.main as main
+    first, second = publish(), publish(activate=False)
+    monkeypatch.setattr(main, 'MODELS_DIR', publish.models_dir)
+    monkeypatch.setattr(main, 'MODEL_ENGINE', 'mmap')
+    monkeypatch.setattr(main, 'MODEL_WATCH_INTERVAL_S', 0.01)
+    monkeypatch.setattr(main, 'bundle', make_bundle(forest, scaler, FEATURE_NAMES, {}, first))
+
+    async def scenario():
+        watcher = asyncio.create_task(main.watch_current_version())
+        try:
+            await asyncio.sleep(0.05)
+            unchanged = main.bundle.version
+            activate_version(publish.models_dir, second)
+            for _ in range(200):
+                if main.bundle.version == second:
+                    break
+                await asyncio.sleep(0.01)
+            return unchanged, main.bundle.version
+        finally:
+            watcher.cancel()
+
+    assert asyncio.run(scenario()) == (first, second)
@@ -0,0 +1,111 @@
+import asyncio
+
+import httpx
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import mean_squared_error
+
+from conftest import FEATURE_NAMES
+from ml.model_trainer import retrain_incremental, retrain_with_user_data, train_model
+from ml.preprocessing import load_holdout, preprocess_arrays
+from ml.registry import publish_version, resolve_version
+
+
+@pytest.fixture(scope='module')
+def base_frame(housing_data):
+    X, y = housing_data
+    df = pd.DataFrame(X, columns=FEATURE_NAMES)
+    df['target'] = y
+    return df
+
+
+@pytest.fixture(scope='module')
+def trained(base_frame):
+    return train_model(base_frame.iloc[:300], return_holdout=True)
+
+
+@pytest.fixture
+def upload(base_frame):
+    return base_frame.iloc[300:330].reset_index(drop=True)
+
+
+def test_train_model_returns_its_unscaled_holdout(trained, base_frame):
+    model, scaler, metrics, _, (X_holdout, y_holdout) = trained
+
+    assert X_holdout.shape == (60, len(FEATURE_NAMES))
+    rows = base_frame.iloc[:300].set_index('target').loc[y_holdout, FEATURE_NAMES].to_numpy()
+    np.testing.assert_allclose(X_holdout, rows, atol=1e-12)
+    rmse = np.sqrt(mean_squared_error(y_holdout, model.predict(scaler.transform(X_holdout))))
+    assert rmse == pytest.approx(metrics['rmse'])
+
+
+def test_publish_version_stores_the_holdout(tmp_path, trained):
+    model, scaler, metrics, feature_names, holdout = trained
+    models_dir = str(tmp_path)
+
+    publish_version(model, scaler, feature_names, {'metrics': metrics}, models_dir, holdout=holdout)
+
+    X_holdout, y_holdout = load_holdout(resolve_version(models_dir)[1])
+    np.testing.assert_array_equal(X_holdout, holdout[0])
+    np.testing.assert_array_equal(y_holdout, holdout[1])
+
+
+def test_incremental_retrain_scores_on_the_parent_holdout(trained, upload):
+    model, scaler, metrics, feature_names, holdout = trained
+    metadata = {'metrics': metrics, 'training_samples': metrics['training_samples']}
+
+    new_model, _, new_metrics, _, (X_eval, y_eval) = retrain_incremental(
+        upload, model, scaler, feature_names, metadata, holdout=holdout, return_holdout=True
+    )
+
+    assert len(y_eval) == len(holdout[1]) + 6
+    np.testing.assert_array_equal(X_eval[6:], holdout[0])
+    X_scaled, _, _ = preprocess_arrays(X_eval.copy(), y_eval, scaler=scaler, fit_scaler=False)
+    rmse = np.sqrt(mean_squared_error(y_eval, new_model.predict(X_scaled)))
+    assert new_metrics['rmse'] == pytest.approx(rmse)
+    assert new_model.n_estimators == model.n_estimators + new_metrics['trees_added']
+
+
+def test_incremental_retrain_rejects_mismatched_columns(trained, upload):
+    model, scaler, metrics, feature_names, _ = trained
+
+    with pytest.raises(ValueError, match="full refit"):
+        retrain_incremental(upload.drop(columns=['Population']), model, scaler, feature_names, {'metrics': metrics})
+
+
+def test_explicit_incremental_with_mismatched_columns_falls_back_to_full(tmp_path, trained, upload):
+    model, scaler, metrics, feature_names, _ = trained
+    current = (model, scaler, feature_names, {'metrics': metrics, 'training_samples': 240})
+
+    result = retrain_with_user_data(upload.drop(columns=['Population']), str(tmp_path / 'missing.csv'),
+                                    current=current, mode='incremental')
+
+    assert result[2]['retrain_mode'] == 'full'
+    assert result[2]['retrain_reason'] == 'uploaded columns differ from the model features'
+
+
+def test_retrain_endpoint_rejects_unknown_columns_before_queueing(tmp_path, monkeypatch, base_frame):
+    import backend.main as main
+    base_path = tmp_path / 'base.csv'
+    base_frame.iloc[:5].to_csv(base_path, index=False)
+    monkeypatch.setattr(main, 'BASE_DATA_PATH', str(base_path))
+    monkeypatch.setattr(main, 'UPLOADS_DIR', str(tmp_path / 'uploads'))
+    submitted = []
+    monkeypatch.setattr(main, 'submit_training_job', lambda *args, **kwargs: submitted.append(args))
+
+    async def post(frame):
+        upload = frame.to_csv(index=False).encode()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await http.post("/retrain", files={"file": ("houses.csv", upload, "text/csv")})
+
+    response = asyncio.run(post(base_frame.iloc[:3].assign(Garage=1, Pool=0)))
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Uploaded columns not in the base dataset: Garage, Pool"
+    assert submitted == []
+
+    # Missing feature columns are fine: they are imputed
+    assert asyncio.run(post(base_frame.iloc[:3].drop(columns=['Population']))).status_code == 202
+    assert len(submitted) == 1
@@ -0,0 +1,47 @@
+import pytest
+
+from backend.semantic_cache import SemanticCache
+
+QUESTION = "What is the price for 3 bedrooms with MedInc 5?"
+PARAPHRASE = "Price of a home with 3 bedrooms and MedInc 5"
+
+
+def similarity(cache, first, second):
+    return float(cache.embedder.embed(first) @ cache.embedder.embed(second))
+
+
+def test_semantic_cache_hits_only_above_the_threshold():
+    score = similarity(SemanticCache(), QUESTION, PARAPHRASE)
+    below, above = SemanticCache(threshold=score - 0.01), SemanticCache(threshold=score + 0.01)
+    for cache in (below, above):
+        cache.add(QUESTION, {'reply': 'About $250,000.'}, 'v1')
+
+    assert 0.5 < score < 1.0
+    assert below.lookup(PARAPHRASE, 'v1') == ({'reply': 'About $250,000.'}, pytest.approx(score))
+    assert above.lookup(PARAPHRASE, 'v1') is None
+    assert above.lookup(QUESTION, 'v1')[1] == pytest.approx(1.0)
+    assert below.lookup(PARAPHRASE, 'v2') is None
+    assert below.lookup("Tell me about the weather", 'v1') is None
+
+
+def test_semantic_cache_never_matches_different_numbers():
+    cache = SemanticCache(threshold=0.5)
+    cache.add(QUESTION, {'reply': '3 bedrooms'}, 'v1')
+    other = "What is the price for 4 bedrooms with MedInc 5?"
+
+    # Similar enough to hit, but asks about another house
+    assert similarity(cache, QUESTION, other) > cache.threshold
+    assert cache.lookup(other, 'v1') is None
+    assert cache.lookup(PARAPHRASE, 'v1')[0] == {'reply': '3 bedrooms'}
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_semantic_cache_evicts_the_oldest_entry():
+    cache = SemanticCache(max_entries=2)
+    questions = [f"What is the price with MedInc {n}?" for n in (1, 2, 3)]
+    for question in questions:
+        cache.add(question, question, 'v1')
+
+    assert cache.lookup(questions[0], 'v1') is None
+    assert [cache.lookup(q, 'v1')[0] for q in questions[1:]] == questions[1:]
+    assert cache.stats()['evictions'] == 1 and len(cache.index) == 2
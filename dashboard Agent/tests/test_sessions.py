@@ -0,0 +1,90 @@
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+import backend.sessions as sessions
+from backend.sessions import create_session_store, trim_history
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_store(request, tmp_path, monkeypatch):
+    # SQLite evicts by update time; a ticking clock keeps back-to-back appends ordered
+    clock = itertools.count(1000)
+    monkeypatch.setattr(sessions, 'time', SimpleNamespace(time=lambda: float(next(clock))))
+    path = str(tmp_path / 'sessions' / 'chat.db')
+
+    def make_store(**kwargs):
+        return create_session_store(request.param, path, **kwargs)
+
+    make_store.kind = request.param
+    return make_store
+
+
+def turn(text):
+    return [{"role": "user", "content": text}, {"role": "assistant", "content": f"re: {text}"}]
+
+
+def test_history_round_trips(make_store):
+    store = make_store()
+
+    assert store.get('a') is None
+    store.append('a', turn("hi"))
+    store.append('a', turn("again"))
+
+    assert store.get('a') == turn("hi") + turn("again")
+    assert store.stats()["backend"] == make_store.kind and store.stats()["sessions"] == 1
+
+
+def test_only_the_latest_messages_are_kept(make_store):
+    store = make_store(max_messages=4)
+
+    for text in ("one", "two", "three"):
+        store.append('a', turn(text))
+
+    assert store.get('a') == turn("two") + turn("three")
+
+
+def test_the_oldest_sessions_expire_beyond_max_sessions(make_store):
+    store = make_store(max_sessions=2)
+
+    store.append('a', turn("first"))
+    store.append('b', turn("second"))
+    store.append('a', turn("a is updated"))
+    store.append('c', turn("third"))
+
+    assert store.get('b') is None
+    assert store.get('a') == turn("first") + turn("a is updated")
+    assert store.get('c') == turn("third")
+    assert store.stats()["sessions"] == 2 and store.stats()["evictions"] == 1
+
+
+def test_delete_forgets_a_session(make_store):
+    store = make_store()
+    store.append('a', turn("hi"))
+
+    assert store.delete('a') is True
+    assert store.get('a') is None
+    assert store.delete('a') is False
+
+
+def test_sqlite_sessions_survive_a_restart(tmp_path):
+    path = str(tmp_path / 'chat.db')
+    create_session_store('sqlite', path).append('a', turn("hi"))
+
+    assert create_session_store('sqlite', path).get('a') == turn("hi")
+
+
+def test_unknown_store_is_rejected():
+    with pytest.raises(ValueError, match="Unknown session store"):
+        create_session_store('redis')
+
+
+def test_trim_history_keeps_the_newest_messages_that_fit():
+    messages = turn("x" * 40) + turn("y" * 40)
+
+    # Each message costs 4 overhead tokens plus a quarter of its length
+    assert trim_history(messages, None) == messages
+    assert trim_history(messages, 31) == turn("y" * 40)
+    # A budget that only fits the last reply drops it rather than start on an assistant message
+    assert trim_history(messages, 16) == []
@@ -0,0 +1,58 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import FEATURE_NAMES
+from ml.compiled_forest import CompiledForest
+from ml.model_file import BUNDLE_FILE
+from ml.registry import publish_version, resolve_version
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch, forest, scaler):
+    import backend.main as main
+    models_dir = str(tmp_path / 'models')
+    version = publish_version(forest, scaler, FEATURE_NAMES, {}, models_dir)
+    monkeypatch.setattr(main, 'MODELS_DIR', models_dir)
+    monkeypatch.setattr(main, 'MODEL_ENGINE', 'mmap')
+    return main, version, os.path.join(resolve_version(models_dir)[1], BUNDLE_FILE)
+
+
+def test_startup_loads_the_memory_mapped_bundle(backend):
+    main, version, _ = backend
+
+    bundle = main.load_startup_bundle()
+
+    assert bundle.version == version
+    assert isinstance(bundle.model, CompiledForest)
+
+
+def test_startup_falls_back_to_pickles_for_a_corrupt_bundle(backend):
+    main, version, bundle_path = backend
+    with open(bundle_path, 'r+b') as f:
+        f.write(b'garbage!')
+
+    bundle = main.load_startup_bundle()
+
+    assert bundle.version == version
+    assert not isinstance(bundle.model, CompiledForest)
+
+
+def test_predict_profile_does_not_import_the_training_stack():
+    # A fresh interpreter: this test process has already imported all of them
+    code = (
+        "import json, sys\n"
+        "import backend.main\n"
+        "print(json.dumps(sorted(name for name in ('langchain', 'langchain_core', 'langchain_openai',"
+        " 'pandas', 'sklearn') if name in sys.modules)))\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, SERVER_PROFILE='predict')
+
+    output = subprocess.run([sys.executable, '-c', code], cwd=root, env=env,
+                            capture_output=True, text=True, check=True).stdout
+
+    assert json.loads(output.splitlines()[-1]) == []
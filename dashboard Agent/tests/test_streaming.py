@@ -0,0 +1,190 @@
+import asyncio
+import json
+
+import httpx
+import numpy as np
+import pytest
+
+from conftest import FEATURE_NAMES
+from backend.streaming import LineTooLong, iter_lines, iter_record_chunks, open_multipart_file
+from ml.registry import make_bundle
+
+CSV_BODY = b"MedInc,HouseAge\r\n1.5,10\n2.5,20\r\n\n3.5,30"
+
+
+async def from_chunks(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def collect(agen):
+    async def run():
+        return [item async for item in agen]
+    return asyncio.run(run())
+
+
+def split_every(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+def test_lines_are_the_same_for_any_chunk_boundaries(size):
+    lines = collect(iter_lines(from_chunks(split_every(CSV_BODY, size))))
+
+    assert lines == ["MedInc,HouseAge", "1.5,10", "2.5,20", "", "3.5,30"]
+
+
+def test_long_lines_are_rejected_before_they_are_buffered():
+    consumed = []
+
+    async def endless():
+        while True:
+            consumed.append(1)
+            yield b"x" * 1000
+
+    with pytest.raises(LineTooLong):
+        collect(iter_lines(endless(), max_line_bytes=10_000))
+    assert len(consumed) <= 11
+
+
+def parse(body, input_format="csv", chunk_size=1000, size=5, max_record_bytes=1 << 20):
+    lines = iter_lines(from_chunks(split_every(body, size)))
+    return collect(iter_record_chunks(lines, input_format, chunk_size, max_record_bytes))
+
+
+def test_csv_rows_are_chunked_and_numbered():
+    chunks = parse(CSV_BODY, chunk_size=2)
+
+    assert chunks == [
+        ([(0, {"MedInc": 1.5, "HouseAge": 10.0}), (1, {"MedInc": 2.5, "HouseAge": 20.0})], []),
+        ([(2, {"MedInc": 3.5, "HouseAge": 30.0})], []),
+    ]
+
+
+def test_quoted_fields_may_contain_newlines_and_quotes():
+    body = b'"Med\nInc","House ""Age"""\n"1.5\n",10\n2.5,"2\n0"\n3.5,30\n'
+
+    (rows, errors), = parse(body, size=3)
+
+    assert rows == [(0, {"Med\nInc": 1.5, 'House "Age"': 10.0}), (2, {"Med\nInc": 3.5, 'House "Age"': 30.0})]
+    assert errors == [(1, "line 5: could not convert string to float: '2\\n0'")]
+
+
+def test_bad_rows_are_reported_on_their_own():
+    body = b"MedInc,HouseAge\n1.5,10\nabc,20\n3.5\n4.5,40\n"
+
+    (rows, errors), = parse(body)
+
+    assert rows == [(0, {"MedInc": 1.5, "HouseAge": 10.0}), (3, {"MedInc": 4.5, "HouseAge": 40.0})]
+    assert [row for row, _ in errors] == [1, 2]
+    assert errors[0][1].startswith("line 3: could not convert")
+    assert errors[1][1] == "line 4: expected 2 columns, got 1"
+
+
+def test_bad_ndjson_rows_are_reported_on_their_own():
+    body = b'{"MedInc": 1.5}\nnot json\n[1, 2]\n{"features": {"MedInc": 2.5}}\n'
+
+    (rows, errors), = parse(body, input_format="ndjson")
+
+    assert rows == [(0, {"MedInc": 1.5}), (3, {"MedInc": 2.5})]
+    assert [row for row, _ in errors] == [1, 2]
+    assert errors[1][1] == "line 3: expected a JSON object"
+
+
+def test_unterminated_quotes_are_capped():
+    body = b'MedInc\n"1.5\n' + b"2\n" * 100
+
+    with pytest.raises(LineTooLong):
+        parse(body, max_record_bytes=50)
+
+
+def multipart_body(boundary, data):
+    return (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="note"\r\n\r\n'
+        "not the file\r\n"
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="houses.csv"\r\n'
+        "Content-Type: text/csv\r\n\r\n"
+    ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+
+
+@pytest.mark.parametrize("size", [1, 13, 100000])
+def test_multipart_file_is_streamed_without_the_other_fields(size):
+    body = multipart_body("b0undary", CSV_BODY)
+
+    async def run():
+        upload = await open_multipart_file("multipart/form-data; boundary=b0undary",
+                                           from_chunks(split_every(body, size)))
+        filename, content_type, data = upload
+        return filename, content_type, b"".join([chunk async for chunk in data])
+
+    assert asyncio.run(run()) == ("houses.csv", "text/csv", CSV_BODY)
+
+
+def test_multipart_without_a_file_part():
+    body = b'--b\r\nContent-Disposition: form-data; name="note"\r\n\r\nhi\r\n--b--\r\n'
+
+    async def run():
+        return await open_multipart_file("multipart/form-data; boundary=b", from_chunks([body]))
+
+    assert asyncio.run(run()) is None
+
+
+@pytest.fixture
+def client(monkeypatch, forest, scaler):
+    import backend.main as main
+    monkeypatch.setattr(main, 'bundle', make_bundle(forest, scaler, FEATURE_NAMES, {}, 'v1'))
+
+    def post(*args, **kwargs):
+        async def run():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                return await http.post(*args, **kwargs)
+        return asyncio.run(run())
+
+    return main, post
+
+
+def feature_csv(rows):
+    lines = [",".join(FEATURE_NAMES)] + [",".join(map(str, row)) for row in rows]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def test_stream_endpoint_predicts_good_rows_and_reports_bad_ones(client, forest, scaler, housing_data):
+    main, post = client
+    X = housing_data[0][:3]
+    header, first, *rest = feature_csv(X.tolist()).splitlines(keepends=True)
+    body = b"".join([header, first, b"1,2,3\n", *rest])
+
+    response = post("/predict/stream?chunk_size=2", content=body, headers={"content-type": "text/csv"})
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["row"] for line in lines] == [0, 1, 2, 3]
+    assert "error" in lines[1]
+    expected = forest.predict(scaler.transform(X)) * 100000
+    np.testing.assert_allclose([lines[0]["predicted_price"], lines[2]["predicted_price"],
+                                lines[3]["predicted_price"]], expected)
+
+
+def test_stream_endpoint_reads_multipart_uploads(client, forest, scaler, housing_data):
+    main, post = client
+    X = housing_data[0][:4]
+
+    response = post("/predict/stream?format=csv", files={"file": ("houses.csv", feature_csv(X.tolist()), "text/csv")})
+
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert lines[0] == "row,predicted_price"
+    np.testing.assert_allclose([float(line.split(",")[1]) for line in lines[1:]],
+                               forest.predict(scaler.transform(X)) * 100000)
+
+
+def test_stream_endpoint_rejects_over_long_lines(client, monkeypatch):
+    main, post = client
+    monkeypatch.setattr(main, 'STREAM_MAX_LINE_BYTES', 100)
+
+    response = post("/predict/stream", content=b"MedInc" + b",x" * 100 + b"\n1\n", headers={"content-type": "text/csv"})
+
+    assert response.status_code == 413
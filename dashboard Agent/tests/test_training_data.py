@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import FEATURE_NAMES
+from ml.dataset_store import ColumnarDataset
+from ml.model_trainer import train_model
+from ml.preprocessing import preprocess_arrays, preprocess_data
+
+
+@pytest.fixture
+def housing_frame(housing_data):
+    X, y = housing_data
+    df = pd.DataFrame(X, columns=FEATURE_NAMES)
+    df['target'] = y
+    df.loc[[3, 50, 120], 'target'] = np.nan
+    df.loc[[7, 80], 'MedInc'] = np.nan
+    return df
+
+
+def test_preprocess_arrays_imputes_target_like_preprocess_data(housing_frame):
+    X_frame, y_frame, _ = preprocess_data(housing_frame)
+    X_arrays, y_arrays, _ = preprocess_arrays(
+        housing_frame[FEATURE_NAMES].to_numpy(dtype=np.float64, copy=True), housing_frame['target'].to_numpy(),
+        feature_names=FEATURE_NAMES,
+    )
+
+    assert not np.isnan(y_arrays).any()
+    np.testing.assert_allclose(y_arrays, y_frame.to_numpy())
+    np.testing.assert_allclose(X_arrays, X_frame)
+
+
+def test_train_model_on_columnar_dataset_with_missing_targets(housing_frame):
+    dataset = ColumnarDataset({name: housing_frame[name].to_numpy() for name in housing_frame.columns})
+
+    model, _, metrics, feature_names = train_model(dataset)
+
+    assert feature_names == FEATURE_NAMES
+    assert np.isfinite(metrics['rmse'])
+
+
+def test_append_frame_fills_missing_columns_with_nan(housing_frame):
+    dataset = ColumnarDataset({name: housing_frame[name].to_numpy() for name in housing_frame.columns})
+    upload = housing_frame.drop(columns=['Population']).head(5)
+
+    combined = dataset.append_frame(upload)
+
+    assert len(combined) == len(housing_frame) + 5
+    assert np.isnan(combined['Population'][-5:]).all()
+    np.testing.assert_array_equal(combined['MedInc'][-5:], upload['MedInc'])
+
+
+def test_append_frame_rejects_columns_the_dataset_lacks(housing_frame):
+    dataset = ColumnarDataset({name: housing_frame[name].to_numpy() for name in housing_frame.columns})
+    upload = housing_frame.head(5).assign(Garage=1.0)
+
+    with pytest.raises(ValueError, match="Garage"):
+        dataset.append_frame(upload)
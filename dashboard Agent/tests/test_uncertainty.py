@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import BaggingRegressor, GradientBoostingRegressor
+from sklearn.linear_model import Ridge
+
+from ml.compiled_forest import CompiledForest
+from ml.uncertainty import n_averaged_trees, parse_quantiles, predict_distribution
+
+QUANTILES = (0.05, 0.25, 0.5, 0.95)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("0.05,0.5,0.95", (0.05, 0.5, 0.95)),
+    ("0.95, 0.05 ,0.5", (0.05, 0.5, 0.95)),
+    ("0.5,0.5,", (0.5,)),
+    ("0,1", (0.0, 1.0)),
+    ("", ()),
+])
+def test_parse_quantiles(text, expected):
+    assert parse_quantiles(text) == expected
+
+
+@pytest.mark.parametrize("text, message", [
+    ("0.1,abc", "must be numbers, got 'abc'"),
+    ("1.5", "between 0 and 1, got 1.5"),
+    ("-0.1,0.5", "between 0 and 1, got -0.1"),
+    ("nan", "between 0 and 1"),
+])
+def test_parse_quantiles_rejects_invalid_values(text, message):
+    with pytest.raises(ValueError, match=message):
+        parse_quantiles(text)
+
+
+@pytest.mark.parametrize("compiled", [False, True])
+@pytest.mark.parametrize("max_cells", [1, 12 * 7, 1 << 20])
+def test_distribution_matches_numpy_on_the_per_tree_matrix(forest, housing_data, compiled, max_cells):
+    X = housing_data[0][:101]
+    model = CompiledForest.from_sklearn(forest) if compiled else forest
+    per_tree = np.stack([tree.predict(X.astype(np.float32)) for tree in forest.estimators_])
+
+    result = predict_distribution(model, X, QUANTILES, max_cells=max_cells)
+
+    np.testing.assert_allclose(result['mean'], forest.predict(X), rtol=0, atol=1e-12)
+    np.testing.assert_allclose(result['std'], per_tree.std(axis=0), rtol=0, atol=1e-12)
+    np.testing.assert_allclose(result['quantiles'], np.quantile(per_tree, QUANTILES, axis=0), rtol=0, atol=1e-12)
+    assert result['quantiles'].shape == (len(QUANTILES), len(X))
+
+
+def test_empty_quantiles_give_std_only(forest, housing_data):
+    X = housing_data[0][:10]
+
+    result = predict_distribution(forest, X, ())
+
+    assert result['quantiles'].shape == (0, 10)
+    assert result['std'].shape == (10,)
+
+
+def test_no_quantiles_is_a_plain_predict(forest, housing_data):
+    X = housing_data[0][:10]
+
+    result = predict_distribution(forest, X, None)
+
+    np.testing.assert_array_equal(result['mean'], forest.predict(X))
+    assert result['std'] is None and result['quantiles'] is None
+
+
+def test_models_that_do_not_average_trees_have_no_spread(forest, housing_data):
+    X, y = housing_data
+    models = [
+        Ridge().fit(X, y),
+        GradientBoostingRegressor(n_estimators=5).fit(X, y),
+        BaggingRegressor(n_estimators=3, max_features=0.5, random_state=0).fit(X, y),
+    ]
+
+    for model in models:
+        assert n_averaged_trees(model) == 0
+        result = predict_distribution(model, X[:5], QUANTILES)
+        np.testing.assert_array_equal(result['mean'], model.predict(X[:5]))
+        assert result['std'] is None and result['quantiles'] is None
+    assert n_averaged_trees(forest) == 12
@@ -1,9 +1,16 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from agent import create_agent
 
 load_dotenv()
 
+
+def build_agent(api_key):
+    # Imported here: LangChain takes seconds to load, so it loads in the
+    # background while the user types the first question
+    from agent import create_agent
+    return create_agent(api_key)
+
 def main():
     api_key = os.getenv("OPENAI_API_KEY")
     
@@ -13,7 +20,7 @@ def main():
         print("Example: OPENAI_API_KEY=sk-your-key-here")
         return
     
-    agent = create_agent(api_key)
+    agent_future = ThreadPoolExecutor(max_workers=1).submit(build_agent, api_key)
     
     print("=" * 50)
     print("Home Price Prediction Chatbot")
@@ -25,6 +32,11 @@ def main():
         user_input = input("\nYou: ").strip()
         
         if user_input.lower() in ['quit', 'exit', 'q']:
+            agent = agent_future.result() if agent_future.done() and not agent_future.exception() else None
+            if hasattr(agent, "router_stats"):
+                stats = agent.router_stats.stats()
+                print(f"Answered {stats['routed']} of {stats['requests']} questions without the LLM "
+                      f"(~{stats['latency_saved_ms'] / 1000:.1f}s saved)")
             print("Goodbye!")
             break
         
@@ -32,7 +44,7 @@ def main():
             continue
         
         try:
-            response = agent.invoke({"input": user_input})
+            response = agent_future.result().invoke({"input": user_input})
             print(f"\nAssistant: {response['output']}")
         except Exception as e:
             print(f"\nError: {e}")
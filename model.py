@@ -4,11 +4,15 @@ import os
 from sklearn.linear_model import LinearRegression
 
 MODEL_PATH = "home_price_model.pkl"
+DEFAULT_TABLE_MAX_HORIZON = 100
 
 class HomePricePredictor:
     def __init__(self):
         self.model = LinearRegression()
         self.base_price = 300000
+        self._table = None
+        self._coef = None
+        self._intercept = None
     
     def train(self):
         """Train the model with fake housing data."""
@@ -23,15 +27,53 @@ class HomePricePredictor:
         
         self.model.fit(X, y)
         self.base_price = base_price
+        self._table = None
+    
+    def compile(self, max_horizon: int = DEFAULT_TABLE_MAX_HORIZON):
+        """
+        Precompute prices for horizons 0..max_horizon so ``predict`` is a list lookup.
+        
+        Horizons beyond the table use the closed form ``intercept + coef * years``.
+        Training or loading a model drops the table again.
+        """
+        years = np.arange(max_horizon + 1)
+        self._table = self._predict_sklearn(years).tolist()
+        self._coef = float(self.model.coef_[0])
+        self._intercept = float(self.model.intercept_)
+    
+    @property
+    def compiled(self) -> bool:
+        return self._table is not None
+    
+    def _predict_sklearn(self, years) -> np.ndarray:
+        X_pred = np.asarray(years, dtype=np.float64).reshape(-1, 1)
+        return np.round(self.model.predict(X_pred), 2)
     
     def predict(self, years_from_now: int) -> float:
         """Predict home price for a given number of years from now."""
         if years_from_now < 0:
             years_from_now = 0
         
-        X_pred = np.array([[years_from_now]])
-        predicted_price = self.model.predict(X_pred)[0]
-        return round(predicted_price, 2)
+        if self._table is not None:
+            if years_from_now < len(self._table) and years_from_now == int(years_from_now):
+                return self._table[int(years_from_now)]
+            return round(self._intercept + self._coef * years_from_now, 2)
+        
+        return float(self._predict_sklearn([years_from_now])[0])
+    
+    def predict_many(self, horizons) -> np.ndarray:
+        """Predict home prices for many horizons (years from now) in one vectorized pass."""
+        years = np.maximum(np.asarray(horizons, dtype=np.float64).ravel(), 0)
+        if not years.size:
+            return years
+        if self._table is None:
+            return self._predict_sklearn(years)
+        
+        table = np.asarray(self._table)
+        in_table = (years < len(table)) & (years == np.floor(years))
+        prices = np.round(self._intercept + self._coef * years, 2)
+        prices[in_table] = table[years[in_table].astype(np.intp)]
+        return prices
     
     def save(self, path: str = MODEL_PATH):
         """Save the model to disk."""
@@ -41,6 +83,7 @@ class HomePricePredictor:
         """Load the model from disk."""
         if os.path.exists(path):
             self.model = joblib.load(path)
+            self._table = None
             return True
         return False
 
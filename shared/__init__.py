@@ -0,0 +1 @@
+"""Modules shared by the home price API and the dashboard backend."""
@@ -0,0 +1,281 @@
+"""
+Prometheus text-format metrics without a client library.
+
+Counters, gauges and labelled histograms, a registry that renders them, and
+an ASGI middleware timing every request. Used by both the home price API
+and the dashboard backend.
+"""
+import bisect
+import threading
+import time
+
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 1024, 4096, 16384)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Return the child for one set of label values (created on first use)."""
+        values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+
+class Counter(_Metric):
+    """
+    Monotonically increasing count.
+
+    With ``callback``, the value is read at scrape time instead: the callback
+    returns a number, or a dict mapping label-value tuples to numbers. This
+    exports counters the application already keeps without touching its hot path.
+    """
+    type_name = "counter"
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount=1.0):
+        self.labels().inc(amount)
+
+    def render(self):
+        if self.callback is None:
+            values = {label_values: child.value for label_values, child in list(self._children.items())}
+        else:
+            values = self.callback()
+            if not isinstance(values, dict):
+                values = {(): values}
+        lines = self._header()
+        for label_values, value in values.items():
+            if value is not None:
+                lines.append(f"{self.name}{_format_labels(self.labelnames, label_values)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """Value that can go up and down (also supports ``callback``)."""
+    type_name = "gauge"
+
+    def dec(self, amount=1.0):
+        self.labels().dec(amount)
+
+    def set(self, value):
+        self.labels().set(value)
+
+
+class _HistogramValue:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram in the Prometheus exposition format."""
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def render(self):
+        lines = self._header()
+        for values, child in list(self._children.items()):
+            with child._lock:
+                counts = list(child.counts)
+                total = child.sum
+            lines.extend(_histogram_lines(self.name, self.labelnames, values, self.buckets, counts, total))
+        return lines
+
+
+class HistogramView(_Metric):
+    """
+    Export a histogram the application already keeps (e.g. the batcher's
+    batch sizes and queue waits) as a Prometheus histogram, read at scrape time.
+
+    Args:
+        source: Object with ``buckets``, ``counts`` and ``total``
+        scale: Factor applied to bucket bounds and the sum (1e-3 turns ms into seconds)
+    """
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, source, scale=1.0):
+        super().__init__(name, documentation)
+        self.source = source
+        self.scale = scale
+
+    def render(self):
+        buckets = tuple(upper * self.scale for upper in self.source.buckets)
+        counts = list(self.source.counts)
+        return self._header() + _histogram_lines(
+            self.name, (), (), buckets, counts, self.source.total * self.scale
+        )
+
+
+def _histogram_lines(name, labelnames, values, buckets, counts, total):
+    lines = []
+    cumulative = 0
+    for upper, count in zip(tuple(buckets) + (float("inf"),), counts):
+        cumulative += count
+        le = f'le="{_format_value(float(upper))}"'
+        lines.append(f"{name}_bucket{_format_labels(labelnames, values, le)} {cumulative}")
+    lines.append(f"{name}_sum{_format_labels(labelnames, values)} {_format_value(float(total))}")
+    lines.append(f"{name}_count{_format_labels(labelnames, values)} {cumulative}")
+    return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them in the Prometheus text format (0.0.4)."""
+
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self._metrics = []
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=(), callback=None):
+        return self._register(Counter(name, documentation, labelnames, callback))
+
+    def gauge(self, name, documentation, labelnames=(), callback=None):
+        return self._register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def histogram_view(self, name, documentation, source, scale=1.0):
+        return self._register(HistogramView(name, documentation, source, scale))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency, status codes and in-flight requests.
+
+    Requests are labelled with the matched route template (``/jobs/{job_id}``,
+    not the raw path) so label cardinality stays bounded; unmatched paths are
+    grouped as "unmatched". Latency runs until the response has been sent, so
+    streaming responses are measured in full.
+
+    The request start time is left in ``request.state.metrics_started``. A
+    handler that sets ``request.state.metrics_handler_done`` and
+    ``request.state.metrics_model_version`` also gets the time from there to
+    the response start recorded as the "serialize" stage in ``stages``.
+
+    Args:
+        app: ASGI app to wrap
+        duration: Histogram labelled (method, route, status)
+        in_flight: Gauge labelled (method)
+        stages: Optional histogram labelled (stage, model_version)
+        skip_paths: Paths that are not measured
+    """
+
+    def __init__(self, app, duration, in_flight, stages=None, skip_paths=("/metrics",)):
+        self.app = app
+        self.duration = duration
+        self.in_flight = in_flight
+        self.stages = stages
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        state = scope.setdefault("state", {})
+        state["metrics_started"] = start
+        status = 500
+        in_flight = self.in_flight.labels(scope["method"])
+        in_flight.inc()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                handler_done = state.get("metrics_handler_done")
+                if handler_done is not None and self.stages is not None:
+                    self.stages.labels("serialize", state.get("metrics_model_version")).observe(
+                        time.perf_counter() - handler_done
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            path = getattr(scope.get("route"), "path", "unmatched")
+            self.duration.labels(scope["method"], path, status).observe(time.perf_counter() - start)
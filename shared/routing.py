@@ -0,0 +1,115 @@
+"""
+Router that answers plain questions with one tool call instead of the LLM.
+
+Both agents wrap their AgentExecutor in ``RoutedAgent`` with their own
+parser-based router (the intent tables stay with each agent).
+"""
+import time
+
+from langchain_core.agents import AgentAction
+from langchain_core.callbacks import AsyncCallbackManager, CallbackManager
+
+
+class RouterStats:
+    """Hit rate of the router and the LLM time it saved."""
+
+    def __init__(self):
+        self.routed = 0
+        self.fallthrough = 0
+        self.routed_ms = 0.0
+        self.agent_ms = 0.0
+
+    def stats(self):
+        total = self.routed + self.fallthrough
+        mean_routed = self.routed_ms / self.routed if self.routed else 0.0
+        mean_agent = self.agent_ms / self.fallthrough if self.fallthrough else 0.0
+        return {
+            "requests": total,
+            "routed": self.routed,
+            "fallthrough": self.fallthrough,
+            "hit_rate": self.routed / total if total else 0.0,
+            "mean_routed_ms": mean_routed,
+            "mean_agent_ms": mean_agent,
+            # Estimated from the mean agent run time; 0 until the agent has run once
+            "latency_saved_ms": self.routed * max(0.0, mean_agent - mean_routed) if self.fallthrough else 0.0,
+        }
+
+
+class RoutedAgent:
+    """
+    AgentExecutor wrapper that tries a parser-based router before the LLM.
+
+    ``router.route(text)`` returns ``(tool_name, tool_input)`` for a message
+    it can answer with one tool call, or None. Only self-contained messages
+    are routed: when ``chat_history`` is non-empty the message may refer to
+    earlier turns, so it always goes to the agent.
+
+    ``invoke``/``ainvoke`` take and return the same dicts as AgentExecutor. A
+    routed message calls the tool directly and reports it to callbacks as an
+    agent action plus a tool run, so streaming clients see the same events.
+    ``router_stats.stats()`` reports the hit rate and the LLM time saved.
+    """
+
+    def __init__(self, agent_executor, tools, router):
+        self.agent_executor = agent_executor
+        self.tools = {tool.name: tool for tool in tools}
+        self.router = router
+        self.router_stats = RouterStats()
+
+    def __getattr__(self, name):
+        return getattr(self.agent_executor, name)
+
+    def route(self, inputs):
+        """Return the router's ``(tool_name, tool_input)`` for ``inputs``, or None to use the agent."""
+        if inputs.get("chat_history"):
+            return None
+        return self.router.route(inputs["input"])
+
+    def _result(self, inputs, action, observation):
+        return {**inputs, "output": observation, "intermediate_steps": [(action, observation)]}
+
+    def invoke(self, inputs, config=None, **kwargs):
+        start = time.perf_counter()
+        route = self.route(inputs)
+        if route is None:
+            result = self.agent_executor.invoke(inputs, config=config, **kwargs)
+            self.router_stats.fallthrough += 1
+            self.router_stats.agent_ms += (time.perf_counter() - start) * 1000.0
+            return result
+
+        tool_name, tool_input = route
+        action = AgentAction(tool=tool_name, tool_input=tool_input, log="Routed without the LLM")
+        run_manager = CallbackManager.configure((config or {}).get("callbacks")).on_chain_start(
+            {"name": type(self.router).__name__}, inputs
+        )
+        run_manager.on_agent_action(action)
+        observation = self.tools[tool_name].invoke(tool_input, config={"callbacks": run_manager.get_child()})
+        result = self._result(inputs, action, observation)
+        run_manager.on_chain_end(result)
+
+        self.router_stats.routed += 1
+        self.router_stats.routed_ms += (time.perf_counter() - start) * 1000.0
+        return result
+
+    async def ainvoke(self, inputs, config=None, **kwargs):
+        start = time.perf_counter()
+        route = self.route(inputs)
+        if route is None:
+            result = await self.agent_executor.ainvoke(inputs, config=config, **kwargs)
+            self.router_stats.fallthrough += 1
+            self.router_stats.agent_ms += (time.perf_counter() - start) * 1000.0
+            return result
+
+        tool_name, tool_input = route
+        action = AgentAction(tool=tool_name, tool_input=tool_input, log="Routed without the LLM")
+        run_manager = await AsyncCallbackManager.configure((config or {}).get("callbacks")).on_chain_start(
+            {"name": type(self.router).__name__}, inputs
+        )
+        await run_manager.on_agent_action(action)
+        observation = await self.tools[tool_name].ainvoke(tool_input, config={"callbacks": run_manager.get_child()})
+        result = self._result(inputs, action, observation)
+        await run_manager.on_chain_end(result)
+
+        self.router_stats.routed += 1
+        self.router_stats.routed_ms += (time.perf_counter() - start) * 1000.0
+        return result
@@ -0,0 +1,71 @@
+import pytest
+
+from agent import YearsRouter, make_tools
+from shared.routing import RoutedAgent
+
+
+class FakeClient:
+    base_url = "http://test"
+
+    def predict(self, years_from_now):
+        return {"predicted_price": 300000.0 + 1000.0 * years_from_now}
+
+    def predict_range(self, start, end, step=1):
+        years = list(range(start, end + 1, step))
+        return {"years_from_now": years, "predicted_prices": [300000.0 + 1000.0 * y for y in years]}
+
+
+class FakeExecutor:
+    def __init__(self):
+        self.calls = []
+
+    def invoke(self, inputs, config=None, **kwargs):
+        self.calls.append(inputs)
+        return {**inputs, "output": "from the LLM"}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("What will home prices be in 5 years?", ("predict_future_home_price", {"years_from_now": 5})),
+    ("Price 10 years from now?", ("predict_future_home_price", {"years_from_now": 10})),
+    ("years from now: 3", ("predict_future_home_price", {"years_from_now": 3})),
+    ("How will prices develop over the next 10 years?",
+     ("predict_home_price_trajectory", {"start_year": 1, "end_year": 10, "step": 1})),
+])
+def test_routes_future_questions(text, expected):
+    assert YearsRouter().route(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "What was the average price 5 years ago?",
+    "How much did prices rise in the last 3 years?",
+    "Will prices go up in 3 years or down?",
+    "What were prices like over the past 10 years?",
+    "Compare the price in 5 years and in 10 years",
+    "What is the price for a 5 year old house?",
+    "Tell me a joke about 5 years",
+])
+def test_leaves_past_ambiguous_and_bare_years_to_the_llm(text):
+    assert YearsRouter().route(text) is None
+
+
+def test_routed_agent_answers_without_the_llm():
+    executor = FakeExecutor()
+    agent = RoutedAgent(executor, make_tools(FakeClient()), YearsRouter())
+
+    result = agent.invoke({"input": "What will home prices be in 5 years?"})
+
+    assert executor.calls == []
+    assert "$305,000.00" in result["output"]
+    assert agent.router_stats.stats()["routed"] == 1
+
+
+def test_routed_agent_sends_follow_up_turns_to_the_llm():
+    executor = FakeExecutor()
+    agent = RoutedAgent(executor, make_tools(FakeClient()), YearsRouter())
+
+    result = agent.invoke({"input": "And in 5 years?", "chat_history": ["earlier turn"]})
+    result = agent.invoke({"input": "What about in 5 years?", "chat_history": ["earlier turn"]})
+
+    assert result["output"] == "from the LLM"
+    assert len(executor.calls) == 2
+    assert agent.router_stats.stats()["fallthrough"] == 2
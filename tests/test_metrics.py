@@ -0,0 +1,53 @@
+import asyncio
+
+from shared import metrics
+from shared.metrics import MetricsMiddleware, MetricsRegistry
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    stages = registry.histogram("stage_seconds", "Stage time", ("stage", "model_version"), buckets=(0.1,))
+    stages.labels('parse', 'v"1\\\n').observe(0.05)
+
+    text = registry.render()
+
+    assert 'stage_seconds_bucket{stage="parse",model_version="v\\"1\\\\\\n",le="0.1"} 1' in text
+    assert 'stage_seconds_count{stage="parse",model_version="v\\"1\\\\\\n"} 1' in text
+
+
+def test_gauge_callback_and_histogram_rendering():
+    registry = MetricsRegistry()
+    registry.gauge("model_info", "Loaded model", ("model_version", "serving_mode"),
+                   callback=lambda: {("20240101-000000", "table"): 1})
+    horizons = registry.histogram("prediction_horizons", "Horizons", ("route",), buckets=(1, 10))
+    horizons.labels("/predict/range").observe(5)
+
+    lines = registry.render().splitlines()
+
+    assert '# TYPE model_info gauge' in lines
+    assert 'model_info{model_version="20240101-000000",serving_mode="table"} 1' in lines
+    assert 'prediction_horizons_bucket{route="/predict/range",le="1.0"} 0' in lines
+    assert 'prediction_horizons_bucket{route="/predict/range",le="10.0"} 1' in lines
+    assert 'prediction_horizons_bucket{route="/predict/range",le="+Inf"} 1' in lines
+    assert 'prediction_horizons_sum{route="/predict/range"} 5.0' in lines
+
+
+def test_middleware_records_latency_per_route_and_status():
+    registry = MetricsRegistry()
+    duration = registry.histogram("http_request_duration_seconds", "Latency", ("method", "route", "status"))
+    in_flight = registry.gauge("http_requests_in_flight", "In flight", ("method",))
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 204})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    middleware = MetricsMiddleware(app, duration, in_flight)
+    asyncio.run(middleware({"type": "http", "method": "GET", "path": "/health"}, None, send))
+
+    text = registry.render()
+    assert 'http_request_duration_seconds_count{method="GET",route="unmatched",status="204"} 1' in text
+    assert 'http_requests_in_flight{method="GET"} 0.0' in text
+    assert metrics.LATENCY_BUCKETS[0] == 0.0001
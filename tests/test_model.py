@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from model import HomePricePredictor
+
+
+HORIZONS = [0, 1, 2.5, 7, 10, 30, -3]
+
+
+@pytest.fixture(scope="module")
+def trained():
+    predictor = HomePricePredictor()
+    predictor.train()
+    return predictor
+
+
+def test_predict_many_matches_per_row_predict(trained):
+    prices = trained.predict_many(HORIZONS)
+
+    assert prices.shape == (len(HORIZONS),)
+    assert prices.tolist() == [trained.predict(years) for years in HORIZONS]
+
+
+def test_predict_many_flattens_its_input(trained):
+    grid = np.array([[1, 2], [3, 4]])
+
+    assert trained.predict_many(grid).tolist() == trained.predict_many([1, 2, 3, 4]).tolist()
+    assert trained.predict_many([]).shape == (0,)
+
+
+@pytest.fixture
+def compiled(trained):
+    predictor = HomePricePredictor()
+    predictor.model = trained.model
+    predictor.compile(max_horizon=10)
+    return predictor
+
+
+def test_table_lookups_match_the_model(trained, compiled):
+    assert compiled.compiled and not trained.compiled
+    assert [compiled.predict(years) for years in range(11)] == [trained.predict(years) for years in range(11)]
+
+
+@pytest.mark.parametrize("years", [11, 30, 2.5, 10.5, -3])
+def test_horizons_outside_the_table_fall_back_to_the_closed_form(trained, compiled, years):
+    assert compiled.predict(years) == pytest.approx(trained.predict(years), abs=0.01)
+
+
+def test_compiled_predict_many_matches_per_row_predict(trained, compiled):
+    prices = compiled.predict_many(HORIZONS)
+
+    assert prices.tolist() == [compiled.predict(years) for years in HORIZONS]
+    np.testing.assert_allclose(prices, trained.predict_many(HORIZONS), atol=0.01)
+
+
+def test_training_or_loading_drops_the_table(compiled, tmp_path):
+    path = str(tmp_path / "model.pkl")
+    compiled.save(path)
+
+    assert compiled.load(path) and not compiled.compiled
+    compiled.compile(max_horizon=10)
+    compiled.train()
+    assert not compiled.compiled